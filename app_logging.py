@@ -0,0 +1,36 @@
+"""Seviyeli ve örneklemeli loglama.
+
+İstek başına loglar (cevap, oyun sonu vb.) varsayılan olarak DEBUG seviyesinde
+ve LOG_SAMPLE_RATE oranında örneklenerek yazılır; uyarı ve hatalar her zaman
+yazılır. Seviye kapalıyken log çağrısı mesaj oluşturmaz.
+"""
+import logging
+import os
+import random
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# İstek başına logların yazılma oranı (0..1)
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "0.01"))
+# Uygulama logları bu ad altında toplanır; kütüphane (uvicorn, httpx) loglarına dokunulmaz
+LOGGER_ROOT = "akinator"
+
+
+def setup_logging():
+    root = logging.getLogger(LOGGER_ROOT)
+    if root.handlers:
+        return
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    root.addHandler(handler)
+    root.setLevel(LOG_LEVEL)
+    root.propagate = False
+
+
+def get_logger(name: str) -> logging.Logger:
+    return logging.getLogger(f"{LOGGER_ROOT}.{name}")
+
+
+def log_sampled(logger: logging.Logger, level: int, msg: str, *args):
+    """Seviye açıksa ve örneklem tutarsa yaz (mesaj sadece yazılırken biçimlenir)"""
+    if logger.isEnabledFor(level) and random.random() < LOG_SAMPLE_RATE:
+        logger.log(level, msg, *args)
@@ -0,0 +1,71 @@
+"""Oyun başına sunucu CPU'su: sıralı /answer vs toplu /answers vs tek seferlik /evaluate.
+
+Uygulama ASGI üzerinden süreç içinde çağrılır; ölçülen süreç CPU'su istemci
+tarafının (httpx) istek başına maliyetini de içerir, yani istek sayısındaki
+azalmanın toplam etkisini gösterir. httpx gerekir.
+
+Kullanım: python benchmarks/batch_answers_cpu.py [oyun_sayısı]
+"""
+import asyncio
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main  # noqa: E402
+
+ANSWERS = list(main.LIKERT.keys())
+
+
+async def sequential(client: httpx.AsyncClient):
+    sid = (await client.get("/start")).json()["session_id"]
+    requests = 1
+    while True:
+        r = await client.post("/answer", json={"session_id": sid,
+                                               "answer": random.choice(ANSWERS)})
+        requests += 1
+        if r.json()["done"]:
+            return requests
+
+
+async def batched(client: httpx.AsyncClient):
+    sid = (await client.get("/start")).json()["session_id"]
+    answers = [{"answer": random.choice(ANSWERS)} for _ in range(main.MAX_QUESTIONS)]
+    r = await client.post("/answers", json={"session_id": sid, "answers": answers})
+    assert r.json()["done"]
+    return 2
+
+
+async def one_shot(client: httpx.AsyncClient):
+    questions = random.sample(range(len(main.POOLS.current)), main.MAX_QUESTIONS)
+    answers = [{"question_id": q, "answer": random.choice(ANSWERS)} for q in questions]
+    r = await client.post("/evaluate", json={"answers": answers})
+    assert r.json()["done"]
+    return 1
+
+
+async def run(games: int):
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        baseline = None
+        for name, play in (("/answer", sequential), ("/answers", batched), ("/evaluate", one_shot)):
+            with contextlib.redirect_stdout(io.StringIO()):
+                await play(client)  # ısınma
+                requests = 0
+                cpu = time.process_time()
+                for _ in range(games):
+                    requests += await play(client)
+                cpu = (time.process_time() - cpu) / games
+            baseline = baseline or cpu
+            print(f"{name:10s} {requests / games:5.2f} req/game  {cpu * 1e3:6.3f} ms CPU/game"
+                  f"  ({cpu / baseline:.2f}x)")
+
+
+if __name__ == "__main__":
+    asyncio.run(run(int(sys.argv[1]) if len(sys.argv) > 1 else 2000))
@@ -0,0 +1,87 @@
+"""Benchmark betikleri için ortak yardımcılar.
+
+Sonuçlar JSON olarak yazılır ({"benchmark", "params", "metrics", ...}); bir
+önceki çalışmanın dosyası --baseline ile verilirse metrik farkları yazdırılır.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from typing import Dict, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Benchmark'lar varsayılan olarak gerçek Firebase yerine bellekteki sahte istemciyi kullanır
+os.environ.setdefault("FIRESTORE_BACKEND", "memory")
+sys.path.insert(0, ROOT)
+
+
+async def asgi_request(app, method: str, path: str, body: bytes = b"") -> bytes:
+    """Uygulamayı HTTP istemcisi olmadan doğrudan ASGI ile çağır, yanıt gövdesini döndür"""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": method, "scheme": "http", "path": path, "raw_path": path.encode(),
+        "query_string": b"", "root_path": "", "client": ("127.0.0.1", 1), "server": ("bench", 80),
+        "headers": [(b"host", b"bench"), (b"content-type", b"application/json")],
+    }
+    received = False
+
+    async def receive():
+        nonlocal received
+        if received:
+            return {"type": "http.disconnect"}
+        received = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    chunks = []
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return b"".join(chunks)
+
+
+def add_result_args(parser: argparse.ArgumentParser):
+    parser.add_argument("--out", help="sonuçları bu JSON dosyasına yaz")
+    parser.add_argument("--baseline", help="önceki bir sonuç dosyasıyla karşılaştır")
+
+
+def percentile(sorted_values, q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[int(q * (len(sorted_values) - 1))]
+
+
+def write_results(name: str, params: Dict, metrics: Dict[str, float],
+                  out: Optional[str] = None, baseline: Optional[str] = None) -> Dict:
+    result = {
+        "benchmark": name,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "firestore_backend": os.environ.get("FIRESTORE_BACKEND", ""),
+        "params": params,
+        "metrics": metrics,
+    }
+    if out:
+        with open(out, "w") as f:
+            json.dump(result, f, indent=2, sort_keys=True)
+        print(f"✅ Results written to {out}")
+    if baseline:
+        compare(baseline, metrics)
+    return result
+
+
+def compare(baseline_path: str, metrics: Dict[str, float]):
+    with open(baseline_path) as f:
+        base = json.load(f)["metrics"]
+    print(f"{'metric':32s} {'baseline':>12s} {'current':>12s} {'change':>8s}")
+    for key, value in sorted(metrics.items()):
+        old = base.get(key)
+        if not isinstance(old, (int, float)) or not isinstance(value, (int, float)):
+            continue
+        change = f"{(value - old) / old * 100:+7.1f}%" if old else "      -"
+        print(f"{key:32s} {old:12.4f} {value:12.4f} {change}")
@@ -0,0 +1,185 @@
+"""game_results sütunlu dışa aktarımı: yazma, artımlı ekleme, yükleme hızı.
+
+Bellekteki sahte Firestore'a --games sentetik oyun sonucu yazılır (aynı zaman
+damgasını paylaşan kayıtlar dahil) ve FirebaseService.export_game_results ile
+dosyaya aktarılır. Ardından --new-games yeni kayıt eklenip ikinci çalıştırmanın
+sadece onları eklediği, son blok yarım kesildiğinde (çökme) dosyanın
+toparlandığı ve yüklenen cevap matrisinin likelihood_model.answer_matrix ile
+aynı satırları içerdiği (eksik / tekrar eden satır yok) doğrulanır. Dosya yazım
+sırasında, akış oyun zamanı sırasında olduğundan satırlar sıralanıp karşılaştırılır.
+
+Yükleme hızı, aynı oyunların Firestore akışından (stream_game_results)
+cevap matrisine çevrilmesiyle karşılaştırılır; yüklenen oyunlar son olarak
+score_answer_matrix ile toplu puanlanır.
+
+Kullanım: python benchmarks/export_games.py [--games 200000] [--new-games 20000]
+          [--page-size 5000] [--block-rows 50000] [--out sonuc.json] [--baseline onceki.json]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+import common
+
+parser = argparse.ArgumentParser(description="game_results sütunlu dışa aktarımı")
+parser.add_argument("--games", type=int, default=200_000)
+parser.add_argument("--new-games", type=int, default=20_000)
+parser.add_argument("--page-size", type=int, default=5000)
+parser.add_argument("--block-rows", type=int, default=50_000)
+parser.add_argument("--seed", type=int, default=0)
+common.add_result_args(parser)
+args = parser.parse_args()
+
+# Sahte Firestore tüm kayıtları tutsun (ayar modül yüklenirken okunur)
+os.environ["FIRESTORE_MEMORY_MAX_DOCS"] = str(2 * (args.games + args.new_games))
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+import main  # noqa: E402
+from firebase_service import firebase_service  # noqa: E402
+from game_export import ExportFile, load_export  # noqa: E402
+from likelihood_model import NOT_ASKED, answer_matrix, stream_game_results  # noqa: E402
+from result_writer import WRITTEN_AT, server_timestamp  # noqa: E402
+
+BASE_TIME = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def fill(db, rng: random.Random, start: int, count: int, n_questions: int, version: int):
+    """count sentetik sonuç yaz; üçer kayıt aynı zaman damgasını, her batch aynı yazım
+    zamanını paylaşır (imleçte ID sırası gerekir)."""
+    labels = [*main.CLASSES, "Belirsiz"]
+    batch = db.batch()
+    for i in range(start, start + count):
+        asked = rng.sample(range(n_questions), rng.randint(main.MIN_QUESTIONS, main.MAX_QUESTIONS))
+        weights = [rng.random() for _ in main.CLASSES]
+        total = sum(weights)
+        batch.set(db.collection("game_results").document(f"{rng.getrandbits(64):016x}"), {
+            "timestamp": BASE_TIME + timedelta(milliseconds=start + (i - start) // 3),
+            "predicted_class": rng.choice(labels),
+            "asked_questions": asked,
+            "confidences": {c: w / total for c, w in zip(main.CLASSES, weights)},
+            "total_questions": len(asked),
+            "answers": [rng.randint(-2, 2) for _ in asked],
+            # Eski kayıtlarda havuz sürümü yok
+            "pool_version": version if i % 50 else None,
+            WRITTEN_AT: server_timestamp(db),
+        })
+        if (i + 1) % 500 == 0:
+            batch.commit()
+            batch = db.batch()
+    batch.commit()
+
+
+def check(path: str, db, n_questions: int, version: int) -> dict:
+    """Dosya ile koleksiyonun cevap matrisleri aynı satırları içeriyor mu"""
+    export = load_export(path)
+    expected, _ = answer_matrix(stream_game_results(db), n_questions, version)
+    loaded = export.answer_matrix(n_questions, version)
+    return {"rows": len(export), "matrix_equal": bool(np.array_equal(sort_rows(expected),
+                                                                     sort_rows(loaded)))}
+
+
+def sort_rows(matrix: np.ndarray) -> np.ndarray:
+    return matrix[np.lexsort(matrix.T[::-1])] if len(matrix) else matrix
+
+
+async def run():
+    pool = main.POOLS.current
+    n_questions = pool.weight_matrix.shape[0]
+    rng = random.Random(args.seed)
+    db = firebase_service.db
+    metrics = {}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "game_results.akgx")
+
+        async def export() -> dict:
+            started = time.perf_counter()
+            # Kayıtlar az önce yazıldı: bekleme payı olmadan
+            summary = await firebase_service.export_game_results(
+                path, main.CLASSES, args.page_size, args.block_rows, settle=0)
+            summary["seconds"] = time.perf_counter() - started
+            return summary
+
+        fill(db, rng, 0, args.games, n_questions, pool.version)
+        full = await export()
+        metrics["full_export_seconds"] = full["seconds"]
+        metrics["full_export_games_per_sec"] = full["exported"] / full["seconds"]
+        metrics["bytes_per_game"] = os.path.getsize(path) / full["exported"]
+        print(f"full export   {full['exported']} games in {full['seconds']:.2f}s "
+              f"({metrics['full_export_games_per_sec']:.0f} games/s, {full['pages']} pages, "
+              f"{full['blocks']} blocks, {metrics['bytes_per_game']:.0f} B/game)")
+
+        again = await export()
+        metrics["noop_export_exported"] = again["exported"]
+
+        fill(db, rng, args.games, args.new_games, n_questions, pool.version)
+        incremental = await export()
+        metrics["incremental_exported"] = incremental["exported"]
+        metrics["incremental_seconds"] = incremental["seconds"]
+        result = check(path, db, n_questions, pool.version)
+        metrics["rows_after_incremental"] = result["rows"]
+        metrics["matrix_equal_after_incremental"] = result["matrix_equal"]
+        print(f"incremental   {incremental['exported']} new games in {incremental['seconds']:.2f}s "
+              f"(re-run without new games exported {again['exported']}); "
+              f"{result['rows']} rows, matrix equal: {result['matrix_equal']}")
+
+        # Çökme: son blok yarıda kalmış -> açılışta kesilir, sonraki çalıştırma tekrar ekler
+        size = os.path.getsize(path)
+        with open(path, "r+b") as f:
+            f.truncate(size - 1000)
+        blocks_before = incremental["blocks"]
+        reopened = ExportFile(path, main.CLASSES)
+        recovered = await export()
+        result = check(path, db, n_questions, pool.version)
+        metrics["torn_block_dropped"] = blocks_before - reopened.blocks
+        metrics["recovered_exported"] = recovered["exported"]
+        metrics["rows_after_recovery"] = result["rows"]
+        metrics["matrix_equal_after_recovery"] = result["matrix_equal"]
+        print(f"torn tail     dropped {metrics['torn_block_dropped']} block, re-exported "
+              f"{recovered['exported']} games; {result['rows']} rows, "
+              f"matrix equal: {result['matrix_equal']}")
+
+        total = args.games + args.new_games
+        started = time.perf_counter()
+        loaded = load_export(path)
+        answers = loaded.answer_matrix(n_questions, pool.version)
+        load_seconds = time.perf_counter() - started
+        started = time.perf_counter()
+        answer_matrix(stream_game_results(db), n_questions, pool.version)
+        stream_seconds = time.perf_counter() - started
+        metrics["load_seconds"] = load_seconds
+        metrics["load_games_per_sec"] = total / load_seconds
+        metrics["stream_games_per_sec"] = total / stream_seconds
+        metrics["load_speedup"] = stream_seconds / load_seconds
+
+        # Toplu puanlama: cevap indeksleri -> Likert değerleri (sorulmayan 0)
+        started = time.perf_counter()
+        likert = np.where(answers == NOT_ASKED, 0, 2 - answers).astype(np.float64)
+        scores = main.score_answer_matrix(likert, pool)
+        metrics["score_seconds"] = time.perf_counter() - started
+        print(f"load          {total} games in {load_seconds:.3f}s "
+              f"({metrics['load_games_per_sec']:.0f} games/s) vs Firestore stream "
+              f"{stream_seconds:.2f}s ({metrics['load_speedup']:.0f}x); "
+              f"scored {scores.shape[0]} games in {metrics['score_seconds']:.3f}s")
+
+    await firebase_service.shutdown()
+    common.write_results("export_games",
+                         {"games": args.games, "new_games": args.new_games,
+                          "page_size": args.page_size, "block_rows": args.block_rows,
+                          "seed": args.seed},
+                         metrics, args.out, args.baseline)
+    if not (metrics["matrix_equal_after_incremental"] and metrics["matrix_equal_after_recovery"]
+            and metrics["incremental_exported"] == args.new_games
+            and metrics["rows_after_recovery"] == total):
+        sys.exit("export does not match game_results")
+
+
+if __name__ == "__main__":
+    asyncio.run(run())
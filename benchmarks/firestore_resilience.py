@@ -0,0 +1,197 @@
+"""Firestore yavaşladığında oyun istekleri ve arka plan işleri.
+
+Bellekteki sahte Firestore'a çağrı başına gecikme eklenerek üç evre oynatılır:
+sağlıklı (gecikme yok), kesinti (--latency saniye, süre bütçelerinden uzun) ve
+toparlanma (gecikme yok). Eşzamanlı oyuncular bu sırada uygulamayı ASGI
+üzerinden oynar. Her evre için istek gecikmesi (p50/p99), ağırlık önbelleğinin
+en büyük yaşı, aynı anda süren Firestore çağrısı sayısı raporlanır; sonunda
+devre kesici sayaçları, toparlanmadan sonra devrenin kapanma ve yazım
+kuyruğunun sağlıklı seviyeye inme süresi ve kaybolan sonuç olup olmadığı
+(written == games) gösterilir.
+
+İki kip karşılaştırılır (her biri ayrı süreçte):
+  breaker    varsayılan süre bütçeleri ve devre kesici (küçültülmüş süreler)
+  unbounded  bütçe ve devre kesici fiilen kapalı (eski davranış)
+
+Kullanım: python benchmarks/firestore_resilience.py [--latency 3] [--outage 10]
+          [--mode both|breaker|unbounded] [--out sonuc.json] [--baseline onceki.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+import common
+
+MODES = {
+    "breaker": {
+        "FIRESTORE_READ_DEADLINE": "0.25",
+        "FIRESTORE_WRITE_DEADLINE": "0.5",
+        "FIRESTORE_BREAKER_FAILURES": "3",
+        "FIRESTORE_BREAKER_RESET": "1.5",
+    },
+    "unbounded": {
+        "FIRESTORE_READ_DEADLINE": "3600",
+        "FIRESTORE_WRITE_DEADLINE": "3600",
+        "FIRESTORE_BREAKER_FAILURES": "1000000000",
+        "FIRESTORE_BREAKER_RESET": "1.5",
+    },
+}
+COMMON_ENV = {
+    "FIRESTORE_BACKEND": "memory",
+    "LOG_LEVEL": "ERROR",
+    "WEIGHTS_CACHE_TTL": "0.25",
+    "AREA_RECONCILE_INTERVAL": "0.5",
+    "RESULT_FLUSH_INTERVAL": "0.2",
+    "RESULT_JOURNAL_DIR": "",
+}
+
+
+def percentile(values, fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+async def measure(args) -> dict:
+    import main
+    from firebase_service import firebase_service
+
+    db = firebase_service.db
+    answers = [key.encode() for key in main.LIKERT]
+    phase = {"name": "healthy"}
+    latencies = {"healthy": [], "outage": [], "recovery": []}
+    weights_age = dict.fromkeys(latencies, 0.0)
+    inflight = dict.fromkeys(latencies, 0)
+    queued = dict.fromkeys(latencies, 0)
+    rpcs_at = {}
+    finished = 0
+    stop = asyncio.Event()
+
+    async def timed(method: str, path: str, body: bytes = b"") -> bytes:
+        started = time.perf_counter()
+        out = await common.asgi_request(main.app, method, path, body)
+        latencies[phase["name"]].append(time.perf_counter() - started)
+        return out
+
+    async def player(seed: int):
+        nonlocal finished
+        rng = random.Random(seed)
+        while not stop.is_set():
+            sid = json.loads(await timed("GET", "/start"))["session_id"].encode()
+            while True:
+                body = b'{"session_id":"%s","answer":"%s"}' % (sid, rng.choice(answers))
+                if b'"done":true' in await timed("POST", "/answer", body):
+                    finished += 1
+                    break
+            # Oyuncular arası düşünme süresi; thread havuzu ve döngü nefes alsın
+            await asyncio.sleep(rng.uniform(0.0, 0.01))
+
+    async def monitor():
+        while not stop.is_set():
+            name = phase["name"]
+            age = firebase_service.weights_cache_stats()["age_seconds"] or 0.0
+            weights_age[name] = max(weights_age[name], age)
+            inflight[name] = max(inflight[name], db.inflight)
+            queued[name] = max(queued[name], firebase_service.result_writer.stats()["queued"])
+            await asyncio.sleep(0.02)
+
+    firebase_service.warm_up()
+    tasks = [asyncio.create_task(player(args.seed + i)) for i in range(args.players)]
+    tasks.append(asyncio.create_task(monitor()))
+
+    await asyncio.sleep(args.healthy)
+    rpcs_at["outage"] = db.rpcs
+    phase["name"], db.latency = "outage", args.latency
+    await asyncio.sleep(args.outage)
+    rpcs_at["recovery"] = db.rpcs
+    phase["name"], db.latency = "recovery", 0.0
+    recovered_at = time.perf_counter()
+    closed_after = drained_after = None
+    while time.perf_counter() - recovered_at < args.recovery:
+        elapsed = time.perf_counter() - recovered_at
+        if closed_after is None and firebase_service.breaker.state == "closed":
+            closed_after = elapsed
+        # Oyunlar sürdüğü için kuyruk sıfırlanmaz; sağlıklı evredeki seviyeye inmesi yeterli
+        if drained_after is None and closed_after is not None \
+                and firebase_service.result_writer.stats()["queued"] <= queued["healthy"]:
+            drained_after = elapsed
+        await asyncio.sleep(0.02)
+
+    stop.set()
+    await asyncio.gather(*tasks)
+    await firebase_service.shutdown()
+    writer = firebase_service.result_writer.stats()
+
+    metrics = {}
+    for name, values in latencies.items():
+        metrics[f"{name}_requests"] = len(values)
+        metrics[f"{name}_p50_ms"] = percentile(values, 0.5) * 1e3
+        metrics[f"{name}_p99_ms"] = percentile(values, 0.99) * 1e3
+        metrics[f"{name}_max_weights_age_s"] = weights_age[name]
+        metrics[f"{name}_max_inflight_rpcs"] = inflight[name]
+        metrics[f"{name}_max_queued_results"] = queued[name]
+    metrics["outage_rpcs"] = rpcs_at["recovery"] - rpcs_at["outage"]
+    metrics.update({f"breaker_{key}": value for key, value in firebase_service.breaker.stats().items()
+                    if key in ("trips", "timeouts", "rejected", "probes", "slow_calls")})
+    metrics["closed_after_recovery_s"] = closed_after
+    metrics["drained_after_recovery_s"] = drained_after
+    metrics["games"] = finished
+    metrics["written"] = writer["written"]
+    metrics["dropped"] = writer["dropped"]
+    metrics["lost"] = finished - writer["written"]
+    return metrics
+
+
+def run_mode(mode: str, args) -> dict:
+    """Modu ayrı süreçte çalıştır (ayarlar modül yüklenirken okunur)"""
+    env = dict(os.environ, **COMMON_ENV, **MODES[mode])
+    command = [sys.executable, __file__, "--mode", mode, "--child",
+               "--latency", str(args.latency), "--healthy", str(args.healthy),
+               "--outage", str(args.outage), "--recovery", str(args.recovery),
+               "--players", str(args.players), "--seed", str(args.seed)]
+    out = subprocess.run(command, env=env, check=True, capture_output=True, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def report(args):
+    modes = list(MODES) if args.mode == "both" else [args.mode]
+    results = {mode: run_mode(mode, args) for mode in modes}
+    keys = list(next(iter(results.values())))
+    print(f"{'':34s}" + "".join(f"{mode:>12s}" for mode in modes))
+    for key in keys:
+        cells = []
+        for mode in modes:
+            value = results[mode][key]
+            cells.append(f"{'-':>12s}" if value is None
+                         else f"{value:12.2f}" if isinstance(value, float) else f"{value:12d}")
+        print(f"{key:34s}" + "".join(cells))
+    metrics = {f"{mode}_{key}": value for mode, values in results.items()
+               for key, value in values.items() if value is not None}
+    common.write_results("firestore_resilience",
+                         {"latency": args.latency, "healthy": args.healthy, "outage": args.outage,
+                          "recovery": args.recovery, "players": args.players, "seed": args.seed},
+                         metrics, args.out, args.baseline)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Firestore kesintisinde davranış")
+    parser.add_argument("--mode", choices=("both", *MODES), default="both")
+    parser.add_argument("--latency", type=float, default=3.0, help="kesintide çağrı başına gecikme (s)")
+    parser.add_argument("--healthy", type=float, default=3.0)
+    parser.add_argument("--outage", type=float, default=10.0)
+    parser.add_argument("--recovery", type=float, default=8.0)
+    parser.add_argument("--players", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    common.add_result_args(parser)
+    parsed = parser.parse_args()
+    if parsed.child:
+        print(json.dumps(asyncio.run(measure(parsed))))
+    else:
+        report(parsed)
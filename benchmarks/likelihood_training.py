@@ -0,0 +1,93 @@
+"""Öğrenilmiş cevap olabilirlik modeli: eğitim süresi ve oyun başına soru sayısına etkisi.
+
+Gerçek oyuncular elle verilmiş ağırlıkların örtük modeline tam uymaz; bunu
+taklit etmek için personalar ağırlık matrisinin rastgele bozulmuş bir
+kopyasından (--drift) üretilir. Önce elle ağırlıklarla --train-games oyun
+oynatılıp sonuçlar bellekteki sahte Firestore'a yazılır; model bu kayıtlardan
+(game_results akışı) eğitilir. Ardından aynı personalarla elle ağırlıklar ve
+öğrenilmiş model ayrı ayrı --games oyun oynar; soru sayısı, doğruluk ve
+Belirsiz oranı karşılaştırılır.
+
+Kullanım: python benchmarks/likelihood_training.py [--train-games 50000] [--games 20000]
+          [--drift 0.5] [--policy tree|random] [--out sonuc.json] [--baseline onceki.json]
+"""
+import argparse
+import asyncio
+import contextlib
+import os
+import time
+
+import numpy as np
+
+import common
+
+# Diskteki model dosyası karşılaştırmayı bozmasın; model burada eğitilir
+os.environ["LIKELIHOOD_MODEL_PATH"] = ""
+
+import main  # noqa: E402
+import simulate_games  # noqa: E402
+from firebase_service import firebase_service  # noqa: E402
+from likelihood_model import stream_game_results, train  # noqa: E402
+from question_tree import answer_likelihoods  # noqa: E402
+
+
+def drifted_likelihoods(weight_matrix: np.ndarray, drift: float, seed: int) -> np.ndarray:
+    """Oyuncuların 'gerçek' cevap modeli: ağırlıklar ölçeklenip gürültü eklenmiş"""
+    rng = np.random.default_rng(seed)
+    scale = rng.uniform(1 - drift, 1 + drift, size=weight_matrix.shape)
+    noise = rng.normal(0.0, drift * 0.6, size=weight_matrix.shape)
+    return answer_likelihoods(weight_matrix * scale + noise)
+
+
+async def run(args):
+    # Ağaç varsayılan kapalı; politika bayrağı açıkça belirler
+    main.QUESTION_TREE_ENABLED = args.policy == "tree"
+    pool = main.POOLS.current
+    truth = drifted_likelihoods(pool.weight_matrix, args.drift, args.seed)
+    personas, keys = simulate_games.build_personas(args.noise, truth)
+    metrics = {}
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        firebase_service.warm_up()
+        await simulate_games.play(args.train_games, personas, keys, args.seed + 1)
+        # Tüm sonuçlar yazılsın (eğitim game_results'tan okur)
+        while firebase_service.result_writer.stats()["queued"]:
+            await asyncio.sleep(0.01)
+
+        started = time.perf_counter()
+        model, summary = train(stream_game_results(firebase_service.db), pool.weight_matrix,
+                               pool.version, args.prior_strength, args.iterations, holdout=0.1)
+        metrics["train_seconds"] = time.perf_counter() - started
+        metrics.update({k: v for k, v in summary.items() if k != "skipped"})
+
+        for name, candidate in (("hand", pool), ("learned", pool.replace(model=model))):
+            main.POOLS.current = candidate
+            result = await simulate_games.play(args.games, personas, keys, args.seed + 2)
+            for key in ("questions_per_game", "accuracy", "mean_confidence", "uncertain_rate",
+                        "games_per_sec"):
+                metrics[f"{name}_{key}"] = result[key]
+        main.POOLS.current = pool
+        await firebase_service.shutdown()
+
+    for key, value in metrics.items():
+        print(f"{key:36s} {value:.4f}" if isinstance(value, float) else f"{key:36s} {value}")
+    common.write_results("likelihood_training",
+                         {"train_games": args.train_games, "games": args.games,
+                          "drift": args.drift, "noise": args.noise, "policy": args.policy,
+                          "prior_strength": args.prior_strength, "seed": args.seed},
+                         metrics, args.out, args.baseline)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Öğrenilmiş olabilirlik modeli")
+    parser.add_argument("--train-games", type=int, default=50000)
+    parser.add_argument("--games", type=int, default=20000)
+    parser.add_argument("--drift", type=float, default=0.5,
+                        help="gerçek cevap modelinin elle ağırlıklardan sapması")
+    parser.add_argument("--noise", type=float, default=0.1, help="rastgele cevap oranı")
+    parser.add_argument("--policy", choices=("tree", "random"), default="tree")
+    parser.add_argument("--prior-strength", type=float, default=10.0)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    common.add_result_args(parser)
+    asyncio.run(run(parser.parse_args()))
@@ -0,0 +1,116 @@
+"""ASGI yük testi: eşzamanlı oyuncularla /start ve /answer.
+
+Varsayılan olarak uygulama süreç içinde httpx.ASGITransport ile çağrılır ve
+sonuçlar bellekteki sahte Firestore'a yazılır (FIRESTORE_BACKEND=memory).
+--url verilirse çalışan bir sunucuya gerçek HTTP ile gidilir. Uç nokta başına
+p50/p99 gecikme ve toplam istek hızı yazdırılır. httpx gerekir.
+
+Kullanım: python benchmarks/load_harness.py [--games 5000] [--concurrency 50]
+          [--url http://localhost:8000] [--out sonuc.json] [--baseline onceki.json]
+"""
+import argparse
+import asyncio
+import contextlib
+import os
+import random
+import time
+from typing import Dict, List
+
+import httpx
+
+import common
+
+import main  # noqa: E402
+from firebase_service import firebase_service  # noqa: E402
+
+ANSWERS = list(main.LIKERT.keys())
+
+
+async def player(client: httpx.AsyncClient, games: List[int],
+                 latencies: Dict[str, List[float]], errors: List[int], token_mode: bool):
+    while games:
+        games.pop()
+        t0 = time.perf_counter()
+        r = await client.get("/start")
+        latencies["/start"].append(time.perf_counter() - t0)
+        if r.status_code != 200:
+            errors.append(r.status_code)
+            continue
+        start = r.json()
+        ref = {"token": start["token"]} if token_mode else {"session_id": start["session_id"]}
+        while True:
+            t0 = time.perf_counter()
+            r = await client.post("/answer", json={**ref, "answer": random.choice(ANSWERS)})
+            latencies["/answer"].append(time.perf_counter() - t0)
+            if r.status_code != 200:
+                errors.append(r.status_code)
+                break
+            out = r.json()
+            if out["done"]:
+                break
+            if token_mode:
+                ref = {"token": out["token"]}
+
+
+async def run_load(client: httpx.AsyncClient, games: int, concurrency: int, token_mode: bool):
+    latencies: Dict[str, List[float]] = {"/start": [], "/answer": []}
+    errors: List[int] = []
+    remaining = list(range(games))
+    started = time.perf_counter()
+    await asyncio.gather(*(player(client, remaining, latencies, errors, token_mode)
+                           for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    requests = sum(len(v) for v in latencies.values())
+    metrics = {
+        "games": games,
+        "elapsed_s": elapsed,
+        "requests": requests,
+        "requests_per_sec": requests / elapsed,
+        "games_per_sec": games / elapsed,
+        "errors": len(errors),
+    }
+    for endpoint, values in latencies.items():
+        values.sort()
+        name = endpoint.strip("/")
+        metrics[f"{name}_p50_ms"] = common.percentile(values, 0.50) * 1e3
+        metrics[f"{name}_p99_ms"] = common.percentile(values, 0.99) * 1e3
+        metrics[f"{name}_max_ms"] = (values[-1] if values else 0.0) * 1e3
+    return metrics
+
+
+async def run(args):
+    token_mode = args.session_mode == "token"
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=30,
+                                   limits=httpx.Limits(max_connections=args.concurrency))
+        async with client:
+            metrics = await run_load(client, args.games, args.concurrency, token_mode)
+    else:
+        main.SESSION_MODE = args.session_mode
+        transport = httpx.ASGITransport(app=main.app)
+        # ASGITransport lifespan çalıştırmaz; açılış/kapanış burada yapılır
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            firebase_service.warm_up()
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+                await run_load(client, min(200, args.games), args.concurrency, token_mode)  # ısınma
+                metrics = await run_load(client, args.games, args.concurrency, token_mode)
+            await firebase_service.shutdown()
+        metrics["firestore_writes"] = firebase_service.db.writes
+
+    for key, value in metrics.items():
+        print(f"{key:20s} {value:.3f}" if isinstance(value, float) else f"{key:20s} {value}")
+    common.write_results("load_harness", {"concurrency": args.concurrency,
+                                          "session_mode": args.session_mode,
+                                          "target": args.url or "asgi"},
+                         metrics, args.out, args.baseline)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="/start ve /answer yük testi")
+    parser.add_argument("--games", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--session-mode", choices=("server", "token"), default="server")
+    parser.add_argument("--url", help="süreç içi ASGI yerine bu sunucuya bağlan")
+    common.add_result_args(parser)
+    asyncio.run(run(parser.parse_args()))
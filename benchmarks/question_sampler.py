@@ -0,0 +1,91 @@
+"""Ağırlıklı soru seçimi: soru listesi + random.choices vs kategori sayımı vs alias tablosu.
+
+Büyüyen sentetik havuzlarda (her kategoride eşit soru) seçim başına süre ölçülür.
+Seçim dağılımının soru başına ağırlıklı seçimle (eski mantık) aynı olduğu
+tests/test_question_sampler.py'de sabit tohumla doğrulanır.
+
+Kullanım: python benchmarks/question_sampler.py [--number 20000] [--out sonuc.json] [--baseline onceki.json]
+"""
+import argparse
+import random
+import timeit
+
+import common
+
+import main  # noqa: E402
+from question_pool import MAX_POOL_QUESTIONS, CompiledPool  # noqa: E402
+
+POOL_SIZES = (22, 64, 128, MAX_POOL_QUESTIONS)
+GLOBAL_WEIGHTS = {"Proje-Yarışma": 0.8, "Medya": 1.4, "Network": 1.0,
+                  "Organizasyon": 1.2, "Eğitim": 0.6}
+
+
+def list_weights(session):
+    """Eski mantık: sorulmamış her soru için ağırlık listesi"""
+    min_count = min(session.area_counts)
+    available, weights = [], []
+    for i, category in enumerate(session.pool.category):
+        if session.asked_mask >> i & 1:
+            continue
+        base_weight = 3.0 if session.area_counts[category] == min_count else 1.0
+        available.append(i)
+        weights.append(base_weight * session.global_weights[category])
+    return available, weights
+
+
+def list_next(session):
+    available, weights = list_weights(session)
+    return random.choices(available, weights=weights, k=1)[0]
+
+
+def list_start(pool, global_weights):
+    weights = [global_weights.get(main.CLASSES[c], 1.0) for c in pool.category]
+    return random.choices(range(len(pool)), weights=weights, k=1)[0]
+
+
+def session_with(pool, asked):
+    st = main.GameSession(main.weights_vector(GLOBAL_WEIGHTS), pool)
+    for q in asked:
+        main.update_session_stats(st, q)
+    return st
+
+
+def synthetic_pool(size: int) -> CompiledPool:
+    questions = [{"q": f"Soru {i}", "w": {c: 1.0}, "category": c, "tags": []}
+                 for i, c in ((i, main.CLASSES[i % len(main.CLASSES)]) for i in range(size))]
+    return CompiledPool(size, questions, main.CLASSES, tree_path=None)
+
+
+def run(args):
+    metrics = {}
+    print(f"{'pool':>5s} {'op':6s} {'list us':>9s} {'linear us':>10s} {'alias us':>9s}")
+    for size in POOL_SIZES:
+        pool = synthetic_pool(size)
+        rng = random.Random(size)
+        # Oyun ortası: bir başlangıç sorusu ve birkaç cevap
+        st = session_with(pool, rng.sample(range(size), 4))
+        number = args.number
+        timings = {
+            ("next", "list"): lambda: list_next(st),
+            ("next", "linear"): lambda: main._get_next_question_linear(st),
+            ("next", "alias"): lambda: main.get_next_question(st),
+            ("start", "list"): lambda: list_start(pool, GLOBAL_WEIGHTS),
+            ("start", "alias"): lambda: main.get_weighted_starting_question(GLOBAL_WEIGHTS, pool),
+        }
+        us = {key: min(timeit.repeat(fn, number=number, repeat=3)) / number * 1e6
+              for key, fn in timings.items()}
+        for op in ("next", "start"):
+            linear = us.get((op, "linear"))
+            print(f"{size:5d} {op:6s} {us[(op, 'list')]:9.2f} "
+                  f"{linear if linear is not None else float('nan'):10.2f} {us[(op, 'alias')]:9.2f}")
+        for (op, method), value in us.items():
+            metrics[f"{op}_{method}_us_pool{size}"] = value
+    common.write_results("question_sampler", {"number": args.number},
+                         metrics, args.out, args.baseline)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ağırlıklı soru seçimi")
+    parser.add_argument("--number", type=int, default=20_000)
+    common.add_result_args(parser)
+    run(parser.parse_args())
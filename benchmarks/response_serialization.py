@@ -0,0 +1,106 @@
+"""Soru yanıtı serileştirme CPU'su: Pydantic response_model yolu vs önceden kodlanmış baytlar.
+
+İki ölçüm yapılır:
+  1. Sadece serileştirme: FastAPI'nin yaptığı gibi NextOut kurulup response_model
+     alanıyla doğrulanır ve JSONResponse'a yazılır; karşısında hazır parçalarla
+     birleştirilen RawJSONResponse.
+  2. Uçtan uca: uygulama ASGI üzerinden (HTTP istemcisi olmadan) doğrudan
+     çağrılır; /answer isteği başına süreç CPU'su, RESPONSE_VALIDATION açık ve
+     kapalı.
+
+Kullanım: python benchmarks/response_serialization.py [--games 3000] [--out sonuc.json] [--baseline onceki.json]
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+import common
+
+import main  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+
+ANSWERS = [key.encode() for key in main.LIKERT]
+
+
+def answer_route():
+    return next(r for r in main.app.routes if getattr(r, "path", None) == "/answer")
+
+
+async def serialize_only(number: int):
+    field = answer_route().response_field
+    pool = main.POOLS.current
+    responses = main.question_responses(pool)
+    q, i = 7, 3
+
+    async def pydantic_path():
+        content = await serialize_response(field=field, response_content=main.NextOut(
+            done=False, question_index=i, question=pool.texts[q],
+            choices=list(main.LIKERT.keys()), question_id=q, token=None))
+        return JSONResponse(content)
+
+    def fast_path():
+        return responses.next_question(q, i, None)
+
+    assert (await pydantic_path()).body == fast_path().body
+    started = time.process_time()
+    for _ in range(number):
+        await pydantic_path()
+    slow = (time.process_time() - started) / number
+    started = time.process_time()
+    for _ in range(number):
+        fast_path()
+    fast = (time.process_time() - started) / number
+    return slow, fast
+
+
+async def call(method: str, path: str, body: bytes = b"") -> bytes:
+    return await common.asgi_request(main.app, method, path, body)
+
+
+async def play(games: int, rng: random.Random):
+    """/answer (oyun sonu hariç) istek başına CPU saniyesi"""
+    cpu, requests = 0.0, 0
+    for _ in range(games):
+        start = json.loads(await call("GET", "/start"))
+        sid = start["session_id"].encode()
+        while True:
+            body = b'{"session_id":"%s","answer":"%s"}' % (sid, rng.choice(ANSWERS))
+            before = time.process_time()
+            out = await call("POST", "/answer", body)
+            elapsed = time.process_time() - before
+            if b'"done":true' in out:
+                break
+            cpu += elapsed
+            requests += 1
+    return cpu / requests, requests
+
+
+async def run(args):
+    slow, fast = await serialize_only(args.number)
+    metrics = {"serialize_pydantic_us": slow * 1e6, "serialize_prebuilt_us": fast * 1e6}
+    print(f"serialize only   pydantic={slow * 1e6:7.2f}us  prebuilt={fast * 1e6:7.2f}us")
+
+    main.firebase_service.warm_up()
+    for name, validate in (("pydantic", True), ("prebuilt", False)):
+        main.RESPONSE_VALIDATION = validate
+        await play(min(300, args.games), random.Random(1))  # ısınma
+        per_request, requests = await play(args.games, random.Random(args.seed))
+        metrics[f"answer_cpu_{name}_us"] = per_request * 1e6
+        print(f"/answer end-to-end {name:9s} {per_request * 1e6:7.1f}us CPU/request "
+              f"({requests} requests)")
+    await main.firebase_service.shutdown()
+    metrics["answer_cpu_saved_us"] = metrics["answer_cpu_pydantic_us"] - metrics["answer_cpu_prebuilt_us"]
+    common.write_results("response_serialization", {"games": args.games, "number": args.number},
+                         metrics, args.out, args.baseline)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Yanıt serileştirme CPU'su")
+    parser.add_argument("--games", type=int, default=3000)
+    parser.add_argument("--number", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=0)
+    common.add_result_args(parser)
+    asyncio.run(run(parser.parse_args()))
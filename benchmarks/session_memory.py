@@ -0,0 +1,64 @@
+"""Oturum başına bellek: eski dict düzeni vs GameSession.
+
+Kullanım: python benchmarks/session_memory.py [oturum_sayısı]
+"""
+import os
+import random
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import (CLASSES, POOLS, GameSession, update_session_stats,  # noqa: E402
+                  weights_vector)
+
+ASKED = 5  # oyun ortasındaki tipik soru sayısı
+
+
+def legacy_session(global_weights, asked):
+    # Eski SESSIONS[sid] düzeni (ağırlık sözlüğü oturum başına ayrı nesne)
+    st = {
+        "i": len(asked),
+        "scores": {c: random.random() for c in CLASSES},
+        "asked_questions": list(asked),
+        "area_counts": {area: 0 for area in CLASSES},
+        "current_question_idx": asked[-1],
+        "positive_answers": 2,
+        "global_area_weights": dict(global_weights),
+    }
+    for idx in asked:
+        st["area_counts"][POOLS.current.questions[idx]["category"]] += 1
+    return st
+
+
+def compact_session(global_weights, asked):
+    st = GameSession(weights_vector(global_weights), POOLS.current)
+    for idx in asked:
+        update_session_stats(st, idx)
+    for ci in range(len(CLASSES)):
+        st.scores[ci] = random.random()
+    st.i = len(asked)
+    st.current_question_idx = asked[-1]
+    st.positive_answers = 2
+    return st
+
+
+def measure(factory, n):
+    global_weights = {c: 1.0 for c in CLASSES}
+    plans = [random.sample(range(len(POOLS.current)), ASKED) for _ in range(n)]
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    sessions = {str(i): factory(global_weights, plan) for i, plan in enumerate(plans)}
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # Tablonun kendisi iki düzende de aynı; sadece oturum nesnelerini say
+    return (after - before - sys.getsizeof(sessions)) / len(sessions)
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    legacy = measure(legacy_session, n)
+    compact = measure(compact_session, n)
+    print(f"sessions={n}")
+    print(f"dict layout:  {legacy:8.1f} bytes/session")
+    print(f"GameSession:  {compact:8.1f} bytes/session ({legacy / compact:.1f}x smaller)")
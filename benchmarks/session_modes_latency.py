@@ -0,0 +1,61 @@
+"""/answer gecikmesi: sunucu tarafı oturum (dict) vs imzalı token modu.
+
+Uygulamayı ASGI üzerinden süreç içinde çağırır (ağ yok), her modda aynı
+sayıda oyun oynatıp /answer gecikme yüzdeliklerini yazar. httpx gerekir.
+
+Kullanım: python benchmarks/session_modes_latency.py [oyun_sayısı]
+"""
+import asyncio
+import contextlib
+import io
+import os
+import random
+import statistics
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main  # noqa: E402
+
+ANSWERS = ["kesinlikle_evet", "evet", "bilmiyorum", "hayir", "kesinlikle_hayir"]
+
+
+async def play(client: httpx.AsyncClient, games: int, token_mode: bool):
+    latencies = []
+    for _ in range(games):
+        start = (await client.get("/start")).json()
+        ref = {"token": start["token"]} if token_mode else {"session_id": start["session_id"]}
+        while True:
+            t0 = time.perf_counter()
+            r = await client.post("/answer", json={**ref, "answer": random.choice(ANSWERS)})
+            latencies.append(time.perf_counter() - t0)
+            out = r.json()
+            if out["done"]:
+                break
+            if token_mode:
+                ref = {"token": out["token"]}
+    return latencies
+
+
+def report(name: str, latencies):
+    latencies = sorted(latencies)
+    p = lambda q: latencies[int(q * (len(latencies) - 1))] * 1e6  # noqa: E731
+    print(f"{name:8s} n={len(latencies):6d}  mean={statistics.fmean(latencies) * 1e6:7.1f}us"
+          f"  p50={p(0.50):7.1f}us  p99={p(0.99):7.1f}us")
+
+
+async def run(games: int):
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for mode in ("server", "token", "server", "token"):
+            main.SESSION_MODE = mode
+            with contextlib.redirect_stdout(io.StringIO()):
+                latencies = await play(client, games, token_mode=mode == "token")
+            report(mode, latencies)
+
+
+if __name__ == "__main__":
+    asyncio.run(run(int(sys.argv[1]) if len(sys.argv) > 1 else 2000))
@@ -0,0 +1,162 @@
+"""Oturum snapshot'ı: yazma süresi, açılış süresi ve tek tek geri yükleme maliyeti.
+
+--sessions kadar yarım oyun (0-6 cevap) bellekteki tabloya konur; son erişim
+yaşları 0 ile 1.1 x SESSION_IDLE_TTL arasında dağıtılır (süresi dolanlar
+yazılmaz). Ölçülenler:
+  - save_snapshot süresi, dosya boyutu, yazım sırasında olay döngüsünün en
+    uzun bekleyişi
+  - SessionSnapshot.open süresi farklı boyutlarda (oturum sayısıyla büyümemeli)
+  - tembel geri yükleme: rastgele oturumların get() başına süresi ve
+    baytlarının aynı kaldığı
+  - karşılaştırma için tüm dosyayı okuyup her oturumu açan (eager) yükleme
+  - saat 0.25 x TTL ileri alınarak açıldığında süresi dolup atılan oturumlar
+
+Kullanım: python benchmarks/session_restore.py [--sessions 100000] [--out sonuc.json] [--baseline onceki.json]
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+
+import common
+
+os.environ.setdefault("SESSION_MAX", "1000000")
+os.environ["SESSION_SNAPSHOT_PATH"] = ""
+
+import main  # noqa: E402
+from session_snapshot import SessionSnapshot, save_snapshot, write_snapshot  # noqa: E402
+from session_store import SessionStore  # noqa: E402
+
+ANSWERS = list(main.LIKERT)
+
+
+async def fill(store: SessionStore, count: int, rng: random.Random):
+    """count yarım oyun ekle, son erişimlerini geriye yay"""
+    now = store.clock()
+    sids = []
+    while len(sids) < count:
+        st = await main._new_game()
+        for _ in range(rng.randint(0, 6)):
+            if main.step_game(st, rng.choice(ANSWERS)) is not None:
+                break
+        else:
+            sid = main.uuid4().hex
+            store.put(sid, st)
+            store._sessions[sid][0] = now - rng.uniform(0, 1.1 * store.idle_ttl)
+            sids.append(sid)
+    # Son erişim sırası korunsun (süpürme baştan bakar)
+    ordered = sorted(store._sessions.items(), key=lambda item: item[1][0])
+    store._sessions.clear()
+    store._sessions.update(ordered)
+    return sids
+
+
+async def timed_save(store: SessionStore, path: str):
+    """save_snapshot süresi ve bu sırada olay döngüsündeki en uzun duraklama"""
+    stall = 0.0
+    done = False
+
+    async def ticker():
+        nonlocal stall
+        last = time.perf_counter()
+        while not done:
+            await asyncio.sleep(0)
+            now = time.perf_counter()
+            stall = max(stall, now - last)
+            last = now
+
+    tick = asyncio.create_task(ticker())
+    result = await save_snapshot(store, path)
+    done = True
+    await tick
+    return result, stall
+
+
+def open_seconds(path: str, idle_ttl: float, repeat: int = 50) -> float:
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        snapshot = SessionSnapshot.open(path, idle_ttl)
+        times.append(time.perf_counter() - started)
+        snapshot.close()
+    return statistics.median(times)
+
+
+async def run(args):
+    rng = random.Random(args.seed)
+    store = SessionStore(max_sessions=args.sessions * 2, dumps=main.GameSession.to_bytes,
+                         loads=main.GameSession.from_bytes)
+    started = time.perf_counter()
+    sids = await fill(store, args.sessions, rng)
+    print(f"built {len(sids)} sessions in {time.perf_counter() - started:.1f}s")
+    metrics = {}
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, "sessions.snapshot")
+
+    result, stall = await timed_save(store, path)
+    metrics.update({
+        "snapshot_seconds": result["seconds"],
+        "snapshot_sessions": result["sessions"],
+        "dropped_expired_on_write": len(sids) - result["sessions"],
+        "snapshot_bytes": result["bytes"],
+        "bytes_per_session": result["bytes"] / result["sessions"],
+        "max_loop_stall_ms": stall * 1e3,
+    })
+
+    # Açılış süresi oturum sayısına bağlı olmamalı
+    entries = list(SessionSnapshot.open(path, store.idle_ttl).entries())
+    for size in (1000, 10000, len(entries)):
+        sized = os.path.join(directory, f"sized-{size}")
+        write_snapshot(sized, entries[:size], time.time())
+        metrics[f"open_us_{size}"] = open_seconds(sized, store.idle_ttl) * 1e6
+
+    # Tembel geri yükleme
+    restored = SessionStore(max_sessions=args.sessions * 2, dumps=main.GameSession.to_bytes,
+                            loads=main.GameSession.from_bytes)
+    started = time.perf_counter()
+    restored.restore(SessionSnapshot.open(path, store.idle_ttl))
+    metrics["restore_startup_ms"] = (time.perf_counter() - started) * 1e3
+    # Ölçüm sırasında süresi dolmasın diye sınıra yakın olanlar örneklenmez
+    live = [sid for sid in sids if sid in store._sessions
+            and store._sessions[sid][0] > store.clock() - 0.9 * store.idle_ttl]
+    sample = rng.sample(live, min(args.lookups, len(live)))
+    started = time.perf_counter()
+    states = [restored.get(sid) for sid in sample]
+    metrics["restore_get_us"] = (time.perf_counter() - started) / len(sample) * 1e6
+    metrics["restore_mismatches"] = sum(
+        state is None or state.to_bytes() != store._sessions[sid][1].to_bytes()
+        for sid, state in zip(sample, states))
+
+    # Karşılaştırma: dosyayı baştan sona okuyup her oturumu açmak
+    started = time.perf_counter()
+    snapshot = SessionSnapshot.open(path, store.idle_ttl)
+    eager = {sid: main.GameSession.from_bytes(data) for sid, _, data in snapshot.entries()}
+    metrics["eager_load_ms"] = (time.perf_counter() - started) * 1e3
+    snapshot.close()
+    del eager
+
+    # Yeniden başlatma gecikmesi: saat ileri alınınca süresi dolanlar atılır
+    shift = 0.25 * store.idle_ttl
+    later = SessionSnapshot.open(path, store.idle_ttl, clock=lambda: time.time() + shift)
+    for sid in live:
+        later.pop(sid)
+    metrics["expired_on_restore"] = later.expired
+    metrics["restored_after_shift"] = later.restored
+
+    for key, value in metrics.items():
+        print(f"{key:28s} {value:.3f}" if isinstance(value, float) else f"{key:28s} {value}")
+    common.write_results("session_restore",
+                         {"sessions": args.sessions, "lookups": args.lookups, "seed": args.seed},
+                         metrics, args.out, args.baseline)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Oturum snapshot'ı yazma ve geri yükleme")
+    parser.add_argument("--sessions", type=int, default=100000)
+    parser.add_argument("--lookups", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=0)
+    common.add_result_args(parser)
+    asyncio.run(run(parser.parse_args()))
@@ -0,0 +1,108 @@
+"""Paylaşılan oturum deposuyla worker sayısına göre istek/saniye.
+
+Her worker sayısı için uvicorn'u SESSION_BACKEND=sqlite ile başlatır, birkaç
+istemci sürecinden tam oyunlar (/start + /answer) oynatır ve toplam
+istek/saniyeyi yazar. httpx gerekir.
+
+Kullanım: python benchmarks/session_throughput.py --workers 1 2 4 --duration 10
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ANSWERS = ["kesinlikle_evet", "evet", "bilmiyorum", "hayir", "kesinlikle_hayir"]
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def play_games(base_url: str, deadline: float, concurrency: int) -> int:
+    requests = 0
+
+    async def player(client: httpx.AsyncClient):
+        nonlocal requests
+        while time.monotonic() < deadline:
+            sid = (await client.get("/start")).json()["session_id"]
+            requests += 1
+            done = False
+            while not done:
+                r = await client.post("/answer", json={"session_id": sid,
+                                                       "answer": random.choice(ANSWERS)})
+                requests += 1
+                if r.status_code != 200:
+                    raise RuntimeError(f"/answer failed: {r.status_code} {r.text}")
+                done = r.json()["done"]
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        await asyncio.gather(*(player(client) for _ in range(concurrency)))
+    return requests
+
+
+def client_process(base_url, duration, concurrency, results):
+    results.put(asyncio.run(play_games(base_url, time.monotonic() + duration, concurrency)))
+
+
+def run(workers: int, duration: float, clients: int, concurrency: int) -> float:
+    port = free_port()
+    db_dir = tempfile.mkdtemp()
+    env = dict(os.environ, SESSION_BACKEND="sqlite",
+               SESSION_DB_PATH=os.path.join(db_dir, "sessions.db"))
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        for _ in range(300):
+            try:
+                httpx.get(base_url + "/", timeout=1)
+                break
+            except httpx.HTTPError:
+                time.sleep(0.1)
+        time.sleep(1)  # tüm worker'ların açılması için
+
+        results = multiprocessing.Queue()
+        procs = [multiprocessing.Process(target=client_process,
+                                         args=(base_url, duration, concurrency, results))
+                 for _ in range(clients)]
+        started = time.monotonic()
+        for p in procs:
+            p.start()
+        total = sum(results.get() for _ in procs)
+        elapsed = time.monotonic() - started
+        for p in procs:
+            p.join()
+        return total / elapsed
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--clients", type=int, default=4, help="yük üreten süreç sayısı")
+    parser.add_argument("--concurrency", type=int, default=16, help="süreç başına eşzamanlı oyun")
+    args = parser.parse_args()
+
+    baseline = None
+    for n in args.workers:
+        rps = run(n, args.duration, args.clients, args.concurrency)
+        baseline = baseline or rps
+        print(f"workers={n:2d}  {rps:9.1f} req/s  ({rps / baseline:.2f}x)")
@@ -0,0 +1,128 @@
+"""Süreç içi oyun simülatörü: sentetik oyuncularla uçtan uca oyun mantığı.
+
+Her gerçek sınıf için bir cevap personası tanımlanır: persona soruya, puanlamanın
+örtük cevap modelinden (question_tree.answer_likelihoods) örneklenen Likert
+cevabını verir; --noise oranında rastgele cevap verir. Oyunlar step_game
+(should_finish, get_next_question / soru ağacı) ve _finish (Belirsiz kontrolü,
+sonuç kaydı) üzerinden oynatılır; sonuçlar bellekteki sahte Firestore'a yazılır.
+
+Kullanım: python benchmarks/simulate_games.py [--games 1000000] [--policy random|tree]
+          [--noise 0.1] [--out sonuc.json] [--baseline onceki.json]
+"""
+import argparse
+import asyncio
+import bisect
+import contextlib
+import os
+import random
+import time
+
+import common
+
+import main  # noqa: E402
+from firebase_service import firebase_service  # noqa: E402
+from question_tree import LIKERT_VALUES, answer_likelihoods  # noqa: E402
+
+ANSWER_BY_VALUE = {v: key for key, v in main.LIKERT.items()}
+
+
+def build_personas(noise: float, likelihoods=None):
+    """[sınıf][soru] -> (kümülatif olasılıklar, cevap anahtarları)
+
+    likelihoods (Q, V, C) verilmezse puanlamanın örtük cevap modeli kullanılır.
+    """
+    if likelihoods is None:
+        likelihoods = answer_likelihoods(main.POOLS.current.weight_matrix)
+    keys = [ANSWER_BY_VALUE[int(v)] for v in LIKERT_VALUES]
+    personas = []
+    for ci in range(len(main.CLASSES)):
+        per_question = []
+        for q in range(len(main.POOLS.current)):
+            probs = (1 - noise) * likelihoods[q, :, ci] + noise / len(keys)
+            cumulative, total = [], 0.0
+            for p in probs:
+                total += float(p)
+                cumulative.append(total)
+            per_question.append(cumulative)
+        personas.append(per_question)
+    return personas, keys
+
+
+async def play(games: int, personas, keys, seed: int):
+    rng = random.Random(seed)
+    questions = correct = uncertain = 0
+    confidence = 0.0  # tahmin edilen sınıfa verilen olasılık (kalibrasyon: doğrulukla kıyasla)
+    n_classes = len(main.CLASSES)
+    writer = firebase_service.result_writer
+    started = time.perf_counter()
+    for g in range(games):
+        true_class = rng.randrange(n_classes)
+        persona = personas[true_class]
+
+        global_weights = await firebase_service.get_cached_area_weights()
+        pool = main.POOLS.current
+        question_idx, _ = main.get_weighted_starting_question(global_weights, pool)
+        st = main.GameSession(main.weights_vector(global_weights), pool)
+        st.current_question_idx = question_idx
+        main.update_session_stats(st, question_idx)
+
+        while True:
+            cumulative = persona[st.current_question_idx]
+            answer = keys[min(bisect.bisect(cumulative, rng.random() * cumulative[-1]), len(keys) - 1)]
+            posterior = main.step_game(st, answer)
+            if posterior is not None:
+                break
+        out = await main._finish("sim", st, posterior, stateless=True)
+
+        questions += st.i
+        uncertain += out.prediction == "Belirsiz"
+        confidence += max(out.confidences.values())
+        correct += out.prediction == main.CLASSES[true_class]
+        if g % 256 == 0:
+            # Yazım işçisi ve ağırlık yenilemesi çalışabilsin; kuyruk yarıyı geçerse bekle
+            await asyncio.sleep(0)
+            while writer.stats()["queued"] > writer.max_queue // 2:
+                await asyncio.sleep(0.001)
+    elapsed = time.perf_counter() - started
+    return {
+        "games": games,
+        "elapsed_s": elapsed,
+        "games_per_sec": games / elapsed,
+        "questions_per_game": questions / games,
+        "accuracy": correct / games,
+        "uncertain_rate": uncertain / games,
+        "mean_confidence": confidence / games,
+    }
+
+
+async def run(args):
+    # Ağaç varsayılan kapalı; politika bayrağı açıkça belirler
+    main.QUESTION_TREE_ENABLED = args.policy == "tree"
+    if args.policy == "tree" and main.POOLS.current.tree is None:
+        raise SystemExit("question tree is not available, run question_tree.py first")
+
+    personas, keys = build_personas(args.noise)
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        firebase_service.warm_up()
+        await play(min(1000, args.games), personas, keys, args.seed + 1)  # ısınma
+        metrics = await play(args.games, personas, keys, args.seed)
+        await firebase_service.shutdown()
+    writer = firebase_service.result_writer.stats()
+    metrics["results_written"] = writer["written"]
+    metrics["results_dropped"] = writer["dropped"]
+
+    for key, value in metrics.items():
+        print(f"{key:20s} {value:.4f}" if isinstance(value, float) else f"{key:20s} {value}")
+    common.write_results("simulate_games", {"policy": args.policy, "noise": args.noise,
+                                            "seed": args.seed}, metrics, args.out, args.baseline)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sentetik oyun simülasyonu")
+    parser.add_argument("--games", type=int, default=100000)
+    parser.add_argument("--policy", choices=("tree", "random"), default="tree",
+                        help="tree: derlenmiş soru ağacı (varsa), random: get_next_question")
+    parser.add_argument("--noise", type=float, default=0.1, help="rastgele cevap oranı")
+    parser.add_argument("--seed", type=int, default=0)
+    common.add_result_args(parser)
+    asyncio.run(run(parser.parse_args()))
@@ -0,0 +1,86 @@
+"""Soğuk başlangıç: uvicorn sürecinin başlatılmasından ilk başarılı yanıta kadar geçen süre.
+
+Her çalıştırmada uvicorn ayrı bir süreç olarak boş bir portta başlatılır ve
+GET / yanıt verene kadar yoklanır. Uygulamanın kendi ölçtüğü import süresi
+(import_ms) ve kalıcılık durumu da kaydedilir. Varsayılan yapılandırmalar:
+bellekteki sahte Firestore ve kimlik bilgisi olmayan gerçek Firestore (degraded
+modda açılmalı, çökmemeli).
+
+Kullanım: python benchmarks/startup_time.py [--runs 5] [--out sonuc.json] [--baseline onceki.json]
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+import common
+
+CONFIGS = {
+    "memory": {"FIRESTORE_BACKEND": "memory"},
+    "firestore_no_credentials": {"FIRESTORE_BACKEND": "firestore",
+                                 "GOOGLE_APPLICATION_CREDENTIALS_JSON": ""},
+}
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_once(extra_env, timeout: float):
+    port = free_port()
+    env = {**os.environ, **extra_env, "LOG_LEVEL": "WARNING"}
+    env.pop("FIRESTORE_EMULATOR_HOST", None)
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port)],
+        cwd=common.ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - started < timeout:
+            if proc.poll() is not None:
+                raise RuntimeError(f"server exited with code {proc.returncode}")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=1) as r:
+                    body = json.loads(r.read())
+                return time.perf_counter() - started, body
+            except OSError:
+                time.sleep(0.01)
+        raise RuntimeError("server did not answer in time")
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def run(args):
+    metrics = {}
+    for name, extra_env in CONFIGS.items():
+        ready, imports = [], []
+        status = None
+        for _ in range(args.runs):
+            seconds, body = start_once(extra_env, args.timeout)
+            ready.append(seconds * 1e3)
+            imports.append(body.get("import_ms", 0.0))
+            status = body.get("persistence", {}).get("status")
+        metrics[f"{name}_ready_ms_median"] = statistics.median(ready)
+        metrics[f"{name}_ready_ms_max"] = max(ready)
+        metrics[f"{name}_import_ms_median"] = statistics.median(imports)
+        print(f"{name:26s} ready median={statistics.median(ready):7.0f}ms max={max(ready):7.0f}ms"
+              f"  import median={statistics.median(imports):6.0f}ms  persistence={status}")
+    common.write_results("startup_time", {"runs": args.runs}, metrics, args.out, args.baseline)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Soğuk başlangıç süresi")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    common.add_result_args(parser)
+    run(parser.parse_args())
@@ -0,0 +1,190 @@
+"""WebSocket oyun modu (/play) ile HTTP akışı (/start + /answer) karşılaştırması.
+
+uvicorn tek worker olarak başlatılır (bellekteki sahte Firestore); aynı sayıda
+eşzamanlı oyuncu --duration saniye boyunca önce HTTP (keep-alive httpx),
+sonra WebSocket ile tam oyunlar oynar. Her akış için oyun/saniye, adım
+gecikmesi (p50/p99) ve sunucu sürecinin oyun başına CPU süresi yazılır; tek
+çekirdekte istemci de aynı CPU'yu kullandığından worker kapasitesini oyun
+başına sunucu CPU'su gösterir (games_per_cpu_second).
+
+Son olarak --open-games kadar WebSocket oyunu ilk soruda açık bekletilir ve
+açık oyun başına sunucu belleği (RSS artışı) ölçülür.
+httpx ve websockets gerekir.
+
+Kullanım: python benchmarks/websocket_games.py [--players 50] [--duration 10]
+          [--open-games 2000] [--out sonuc.json] [--baseline onceki.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import time
+
+import httpx
+import websockets
+
+import common
+from session_throughput import free_port
+
+ANSWERS = ["kesinlikle_evet", "evet", "bilmiyorum", "hayir", "kesinlikle_hayir"]
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+
+
+def process_cpu(pid: int) -> float:
+    """Sürecin kullanıcı + sistem CPU saniyesi"""
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+
+
+def process_rss(pid: int) -> int:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+def percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)] if ordered else 0.0
+
+
+async def http_player(client: httpx.AsyncClient, deadline: float, rng: random.Random,
+                      steps: list) -> int:
+    games = 0
+    while time.monotonic() < deadline:
+        t0 = time.perf_counter()
+        sid = (await client.get("/start")).json()["session_id"]
+        steps.append(time.perf_counter() - t0)
+        while True:
+            t0 = time.perf_counter()
+            r = await client.post("/answer", json={"session_id": sid, "answer": rng.choice(ANSWERS)})
+            steps.append(time.perf_counter() - t0)
+            if r.status_code != 200:
+                raise RuntimeError(f"/answer failed: {r.status_code} {r.text}")
+            if r.json()["done"]:
+                break
+        games += 1
+    return games
+
+
+async def ws_player(url: str, deadline: float, rng: random.Random, steps: list) -> int:
+    games = 0
+    while time.monotonic() < deadline:
+        t0 = time.perf_counter()
+        async with websockets.connect(url) as ws:
+            out = json.loads(await ws.recv())
+            steps.append(time.perf_counter() - t0)
+            while True:
+                t0 = time.perf_counter()
+                await ws.send(json.dumps({"answer": rng.choice(ANSWERS),
+                                          "question_id": out["question_id"]}))
+                out = json.loads(await ws.recv())
+                steps.append(time.perf_counter() - t0)
+                if "error" in out:
+                    raise RuntimeError(f"/play failed: {out}")
+                if out["done"]:
+                    break
+        games += 1
+    return games
+
+
+async def measure(transport: str, port: int, pid: int, args) -> dict:
+    deadline = time.monotonic() + args.duration
+    steps = []
+    rngs = [random.Random(args.seed + i) for i in range(args.players)]
+    cpu_before, started = process_cpu(pid), time.perf_counter()
+    if transport == "http":
+        limits = httpx.Limits(max_connections=args.players)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits,
+                                     timeout=30) as client:
+            games = await asyncio.gather(*(http_player(client, deadline, rng, steps) for rng in rngs))
+    else:
+        url = f"ws://127.0.0.1:{port}/play"
+        games = await asyncio.gather(*(ws_player(url, deadline, rng, steps) for rng in rngs))
+    elapsed = time.perf_counter() - started
+    server_cpu = process_cpu(pid) - cpu_before
+    total = sum(games)
+    return {
+        "games": total,
+        "games_per_sec": total / elapsed,
+        "step_p50_ms": percentile(steps, 0.5) * 1e3,
+        "step_p99_ms": percentile(steps, 0.99) * 1e3,
+        "server_cpu_ms_per_game": server_cpu / total * 1e3,
+        "games_per_cpu_second": total / server_cpu,
+    }
+
+
+async def open_games(port: int, pid: int, count: int) -> dict:
+    """count oyunu ilk soruda açık tut, açık oyun başına sunucu belleğini ölç"""
+    rss_before = process_rss(pid)
+    url = f"ws://127.0.0.1:{port}/play"
+    connections = []
+    for _ in range(count):
+        ws = await websockets.connect(url)
+        await ws.recv()
+        connections.append(ws)
+    await asyncio.sleep(0.5)
+    rss_after = process_rss(pid)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}") as client:
+        held = (await client.get("/")).json()["websocket_games"]
+    await asyncio.gather(*(ws.close() for ws in connections))
+    return {"open_games": held, "rss_kb_per_open_game": (rss_after - rss_before) / max(held, 1) / 1024}
+
+
+async def run(args):
+    port = free_port()
+    env = dict(os.environ, LOG_LEVEL="WARNING", WS_MAX_GAMES=str(max(args.open_games, 2000)))
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--ws-max-size", "4096",
+         "--log-level", "warning"],
+        cwd=common.ROOT, env=env, stdout=subprocess.DEVNULL,
+    )
+    try:
+        for _ in range(300):
+            try:
+                httpx.get(f"http://127.0.0.1:{port}/", timeout=1)
+                break
+            except httpx.HTTPError:
+                time.sleep(0.1)
+        metrics = {}
+        for transport in ("http", "websocket"):
+            result = await measure(transport, port, server.pid, args)
+            metrics.update({f"{transport}_{key}": value for key, value in result.items()})
+            print(f"{transport:9s} {result['games_per_sec']:8.1f} games/s  "
+                  f"step p50={result['step_p50_ms']:.2f}ms p99={result['step_p99_ms']:.2f}ms  "
+                  f"server {result['server_cpu_ms_per_game']:.2f}ms CPU/game "
+                  f"({result['games_per_cpu_second']:.0f} games per CPU second)")
+        metrics["cpu_per_game_ratio"] = (metrics["http_server_cpu_ms_per_game"]
+                                         / metrics["websocket_server_cpu_ms_per_game"])
+        if args.open_games:
+            held = await open_games(port, server.pid, args.open_games)
+            metrics.update(held)
+            print(f"open games {held['open_games']}  {held['rss_kb_per_open_game']:.1f} KiB RSS each")
+    finally:
+        server.terminate()
+        server.wait()
+    common.write_results("websocket_games",
+                         {"players": args.players, "duration": args.duration,
+                          "open_games": args.open_games, "seed": args.seed},
+                         metrics, args.out, args.baseline)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="WebSocket oyun modu ile HTTP akışı")
+    parser.add_argument("--players", type=int, default=50, help="eşzamanlı oyuncu")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--open-games", type=int, default=2000,
+                        help="bellek ölçümü için açık bekletilen oyun (0: atla)")
+    parser.add_argument("--seed", type=int, default=0)
+    common.add_result_args(parser)
+    parsed = parser.parse_args()
+    # Açık bağlantılar kadar dosya tanıtıcısı gerekir
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (min(max(soft, parsed.open_games + 256), hard), hard))
+    asyncio.run(run(parsed))
@@ -0,0 +1,140 @@
+"""Süre bütçeli çağrılar için devre kesici.
+
+Engelleyici (thread'de çalışan) çağrılar bir süre bütçesiyle (deadline) yapılır.
+Art arda failure_threshold çağrı hata verir, bütçeyi aşar veya bütçesinin
+slow_fraction'ından uzun sürerse devre açılır: reset_timeout boyunca çağrılar
+hiç yapılmadan CircuitOpenError ile reddedilir, çağıran hemen yedek değere
+döner. Süre dolunca devre yarı açık olur ve tek bir deneme çağrısına izin
+verilir; başarılıysa devre kapanır, değilse tekrar açılır.
+
+Bütçeyi aşan çağrının thread'i durdurulamaz, arka planda bitmesi beklenir;
+devre açıkken yeni çağrı yapılmadığı için bu thread'ler birikmez.
+"""
+import asyncio
+import time
+from typing import Callable, Dict, Optional
+
+from app_logging import get_logger
+
+logger = get_logger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Devre açık: çağrı yapılmadan reddedildi"""
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 slow_fraction: float = 0.5, clock: Callable[[], float] = time.monotonic,
+                 on_open: Optional[Callable[[], None]] = None):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.slow_fraction = slow_fraction
+        self.clock = clock
+        self.on_open = on_open
+
+        self.state = CLOSED
+        self._consecutive = 0
+        self._opened_at = 0.0
+        self._probing = False
+
+        self.calls = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.slow_calls = 0
+        self.rejected = 0
+        self.probes = 0
+        self.trips = 0
+
+    def allow(self) -> bool:
+        """Çağrı yapılabilir mi; yarı açıkta sadece tek deneme çağrısına izin verir"""
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN:
+            if self.clock() - self._opened_at < self.reset_timeout:
+                self.rejected += 1
+                return False
+            self.state = HALF_OPEN
+            self._probing = False
+        if self._probing:
+            self.rejected += 1
+            return False
+        self._probing = True
+        self.probes += 1
+        return True
+
+    def retry_in(self) -> float:
+        """Açık devrenin deneme çağrısına izin vermesine kalan süre"""
+        if self.state != OPEN:
+            return 0.0
+        return max(self._opened_at + self.reset_timeout - self.clock(), 0.0)
+
+    def record(self, ok: bool):
+        if ok:
+            if self.state != CLOSED:
+                logger.info("✅ %s circuit closed", self.name)
+            self.state = CLOSED
+            self._consecutive = 0
+            self._probing = False
+            return
+        self._consecutive += 1
+        if self.state == HALF_OPEN or self._consecutive >= self.failure_threshold:
+            self._open()
+
+    def _open(self):
+        if self.state != OPEN:
+            logger.warning("⚠️ %s circuit opened after %d slow or failed calls, retry in %.0fs",
+                           self.name, self._consecutive, self.reset_timeout)
+        self.state = OPEN
+        self._opened_at = self.clock()
+        self._probing = False
+        self.trips += 1
+        if self.on_open is not None:
+            self.on_open()
+
+    async def run(self, fn: Callable, *args, deadline: float):
+        """allow() sonrası: fn'i thread'de bütçeyle çalıştır, sonucu devreye işle"""
+        self.calls += 1
+        started = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(asyncio.to_thread(fn, *args), timeout=deadline)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            self.record(False)
+            raise
+        except asyncio.CancelledError:
+            # Deneme çağrısı iptal edildiyse sonraki çağrı deneyebilsin
+            self._probing = False
+            raise
+        except Exception:
+            self.failures += 1
+            self.record(False)
+            raise
+        slow = time.perf_counter() - started > deadline * self.slow_fraction
+        if slow:
+            self.slow_calls += 1
+        self.record(not slow)
+        return result
+
+    async def call(self, fn: Callable, *args, deadline: float):
+        if not self.allow():
+            raise CircuitOpenError(f"{self.name} circuit is open")
+        return await self.run(fn, *args, deadline=deadline)
+
+    def stats(self) -> Dict:
+        return {
+            "state": self.state,
+            "retry_in_seconds": round(self.retry_in(), 3),
+            "calls": self.calls,
+            "failures": self.failures,
+            "timeouts": self.timeouts,
+            "slow_calls": self.slow_calls,
+            "rejected": self.rejected,
+            "probes": self.probes,
+            "trips": self.trips,
+        }
@@ -0,0 +1,284 @@
+"""Süreç içi sahte Firestore istemcisi.
+
+Bu servisin kullandığı google.cloud.firestore alt kümesini (collection/document,
+add/set/get, order_by/limit/select/where/start_after, WriteBatch, SERVER_TIMESTAMP)
+bellekte uygular. FIRESTORE_BACKEND=memory ile yerel geliştirme, simülasyon ve yük
+testlerinde gerçek Firebase yerine kullanılır.
+
+Dayanıklılık testleri için her istemci çağrısına gecikme (latency) ve rastgele
+hata (error_rate) eklenebilir; değerler çalışırken değiştirilebilir.
+"""
+import os
+import random
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Koleksiyon başına tutulan en fazla belge (uzun simülasyonlarda bellek sınırı)
+FIRESTORE_MEMORY_MAX_DOCS = int(os.getenv("FIRESTORE_MEMORY_MAX_DOCS", "100000"))
+# Çağrı başına eklenen gecikme (saniye) ve hata olasılığı
+FIRESTORE_MEMORY_LATENCY = float(os.getenv("FIRESTORE_MEMORY_LATENCY", "0"))
+FIRESTORE_MEMORY_ERROR_RATE = float(os.getenv("FIRESTORE_MEMORY_ERROR_RATE", "0"))
+
+ASCENDING = "ASCENDING"
+DESCENDING = "DESCENDING"
+# Belge ID'sine göre sıralama / imleç alanı (firestore.FieldPath.document_id())
+DOCUMENT_ID = "__name__"
+
+
+class _ServerTimestamp:
+    def __repr__(self) -> str:
+        return "SERVER_TIMESTAMP"
+
+
+# Yazım anında commit zamanıyla değiştirilen değer (firestore.SERVER_TIMESTAMP);
+# bir batch'teki tüm yazımlar aynı zamanı alır
+SERVER_TIMESTAMP = _ServerTimestamp()
+
+_OPERATORS = {
+    "==": lambda a, b: a == b,
+    "!=": lambda a, b: a != b,
+    "<": lambda a, b: a < b,
+    "<=": lambda a, b: a <= b,
+    ">": lambda a, b: a > b,
+    ">=": lambda a, b: a >= b,
+    "in": lambda a, b: a in b,
+}
+
+
+class ServiceUnavailable(Exception):
+    """Enjekte edilen hata (gerçek istemcinin UNAVAILABLE hatası yerine)"""
+
+
+class DocumentSnapshot:
+    def __init__(self, reference: "DocumentReference", data: Optional[Dict]):
+        self.reference = reference
+        self.id = reference.id
+        self.exists = data is not None
+        self._data = data
+
+    def to_dict(self) -> Optional[Dict]:
+        return dict(self._data) if self._data is not None else None
+
+    def get(self, field: str):
+        return (self._data or {}).get(field)
+
+
+class DocumentReference:
+    def __init__(self, client: "InMemoryFirestore", collection: str, doc_id: str):
+        self._client = client
+        self.collection_name = collection
+        self.id = doc_id
+        self.path = f"{collection}/{doc_id}"
+
+    def set(self, data: Dict, merge: bool = False):
+        self._client._rpc()
+        with self._client._lock:
+            self._client._write(self.collection_name, self.id, data, merge,
+                                self._client._commit_time())
+
+    def get(self) -> DocumentSnapshot:
+        self._client._rpc()
+        return DocumentSnapshot(self, self._client._read(self.collection_name, self.id))
+
+
+def _field(item: Tuple[str, Dict], field: str):
+    """(belge ID'si, veri) kaydında sıralama alanının değeri"""
+    return item[0] if field == DOCUMENT_ID else item[1][field]
+
+
+class Query:
+    def __init__(self, client: "InMemoryFirestore", collection: str,
+                 orders: Tuple = (), filters: Tuple = (), limit_to: Optional[int] = None,
+                 fields: Optional[List[str]] = None, cursor: Optional[Tuple] = None):
+        self._client = client
+        self._collection = collection
+        self._orders = orders
+        self._filters = filters
+        self._limit = limit_to
+        self._fields = fields
+        self._cursor = cursor
+
+    def _copy(self, **changes) -> "Query":
+        params = dict(orders=self._orders, filters=self._filters, limit_to=self._limit,
+                      fields=self._fields, cursor=self._cursor)
+        params.update(changes)
+        return Query(self._client, self._collection, **params)
+
+    def order_by(self, field: str, direction: str = ASCENDING) -> "Query":
+        return self._copy(orders=self._orders + ((field, direction),))
+
+    def where(self, field: str, op: str, value) -> "Query":
+        return self._copy(filters=self._filters + ((field, op, value),))
+
+    def limit(self, count: int) -> "Query":
+        return self._copy(limit_to=count)
+
+    def select(self, fields: List[str]) -> "Query":
+        return self._copy(fields=list(fields))
+
+    def start_after(self, document) -> "Query":
+        """Sıralama alanlarının değerlerinden sonra başla (snapshot veya sözlük).
+
+        Sözlükte __name__ değeri DocumentReference veya belge ID'si olabilir.
+        """
+        if isinstance(document, DocumentSnapshot):
+            values = {**document.to_dict(), DOCUMENT_ID: document.id}
+        else:
+            values = dict(document)
+            if isinstance(values.get(DOCUMENT_ID), DocumentReference):
+                values[DOCUMENT_ID] = values[DOCUMENT_ID].id
+        return self._copy(cursor=tuple(values.get(field) for field, _ in self._orders))
+
+    def _matches(self, data: Dict) -> bool:
+        for field, _ in self._orders:
+            if field != DOCUMENT_ID and field not in data:
+                return False
+        for field, op, value in self._filters:
+            if field not in data or not _OPERATORS[op](data[field], value):
+                return False
+        return True
+
+    def stream(self) -> Iterator[DocumentSnapshot]:
+        self._client._rpc()
+        items = [(doc_id, data) for doc_id, data in self._client._scan(self._collection)
+                 if self._matches(data)]
+        # Firestore gibi: son sıralama anahtarı belge ID'si
+        items.sort(key=lambda item: item[0])
+        for field, direction in reversed(self._orders):
+            items.sort(key=lambda item: _field(item, field), reverse=direction == DESCENDING)
+
+        if self._cursor is not None:
+            def after(item: Tuple[str, Dict]) -> bool:
+                for (field, direction), value in zip(self._orders, self._cursor):
+                    current = _field(item, field)
+                    if current != value:
+                        return (current < value) if direction == DESCENDING else (current > value)
+                return False
+            items = [item for item in items if after(item)]
+
+        if self._limit is not None:
+            items = items[:self._limit]
+        self._client.reads += len(items)
+        for doc_id, data in items:
+            if self._fields is not None:
+                data = {f: data[f] for f in self._fields if f in data}
+            yield DocumentSnapshot(DocumentReference(self._client, self._collection, doc_id), data)
+
+    def get(self) -> List[DocumentSnapshot]:
+        return list(self.stream())
+
+
+class CollectionReference(Query):
+    def __init__(self, client: "InMemoryFirestore", name: str):
+        super().__init__(client, name)
+        self.id = name
+
+    def document(self, doc_id: Optional[str] = None) -> DocumentReference:
+        return DocumentReference(self._client, self._collection, doc_id or uuid.uuid4().hex[:20])
+
+    def add(self, data: Dict) -> Tuple[datetime, DocumentReference]:
+        ref = self.document()
+        ref.set(data)
+        return datetime.now(timezone.utc), ref
+
+
+class WriteBatch:
+    def __init__(self, client: "InMemoryFirestore"):
+        self._client = client
+        self._writes: List[Tuple[DocumentReference, Dict, bool]] = []
+
+    def set(self, reference: DocumentReference, data: Dict, merge: bool = False):
+        self._writes.append((reference, data, merge))
+
+    def commit(self):
+        self._client._rpc()
+        if len(self._writes) > 500:
+            raise ValueError("maximum 500 writes allowed per batch")
+        with self._client._lock:
+            committed_at = self._client._commit_time()
+            for reference, data, merge in self._writes:
+                self._client._write(reference.collection_name, reference.id, data, merge,
+                                    committed_at)
+        self._client.batches += 1
+
+
+class InMemoryFirestore:
+    """Bellekteki sahte Firestore istemcisi (thread-safe)"""
+
+    SERVER_TIMESTAMP = SERVER_TIMESTAMP
+
+    def __init__(self, max_docs: int = FIRESTORE_MEMORY_MAX_DOCS,
+                 latency: float = FIRESTORE_MEMORY_LATENCY,
+                 error_rate: float = FIRESTORE_MEMORY_ERROR_RATE):
+        self.max_docs = max_docs
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rpcs = 0
+        # Aynı anda süren çağrılar (thread havuzunda bekleyen işler)
+        self.inflight = 0
+        self.max_inflight = 0
+        self._collections: Dict[str, "OrderedDict[str, Dict]"] = {}
+        self._lock = threading.RLock()
+        self._committed_at = datetime.fromtimestamp(0, timezone.utc)
+        self.reads = 0
+        self.writes = 0
+        self.batches = 0
+
+    def collection(self, name: str) -> CollectionReference:
+        return CollectionReference(self, name)
+
+    def document(self, path: str) -> DocumentReference:
+        collection, doc_id = path.split("/", 1)
+        return DocumentReference(self, collection, doc_id)
+
+    def batch(self) -> WriteBatch:
+        return WriteBatch(self)
+
+    def _rpc(self):
+        """Ağ çağrısı benzetimi: gecikme ve hata enjeksiyonu (çağıran thread'i bloklar)"""
+        with self._lock:
+            self.rpcs += 1
+            self.inflight += 1
+            self.max_inflight = max(self.max_inflight, self.inflight)
+        try:
+            if self.latency > 0:
+                time.sleep(self.latency)
+        finally:
+            with self._lock:
+                self.inflight -= 1
+        if self.error_rate > 0 and random.random() < self.error_rate:
+            raise ServiceUnavailable("injected failure")
+
+    def _commit_time(self) -> datetime:
+        """Artan commit zamanı (sunucu saati gibi geri gitmez); kilit altında çağrılır"""
+        now = datetime.now(timezone.utc)
+        self._committed_at = max(now, self._committed_at + timedelta(microseconds=1))
+        return self._committed_at
+
+    def _write(self, collection: str, doc_id: str, data: Dict, merge: bool,
+               committed_at: datetime):
+        data = {field: committed_at if value is SERVER_TIMESTAMP else value
+                for field, value in data.items()}
+        with self._lock:
+            docs = self._collections.setdefault(collection, OrderedDict())
+            if merge and doc_id in docs:
+                docs[doc_id] = {**docs[doc_id], **data}
+            else:
+                docs[doc_id] = dict(data)
+            while len(docs) > self.max_docs:
+                docs.popitem(last=False)
+            self.writes += 1
+
+    def _read(self, collection: str, doc_id: str) -> Optional[Dict]:
+        with self._lock:
+            self.reads += 1
+            data = self._collections.get(collection, {}).get(doc_id)
+            return dict(data) if data is not None else None
+
+    def _scan(self, collection: str) -> List[Tuple[str, Dict]]:
+        with self._lock:
+            return list(self._collections.get(collection, {}).items())
@@ -0,0 +1,78 @@
+"""Önceden kodlanmış soru yanıtları.
+
+/start ve /answer yanıtlarının soru metni, seçenekler ve soru kimliği gibi
+değişmeyen kısımları havuz sürümü başına bir kez JSON baytlarına çevrilir;
+istekte sadece değişen alanlar (oturum kimliği, soru sırası, token) araya
+eklenir. Çıktı FastAPI'nin response_model + JSONResponse yolunun ürettiği
+baytlarla aynıdır (alan sırası, null alanlar, ensure_ascii=False).
+
+RESPONSE_VALIDATION=1 ile yanıtlar eskisi gibi Pydantic modelleri üzerinden
+doğrulanarak üretilir.
+"""
+import json
+import os
+from typing import Iterable, Optional, Sequence
+
+from starlette.responses import Response
+
+RESPONSE_VALIDATION = os.getenv("RESPONSE_VALIDATION", "0") == "1"
+
+
+def _dumps(value) -> bytes:
+    # starlette JSONResponse.render ile aynı biçim
+    return json.dumps(value, ensure_ascii=False, allow_nan=False, indent=None,
+                      separators=(",", ":")).encode("utf-8")
+
+
+def _token(token: Optional[str]) -> bytes:
+    # Token'lar base64url: kaçış gerektiren karakter içermez
+    return b"null" if token is None else b'"' + token.encode("ascii") + b'"'
+
+
+def model_json(model) -> bytes:
+    """Pydantic modelini HTTP yanıtıyla aynı JSON baytlarına çevir (WebSocket mesajları için)"""
+    return _dumps(model.model_dump())
+
+
+class RawJSONResponse(Response):
+    """Gövdesi hazır JSON baytları olan yanıt (yeniden kodlanmaz)"""
+
+    media_type = "application/json"
+
+
+class QuestionResponses:
+    """Bir havuz sürümünün soru başına önceden kodlanmış yanıt parçaları"""
+
+    __slots__ = ("_next_middle", "_next_tail", "_start_middle", "_start_tail")
+
+    def __init__(self, texts: Sequence[str], choices: Iterable[str], pool_version: int):
+        choices_json = _dumps(list(choices))
+        # NextOut: done, question_index, question, choices, prediction, confidences, token, question_id
+        self._next_middle = tuple(
+            b',"question":' + _dumps(text) + b',"choices":' + choices_json
+            + b',"prediction":null,"confidences":null,"token":'
+            for text in texts
+        )
+        self._next_tail = tuple(b',"question_id":%d}' % q for q in range(len(texts)))
+        # StartOut: session_id, question_index, question, choices, token, question_id, pool_version
+        self._start_middle = tuple(
+            b',"question_index":0,"question":' + _dumps(text) + b',"choices":' + choices_json
+            + b',"token":'
+            for text in texts
+        )
+        self._start_tail = tuple(b',"question_id":%d,"pool_version":%d}' % (q, pool_version)
+                                 for q in range(len(texts)))
+
+    def next_question(self, question_id: int, question_index: int,
+                      token: Optional[str]) -> RawJSONResponse:
+        return RawJSONResponse(b"".join((
+            b'{"done":false,"question_index":%d' % question_index,
+            self._next_middle[question_id], _token(token), self._next_tail[question_id],
+        )))
+
+    def start(self, session_id: str, question_id: int, token: Optional[str]) -> RawJSONResponse:
+        # Oturum kimliği uuid4 veya hex nonce: kaçış gerektirmez
+        return RawJSONResponse(b"".join((
+            b'{"session_id":"', session_id.encode("ascii"), b'"',
+            self._start_middle[question_id], _token(token), self._start_tail[question_id],
+        )))
@@ -1,11 +1,153 @@
-import firebase_admin
-from firebase_admin import credentials, firestore
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional
 import os
-from datetime import datetime, timezone
+import time
+import asyncio
+from collections import deque
+from datetime import datetime, timedelta, timezone
+import logging
+from app_logging import get_logger, log_sampled
+from circuit_breaker import CircuitBreaker, CircuitOpenError
+from game_export import (DOCUMENT_ID, EXPORT_FIELDS, GAME_EXPORT_BLOCK_ROWS, GAME_EXPORT_PAGE_SIZE,
+                         GAME_EXPORT_SETTLE, Cursor, ExportBuffer, ExportFile, cursor_datetime,
+                         timestamp_us)
+from metrics import (FIRESTORE_BREAKER_TRIPS, FIRESTORE_DEADLINES, FIRESTORE_FALLBACKS,
+                     firestore_timer)
+from result_journal import RESULT_JOURNAL_DIR, ResultJournal
+from result_writer import WRITTEN_AT, ResultWriter, server_timestamp
+from stats_rollup import STATS_DAILY_RETENTION_DAYS, StatsRollup, build_rollup
+
+logger = get_logger(__name__)
+
+# "firestore": gerçek Firebase, "memory": süreç içi sahte istemci (yerel geliştirme / benchmark)
+FIRESTORE_BACKEND = os.getenv("FIRESTORE_BACKEND", "firestore")
+# İstemci kurulamazsa (ör. kimlik bilgisi hatası) tekrar deneme aralığı (saniye)
+FIRESTORE_INIT_RETRY_INTERVAL = float(os.getenv("FIRESTORE_INIT_RETRY_INTERVAL", "30"))
+
+# Çağrı süre bütçeleri (saniye): tekil okuma / yazım ve uzun akış sorguları
+FIRESTORE_READ_DEADLINE = float(os.getenv("FIRESTORE_READ_DEADLINE", "2.0"))
+FIRESTORE_WRITE_DEADLINE = float(os.getenv("FIRESTORE_WRITE_DEADLINE", "5.0"))
+FIRESTORE_STREAM_DEADLINE = float(os.getenv("FIRESTORE_STREAM_DEADLINE", "120"))
+# Devre kesici: art arda bu kadar yavaş (bütçenin yarısından uzun) veya hatalı çağrıda
+# devre açılır; FIRESTORE_BREAKER_RESET saniye sonra tek deneme çağrısı yapılır
+FIRESTORE_BREAKER_FAILURES = int(os.getenv("FIRESTORE_BREAKER_FAILURES", "5"))
+FIRESTORE_BREAKER_RESET = float(os.getenv("FIRESTORE_BREAKER_RESET", "30"))
+
+# Global alan ağırlıkları önbelleği: bu süreden (saniye) eski değerler
+# döndürülmeye devam eder ama arka planda yenilenir (stale-while-revalidate)
+WEIGHTS_CACHE_TTL = float(os.getenv("WEIGHTS_CACHE_TTL", "60"))
+
+# Alan dağılımı penceresi: son kaç oyunun tahmini dikkate alınır
+AREA_WINDOW_SIZE = int(os.getenv("AREA_WINDOW_SIZE", "200"))
+# Pencerenin ham koleksiyondan yeniden kurulma aralığı (saniye)
+AREA_RECONCILE_INTERVAL = float(os.getenv("AREA_RECONCILE_INTERVAL", "600"))
+# Opsiyonel tek toplu belge (ör. "stats/area_window"); boşsa kullanılmaz
+AREA_AGGREGATE_DOC = os.getenv("AREA_AGGREGATE_DOC", "")
+# Açılışta istatistik özetlerini game_results'tan yeniden kur (tüm worker'ların oyunları)
+STATS_REBUILD_ON_START = os.getenv("STATS_REBUILD_ON_START", "0") == "1"
+
+class AreaWindow:
+    """Son N oyunun tahmin dağılımı: halka tampon + artımlı sayaçlar"""
+
+    def __init__(self, size: int):
+        self.size = size
+        self._recent: deque = deque(maxlen=size)
+        self._counts: Dict[str, int] = {}
+
+    def add(self, predicted_class: str):
+        if len(self._recent) == self.size:
+            oldest = self._recent[0]
+            self._counts[oldest] -= 1
+            if not self._counts[oldest]:
+                del self._counts[oldest]
+        self._recent.append(predicted_class)
+        self._counts[predicted_class] = self._counts.get(predicted_class, 0) + 1
+
+    def reset(self, recent: List[str]):
+        """Pencereyi eskiden yeniye sıralı tahmin listesiyle yeniden kur"""
+        self._recent = deque(recent[-self.size:], maxlen=self.size)
+        self._counts = {}
+        for predicted_class in self._recent:
+            self._counts[predicted_class] = self._counts.get(predicted_class, 0) + 1
+
+    def counts(self) -> Dict[str, int]:
+        return dict(self._counts)
+
+    def recent(self) -> List[str]:
+        return list(self._recent)
+
+    def percentages(self) -> Dict[str, float]:
+        """Belirsiz hariç alan yüzdeleri (eski 200 belgelik taramayla aynı sonuç)"""
+        total_games = sum(c for area, c in self._counts.items() if area != "Belirsiz")
+        if not total_games:
+            return {}
+        return {area: count / total_games for area, count in self._counts.items()
+                if area != "Belirsiz"}
 
 class FirebaseService:
-    def __init__(self):
+    """Firestore kalıcılığı ve global alan istatistikleri.
+
+    Gerçek istemci import sırasında değil, warm_up() ile arka planda kurulur;
+    kurulamazsa servis "degraded" modda çalışır: oyunlar sunulmaya devam eder,
+    sonuçlar kuyrukta bekler ve istemci (ağırlık yenilemesi sırasında) en fazla
+    FIRESTORE_INIT_RETRY_INTERVAL'da bir yeniden denenir.
+
+    Tüm Firestore çağrıları süre bütçesiyle ve ortak bir devre kesiciden geçer;
+    Firestore yavaşken devre açılır, yenileme ve yazımlar beklemeden yedek
+    değerlere (önbellekteki veya eşit ağırlıklar, kuyrukta bekleyen sonuçlar) döner.
+    """
+
+    def __init__(self, db=None, clock: Callable[[], float] = time.monotonic):
+        # Önbellek yaşı ve yeniden deneme aralıkları bu saatle ölçülür (testlerde sahte saat)
+        self.clock = clock
+        if db is None and FIRESTORE_BACKEND == "memory":
+            from fake_firestore import InMemoryFirestore
+            db = InMemoryFirestore()
+        self.db = db
+
+        # İstemci kurulum durumu
+        self._connect_task: Optional[asyncio.Task] = None
+        self._connect_attempted_at: Optional[float] = None
+        self._connect_seconds: Optional[float] = None
+        self._connect_error: Optional[str] = None
+
+        # Ağırlık önbelleği durumu
+        self._weights: Optional[Dict[str, float]] = None
+        self._weights_updated_at = 0.0
+        self._weights_refresh_task: Optional[asyncio.Task] = None
+        self._weights_hits = 0
+        self._weights_stale_hits = 0
+        self._weights_misses = 0
+        self._weights_refreshes = 0
+
+        # Artımlı alan dağılımı (save_game_result ile güncellenir)
+        self.area_window = AreaWindow(AREA_WINDOW_SIZE)
+        self._area_window_ready = False
+        self._area_reconciled_at = 0.0
+        # Pencerede sayılmış bir sonuç yazılamadı: sonraki yenilemede uzlaştırılır
+        self._area_window_stale = False
+
+        # /stats özetleri (save_game_result ile artımlı güncellenir)
+        self.stats_rollup = StatsRollup()
+        # Yeniden kurulum sürerken biten oyunlar (kurulum bitince yeni özete eklenir)
+        self._stats_rebuild_buffer: Optional[List[Dict]] = None
+        self._stats_rebuild_task: Optional[asyncio.Task] = None
+
+        # Firestore çağrılarının ortak devre kesicisi
+        self.breaker = CircuitBreaker("firestore", FIRESTORE_BREAKER_FAILURES,
+                                      FIRESTORE_BREAKER_RESET, on_open=FIRESTORE_BREAKER_TRIPS.inc)
+
+        # Sonuçlar kuyruğa alınır, arka planda toplu yazılır (write-behind)
+        self.result_writer = ResultWriter(self.db, extra_writes=self._aggregate_writes,
+                                          breaker=self.breaker,
+                                          commit_deadline=FIRESTORE_WRITE_DEADLINE,
+                                          on_lost=self._on_results_lost)
+
+    @staticmethod
+    def _create_client():
+        # firebase_admin ağır bir import; sadece istemci kurulurken yüklenir
+        import firebase_admin
+        from firebase_admin import credentials, firestore
+
         # Firebase Admin SDK başlatma
         if not firebase_admin._apps:
             # Production'da environment variable'dan key al
@@ -23,15 +165,68 @@ class FirebaseService:
                 # Default credentials
                 firebase_admin.initialize_app()
 
-        self.db = firestore.client()
+        return firestore.client()
+
+    @property
+    def persistence_status(self) -> str:
+        if self.db is not None:
+            return "ok"
+        if self._connect_error is not None:
+            return "degraded"
+        return "connecting"
+
+    async def ensure_client(self) -> bool:
+        """İstemci hazırsa True; değilse (aralık dolduysa) tek bir kurulum denemesi yap"""
+        if self.db is not None:
+            return True
+        if self._connect_task is None or self._connect_task.done():
+            if (self._connect_attempted_at is not None and
+                    self.clock() - self._connect_attempted_at < FIRESTORE_INIT_RETRY_INTERVAL):
+                return False
+            self._connect_task = asyncio.get_running_loop().create_task(self._connect())
+        return await asyncio.shield(self._connect_task)
+
+    async def _connect(self) -> bool:
+        self._connect_attempted_at = self.clock()
+        started = time.perf_counter()
+        try:
+            with firestore_timer("client_init"):
+                db = await asyncio.to_thread(self._create_client)
+        except Exception as e:
+            self._connect_error = f"{type(e).__name__}: {e}"
+            logger.error("❌ Firestore client init failed, persistence degraded "
+                         "(retry in %.0fs): %s", FIRESTORE_INIT_RETRY_INTERVAL, self._connect_error)
+            return False
+        self._connect_seconds = time.perf_counter() - started
+        self._connect_error = None
+        self.db = db
+        self.result_writer.db = db
+        logger.info("✅ Firestore client ready in %.0f ms", self._connect_seconds * 1e3)
+        return True
+
+    async def _call(self, operation: str, fn, *args, deadline: float = FIRESTORE_READ_DEADLINE):
+        """Firestore çağrısını thread'de, süre bütçesi ve devre kesiciyle yap.
+
+        Devre açıksa beklemeden CircuitOpenError; bütçe aşılırsa asyncio.TimeoutError.
+        """
+        if not self.breaker.allow():
+            FIRESTORE_FALLBACKS.inc("circuit_open")
+            raise CircuitOpenError(f"Firestore circuit is open, skipped {operation}")
+        with firestore_timer(operation):
+            try:
+                return await self.breaker.run(fn, *args, deadline=deadline)
+            except asyncio.TimeoutError:
+                FIRESTORE_DEADLINES.inc(operation)
+                raise asyncio.TimeoutError(f"{operation} exceeded its {deadline:.1f}s budget") from None
 
     async def save_game_result(self, predicted_class: str,
                               asked_questions: List[int], confidences: Dict[str, float],
-                              session_data: Dict) -> str:
-        """Oyun sonucunu Firebase'e kaydet (anonim)"""
-        try:
-            print(f"🔥 Firebase save attempt - Class: {predicted_class}")
+                              session_data: Dict, doc_id: Optional[str] = None) -> str:
+        """Oyun sonucunu Firebase'e kaydet (anonim).
 
+        doc_id verilirse belge bu ID ile yazılır; aynı oyunun tekrar kaydı üzerine yazar.
+        """
+        try:
             game_result = {
                 "predicted_class": predicted_class,
                 "asked_questions": asked_questions,
@@ -39,56 +234,277 @@ class FirebaseService:
                 "positive_answers": session_data.get("positive_answers", 0),
                 "total_questions": len(asked_questions),
                 "area_counts": session_data.get("area_counts", {}),
+                # asked_questions ile aynı sırada Likert değerleri (-2..2)
+                "answers": session_data.get("answers", []),
+                # asked_questions indekslerinin ait olduğu soru havuzu sürümü
+                "pool_version": session_data.get("pool_version"),
                 "timestamp": datetime.now(timezone.utc),
                 "is_uncertain": predicted_class == "Belirsiz"
             }
 
-            print(f"🔥 Saving to Firestore: {game_result}")
-
-            # Firestore'a kaydet
-            doc_ref = self.db.collection("game_results").add(game_result)
-            print(f"✅ Firebase save success! Doc ID: {doc_ref[1].id}")
-            return doc_ref[1].id
+            # Belge ID'si yerelde üretilir; yazım arka planda batch ile yapılır.
+            # İstemci henüz yoksa koleksiyon adı (veya belge yolu) kuyruğa alınır,
+            # ID yazım anında üretilir
+            if self.db is not None:
+                doc_ref = self.db.collection("game_results").document(doc_id)
+            else:
+                doc_ref = f"game_results/{doc_id}" if doc_id else "game_results"
+            if not self.result_writer.submit(doc_ref, game_result):
+                return None
+            # Pencere ve istatistikler sadece yazıcının kabul ettiği sonuçlarla güncellenir
+            self.area_window.add(predicted_class)
+            self.stats_rollup.add_result(game_result)
+            if self._stats_rebuild_buffer is not None:
+                self._stats_rebuild_buffer.append(game_result)
+            doc_id = getattr(doc_ref, "id", None)
+            log_sampled(logger, logging.DEBUG, "✅ Firebase save queued! Class: %s, Doc ID: %s",
+                        predicted_class, doc_id)
+            return doc_id
 
         except Exception as e:
-            print(f"❌ Firebase save error: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("❌ Firebase save error: %s", e)
             return None
 
 
     async def get_global_area_statistics(self) -> Dict[str, float]:
         """Tüm oyunların alan istatistiklerini getir (genel trend)"""
-        try:
-            # Son 200 oyunu al
-            query = (self.db.collection("game_results")
-                    .order_by("timestamp", direction=firestore.Query.DESCENDING)
-                    .limit(200))
+        # Bellekteki pencereden O(1); belge okuması sadece ilk yüklemede
+        if not self._area_window_ready:
+            await self.load_area_window()
+        return self.area_window.percentages()
 
-            docs = query.stream()
-            games = [doc.to_dict() for doc in docs]
+    def _on_results_lost(self, count: int):
+        """Kabul edilmiş sonuçlar yazılamadı: pencere Firestore + kuyruktan yeniden kurulsun"""
+        self._area_window_stale = True
+        logger.warning("⚠️ %d game results lost, area window will be reconciled", count)
+        self._schedule_weights_refresh()
 
-            if not games:
-                return {}
+    def _aggregate_writes(self) -> List:
+        # Toplu belge her batch'te bir kez, en güncel haliyle yazılır
+        if not AREA_AGGREGATE_DOC or self.db is None:
+            return []
+        return [(self.db.document(AREA_AGGREGATE_DOC), self._area_aggregate())]
 
-            area_counts = {}
-            total_games = len([g for g in games if g.get("predicted_class") != "Belirsiz"])
+    def _area_aggregate(self) -> Dict:
+        return {
+            "recent": self.area_window.recent(),
+            "window_size": AREA_WINDOW_SIZE,
+            "updated_at": datetime.now(timezone.utc),
+        }
 
-            for game in games:
-                predicted_class = game.get("predicted_class")
-                if predicted_class and predicted_class != "Belirsiz":
-                    area_counts[predicted_class] = area_counts.get(predicted_class, 0) + 1
+    async def load_area_window(self):
+        """Pencereyi toplu belgeden yükle; belge yoksa ham koleksiyondan kur"""
+        if not await self.ensure_client():
+            return
+        if AREA_AGGREGATE_DOC:
+            try:
+                snapshot = await self._call("aggregate_get", self.db.document(AREA_AGGREGATE_DOC).get)
+                if snapshot.exists:
+                    self.area_window.reset((snapshot.to_dict() or {}).get("recent", []))
+                    self._area_window_ready = True
+                    return
+            except Exception as e:
+                logger.warning("Firebase area aggregate load error: %s", e)
+        await self.reconcile_area_window()
 
-            # Yüzdelik oranları hesapla
-            area_percentages = {}
-            for area, count in area_counts.items():
-                area_percentages[area] = count / total_games if total_games > 0 else 0
+    async def reconcile_area_window(self) -> Optional[Dict[str, int]]:
+        """Pencereyi son AREA_WINDOW_SIZE game_results belgesinden yeniden kur.
 
-            return area_percentages
+        Artımlı sayaçlar ile tam sayım arasındaki farkı döndürür (uyumluysa boş).
+        """
+        if not await self.ensure_client():
+            return None
+        try:
+            recent = await self._call("recent_query", self._query_recent_predictions)
+        except Exception as e:
+            logger.warning("Firebase reconcile area window error: %s", e)
+            return None
+        # Kuyrukta bekleyen (henüz yazılmamış) sonuçlar da pencerede olmalı
+        recent.extend(data["predicted_class"] for data in await self.result_writer.pending()
+                      if "predicted_class" in data)
+
+        expected: Dict[str, int] = {}
+        for predicted_class in recent:
+            expected[predicted_class] = expected.get(predicted_class, 0) + 1
+        current = self.area_window.counts()
+        drift = {area: current.get(area, 0) - expected.get(area, 0)
+                 for area in set(current) | set(expected)
+                 if current.get(area, 0) != expected.get(area, 0)}
+        if drift and self._area_window_ready:
+            logger.warning("⚠️ Area window drift corrected: %s", drift)
+
+        self.area_window.reset(recent)
+        self._area_window_ready = True
+        self._area_window_stale = False
+        self._area_reconciled_at = self.clock()
+
+        if AREA_AGGREGATE_DOC:
+            try:
+                await self._call("aggregate_set", self.db.document(AREA_AGGREGATE_DOC).set,
+                                 self._area_aggregate(), deadline=FIRESTORE_WRITE_DEADLINE)
+            except Exception as e:
+                logger.warning("Firebase area aggregate save error: %s", e)
+        return drift
+
+    def _query_recent_predictions(self) -> List[str]:
+        # Sadece predicted_class alanını çek; eskiden yeniye sırala
+        query = (self.db.collection("game_results")
+                .order_by("timestamp", direction="DESCENDING")
+                .limit(AREA_WINDOW_SIZE)
+                .select(["predicted_class"]))
+        recent = [doc.to_dict().get("predicted_class") for doc in query.stream()]
+        return [predicted_class for predicted_class in reversed(recent) if predicted_class]
+
+    async def rebuild_stats(self, days: int = STATS_DAILY_RETENTION_DAYS) -> Optional[int]:
+        """Özetleri son 'days' günün game_results belgelerinden tek akış geçişiyle yeniden kur.
 
+        Kurulum sırasında biten oyunlar ayrıca tutulur ve sonunda eklenir; yeni özet
+        hazır olunca eskisinin yerine geçer. Okunan belge sayısını döndürür.
+        """
+        if self._stats_rebuild_buffer is not None or not await self.ensure_client():
+            return None
+        until = datetime.now(timezone.utc)
+        since = datetime.fromtimestamp(until.timestamp() - days * 86400, timezone.utc)
+        self._stats_rebuild_buffer = []
+        try:
+            rollup, streamed = await self._call("stats_stream", self._stream_stats, since, until,
+                                                deadline=FIRESTORE_STREAM_DEADLINE)
+            # Henüz yazılmamış sonuçlar akışta yok
+            for data in await self.result_writer.pending():
+                if data.get("timestamp") is not None and data["timestamp"] < until:
+                    rollup.add_result(data)
+            for data in self._stats_rebuild_buffer:
+                rollup.add_result(data)
         except Exception as e:
-            print(f"Firebase get global stats error: {e}")
-            return {}
+            logger.warning("Firebase stats rebuild error: %s", e)
+            return None
+        finally:
+            self._stats_rebuild_buffer = None
+        self.stats_rollup = rollup
+        logger.info("📈 Stats rebuilt from %d stored results", streamed)
+        return streamed
+
+    def _stream_stats(self, since: datetime, until: datetime):
+        # Sadece özet alanlarını çek; belgeler tek tek akıtılır, liste tutulmaz
+        query = (self.db.collection("game_results")
+                 .where("timestamp", ">=", since)
+                 .where("timestamp", "<", until)
+                 .order_by("timestamp")
+                 .select(["predicted_class", "asked_questions", "answers", "timestamp"]))
+        streamed = 0
+
+        def results():
+            nonlocal streamed
+            for doc in query.stream():
+                streamed += 1
+                yield doc.to_dict()
+
+        rollup = build_rollup(results(), since.timestamp())
+        return rollup, streamed
+
+    async def export_game_results(self, path: str, classes: List[str],
+                                  page_size: int = GAME_EXPORT_PAGE_SIZE,
+                                  block_rows: int = GAME_EXPORT_BLOCK_ROWS,
+                                  settle: float = GAME_EXPORT_SETTLE) -> Dict:
+        """game_results'ı imleçle sayfa sayfa okuyup sütunlu dosyaya ekle (game_export).
+
+        Dosyanın son bloğundaki imleçten (yazım zamanı, belge ID'si) devam eder,
+        sadece ondan sonra yazılan kayıtları ekler; geç yüklenen eski oyunlar da
+        dahil. Bellekte en fazla bir blok tutulur; blok diske yazılmadan imleç
+        ilerlemez, yarıda kalan çalıştırma bir sonrakinde kaldığı yerden sürer.
+        Son settle saniyede yazılanlar sonraki çalıştırmaya kalır.
+        """
+        if not await self.ensure_client():
+            raise RuntimeError(f"Firestore client unavailable: {self._connect_error}")
+        export = await asyncio.to_thread(ExportFile, path, classes)
+        buffer = ExportBuffer(classes)
+        cursor = export.cursor
+        horizon = datetime.now(timezone.utc) - timedelta(seconds=settle)
+        pages = exported = 0
+        started = time.perf_counter()
+
+        async def flush():
+            nonlocal exported
+            if len(buffer):
+                await asyncio.to_thread(export.append, buffer)
+                exported += len(buffer)
+                buffer.clear()
+
+        try:
+            while True:
+                page = await self._call("export_page", self._export_page, cursor, horizon, page_size,
+                                        deadline=FIRESTORE_STREAM_DEADLINE)
+                pages += 1
+                for doc_id, data in page:
+                    buffer.add(doc_id, data)
+                if page:
+                    cursor = (timestamp_us(page[-1][1][WRITTEN_AT]), page[-1][0])
+                if len(buffer) >= block_rows:
+                    await flush()
+                if len(page) < page_size:
+                    break
+        finally:
+            # Hata olsa da tamamlanmış sayfalar yazılır
+            await flush()
+
+        logger.info("📦 Exported %d new game results to %s (%d pages, %d total) in %.1fs",
+                    exported, path, pages, export.rows, time.perf_counter() - started)
+        return {
+            "exported": exported,
+            "pages": pages,
+            "total_games": export.rows,
+            "blocks": export.blocks,
+            "checkpoint": (f"{cursor_datetime(export.cursor).isoformat()} {export.cursor[1]}"
+                           if export.cursor is not None else None),
+        }
+
+    def _export_page(self, cursor: Optional[Cursor], horizon: datetime, page_size: int):
+        """İmleçten sonra, horizon'dan önce yazılmış bir sayfa belge: [(belge ID'si, alanlar)]"""
+        collection = self.db.collection("game_results")
+        query = (collection.where(WRITTEN_AT, "<", horizon)
+                 .order_by(WRITTEN_AT)
+                 .order_by(DOCUMENT_ID)
+                 .select(EXPORT_FIELDS))
+        if cursor is not None:
+            query = query.start_after({WRITTEN_AT: cursor_datetime(cursor),
+                                       DOCUMENT_ID: collection.document(cursor[1])})
+        return [(doc.id, doc.to_dict()) for doc in query.limit(page_size).stream()]
+
+    async def backfill_written_at(self, page_size: int = GAME_EXPORT_PAGE_SIZE) -> int:
+        """written_at'ı olmayan (ResultWriter'dan önce yazılmış) belgelere şimdiki sunucu
+        zamanını yaz; dışa aktarım sorgusu onları ancak bundan sonra görür.
+
+        Tekrar çalıştırmak güvenlidir (sadece eksik olanlar yazılır). İşaretlenen belge
+        sayısını döndürür.
+        """
+        if not await self.ensure_client():
+            raise RuntimeError(f"Firestore client unavailable: {self._connect_error}")
+        after: Optional[str] = None
+        marked = 0
+        while True:
+            page, after = await self._call("backfill_page", self._backfill_page, after, page_size,
+                                           deadline=FIRESTORE_STREAM_DEADLINE)
+            marked += page
+            if after is None:
+                break
+        logger.info("🕒 Marked %d game results with %s", marked, WRITTEN_AT)
+        return marked
+
+    def _backfill_page(self, after: Optional[str], page_size: int):
+        """Belge ID'si sırasıyla bir sayfa: (işaretlenen, sonraki sayfa için son ID veya None)"""
+        collection = self.db.collection("game_results")
+        query = collection.order_by(DOCUMENT_ID).select([WRITTEN_AT])
+        if after is not None:
+            query = query.start_after({DOCUMENT_ID: collection.document(after)})
+        docs = list(query.limit(page_size).stream())
+        missing = [doc for doc in docs if WRITTEN_AT not in (doc.to_dict() or {})]
+        written_at = server_timestamp(self.db)
+        for start in range(0, len(missing), 499):
+            batch = self.db.batch()
+            for doc in missing[start:start + 499]:
+                batch.set(doc.reference, {WRITTEN_AT: written_at}, merge=True)
+            batch.commit()
+        return len(missing), (docs[-1].id if len(docs) == page_size else None)
 
     async def calculate_balanced_area_weights(self) -> Dict[str, float]:
         """Global istatistiklere göre dengeli alan ağırlıklarını hesapla"""
@@ -118,10 +534,95 @@ class FirebaseService:
             return weights
 
         except Exception as e:
-            print(f"Firebase calculate weights error: {e}")
+            logger.warning("Firebase calculate weights error: %s", e)
+            FIRESTORE_FALLBACKS.inc("equal_weights")
             # Hata durumunda eşit ağırlık döndür
             return {"Proje-Yarışma": 1.0, "Medya": 1.0, "Network": 1.0,
                    "Organizasyon": 1.0, "Eğitim": 1.0}
 
+    async def get_cached_area_weights(self) -> Dict[str, float]:
+        """Önbellekteki ağırlıkları beklemeden döndür, eskiyse arka planda yenile"""
+        if self._weights is None:
+            # Henüz hiç hesaplanmadı: Firestore'u beklemek yerine eşit ağırlık ver
+            self._weights_misses += 1
+            FIRESTORE_FALLBACKS.inc("equal_weights")
+            self._schedule_weights_refresh()
+            return {"Proje-Yarışma": 1.0, "Medya": 1.0, "Network": 1.0,
+                    "Organizasyon": 1.0, "Eğitim": 1.0}
+
+        if self.clock() - self._weights_updated_at > WEIGHTS_CACHE_TTL:
+            self._weights_stale_hits += 1
+            self._schedule_weights_refresh()
+        else:
+            self._weights_hits += 1
+        return self._weights
+
+    def _schedule_weights_refresh(self):
+        """Tek bir yenileme görevi başlat (eşzamanlı istekler aynı sorguyu paylaşır)"""
+        if self._weights_refresh_task is None or self._weights_refresh_task.done():
+            self._weights_refresh_task = asyncio.get_running_loop().create_task(
+                self._refresh_area_weights()
+            )
+
+    async def _refresh_area_weights(self):
+        # Diğer replikaların yazdıklarını da görmek için pencereyi ara ara uzlaştır
+        if self._area_window_ready and (
+                self._area_window_stale or
+                self.clock() - self._area_reconciled_at > AREA_RECONCILE_INTERVAL):
+            await self.reconcile_area_window()
+        weights = await self.calculate_balanced_area_weights()
+        self._weights = weights
+        self._weights_updated_at = self.clock()
+        self._weights_refreshes += 1
+
+    def warm_up(self):
+        """Uygulama açılışında istemciyi kur, ağırlık önbelleğini doldur, yazım işçisini başlat.
+
+        Hiçbiri beklenmez; port hemen açılır, Firestore hazır olana kadar oyunlar
+        eşit ağırlıkla başlar.
+        """
+        if RESULT_JOURNAL_DIR and self.result_writer.journal is None:
+            # Sonuçlar önce yerel günlüğe yazılır, oradan toplu yüklenir
+            self.result_writer.journal = ResultJournal.open_for_process(RESULT_JOURNAL_DIR)
+        self.result_writer.start()
+        if self.db is None:
+            self._connect_task = asyncio.get_running_loop().create_task(self._connect())
+        self._schedule_weights_refresh()
+        if STATS_REBUILD_ON_START:
+            self._stats_rebuild_task = asyncio.get_running_loop().create_task(self.rebuild_stats())
+
+    async def shutdown(self):
+        """Arka plan görevlerini durdur, bekleyen sonuçları yaz"""
+        await self.result_writer.stop()
+        for task in (self._weights_refresh_task, self._connect_task, self._stats_rebuild_task):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+
+    def weights_cache_stats(self) -> Dict[str, float]:
+        """TTL ayarı için önbellek sayaçları"""
+        age = self.clock() - self._weights_updated_at if self._weights is not None else None
+        return {
+            "ttl_seconds": WEIGHTS_CACHE_TTL,
+            "age_seconds": round(age, 3) if age is not None else None,
+            "hits": self._weights_hits,
+            "stale_hits": self._weights_stale_hits,
+            "misses": self._weights_misses,
+            "refreshes": self._weights_refreshes,
+            "refreshing": self._weights_refresh_task is not None and not self._weights_refresh_task.done(),
+        }
+
+    def persistence_stats(self) -> Dict:
+        return {
+            "status": self.persistence_status,
+            "backend": FIRESTORE_BACKEND,
+            "client_init_ms": round(self._connect_seconds * 1e3, 1) if self._connect_seconds else None,
+            "error": self._connect_error,
+            "breaker": self.breaker.stats(),
+        }
+
 # Singleton instance
 firebase_service = FirebaseService()
\ No newline at end of file
@@ -0,0 +1,357 @@
+"""game_results koleksiyonunun sütunlu (columnar) dışa aktarımı.
+
+FirebaseService.export_game_results koleksiyonu yazım zamanı (written_at) +
+belge ID'si imleçleriyle sayfa sayfa okur ve kayıtları bloklar halinde bu
+dosyaya ekler; bellekte en fazla bir blok tutulur. Her blok kendi imlecini (son
+kaydın yazım zamanı ve belge ID'si) taşır: sonraki çalıştırma dosyanın son
+bloğundan devam eder, sadece ondan sonra yazılan kayıtları ekler. Yarım
+yazılmış son blok (çökme) açılışta CRC ile tespit edilip kesilir.
+
+written_at, ResultWriter'ın yazım anında koyduğu sunucu zaman damgasıdır;
+oyunun bitiş zamanı (timestamp) değil. Kesintiden sonra günlükten geç yüklenen
+kayıtlar da imleçten sonra yazıldığı için bir sonraki çalıştırmada eklenir;
+dosyadaki satır sırası yazım sırasıdır. Son GAME_EXPORT_SETTLE saniyede
+yazılanlar (commit'i sürenler, saat farkı) sonraki çalıştırmaya kalır.
+
+written_at'ı olmayan eski belgeler sorguya girmez; bir kez
+"python game_export.py backfill" ile işaretlenir (yazım zamanı olarak o an
+konur, imleç hangi noktada olursa olsun sonraki çalıştırmada eklenirler).
+
+Dosya düzeni (little-endian):
+  başlık  magic "AKGX", biçim sürümü, sınıf adları (CLASSES sırası)
+  blok    magic "AKGB", satır sayısı, soru sütunu genişliği, sınıf sayısı,
+          imleç (zaman µs, belge ID'si), sütunlar, CRC32
+  sütunlar (N satır, W genişlik, C sınıf):
+    timestamp    float64 [N]     unix saniye
+    class_id     uint8   [N]     tahmin: sınıf indeksi, 254 Belirsiz, 255 bilinmeyen
+    pool_version uint32  [N]     0: kayıtsız
+    n_asked      uint8   [N]
+    asked        uint8   [N, W]  sorulan soru indeksleri, boşluk 255
+    answers      int8    [N, W]  Likert değerleri (-2..2), cevapsız -128
+    confidences  float32 [N, C]  CLASSES sırasıyla, eksik NaN
+
+load_export dosyayı numpy dizilerine tek seferde yükler (milyonlarca oyun
+saniyeler içinde); answer_matrix likelihood_model ve toplu puanlama
+fonksiyonlarının beklediği (N, Q) cevap matrisini üretir.
+
+    python game_export.py export game_results.akgx [--page-size 1000]
+    python game_export.py backfill [--page-size 1000]
+    python game_export.py info game_results.akgx
+"""
+import os
+import struct
+import zlib
+from array import array
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app_logging import get_logger
+from result_writer import WRITTEN_AT
+
+logger = get_logger(__name__)
+
+# Firestore'dan sayfa başına okunan belge
+GAME_EXPORT_PAGE_SIZE = int(os.getenv("GAME_EXPORT_PAGE_SIZE", "1000"))
+# Dosyaya tek blokta yazılan en fazla satır (bellek sınırı)
+GAME_EXPORT_BLOCK_ROWS = int(os.getenv("GAME_EXPORT_BLOCK_ROWS", "50000"))
+# Son bu kadar saniyede yazılanlar henüz aktarılmaz (commit süresi + saat farkı payı)
+GAME_EXPORT_SETTLE = float(os.getenv("GAME_EXPORT_SETTLE", "60"))
+
+FILE_MAGIC = b"AKGX"
+BLOCK_MAGIC = b"AKGB"
+FORMAT_VERSION = 1
+UNCERTAIN_LABEL = "Belirsiz"
+UNCERTAIN_CLASS = 254
+UNKNOWN_CLASS = 255
+NO_QUESTION = 255
+NO_ANSWER = -128
+
+_FILE_HEADER = struct.Struct("<4sBH")  # magic, sürüm, sınıf adları uzunluğu
+_BLOCK_HEADER = struct.Struct("<4sIBBqH")  # magic, satır, genişlik, sınıf, imleç zamanı µs, ID uzunluğu
+_CRC = struct.Struct("<I")
+
+# Kaldığı yer: (son kaydın yazım zamanı µs, belge ID'si)
+Cursor = Tuple[int, str]
+
+# Sütunlar yazım sırasıyla: (ad, tür, satır başına eleman: 1, "width" veya "classes")
+_COLUMNS = (
+    ("timestamp", "<f8", 1),
+    ("class_id", "u1", 1),
+    ("pool_version", "<u4", 1),
+    ("n_asked", "u1", 1),
+    ("asked", "u1", "width"),
+    ("answers", "i1", "width"),
+    ("confidences", "<f4", "classes"),
+)
+
+# Belge ID'sine göre sıralama / imleç alanı (firestore.FieldPath.document_id())
+DOCUMENT_ID = "__name__"
+# Dışa aktarımda okunan alanlar
+EXPORT_FIELDS = ["timestamp", "predicted_class", "pool_version", "asked_questions",
+                 "answers", "confidences", WRITTEN_AT]
+
+
+def timestamp_us(value: datetime) -> int:
+    """Zamanı tam sayı mikrosaniyeye çevir (imleç karşılaştırması kayıpsız olsun)"""
+    delta = value - datetime(1970, 1, 1, tzinfo=timezone.utc)
+    return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+def cursor_datetime(cursor: Cursor) -> datetime:
+    seconds, micros = divmod(cursor[0], 1_000_000)
+    return datetime.fromtimestamp(seconds, timezone.utc).replace(microsecond=micros)
+
+
+class ExportBuffer:
+    """Bir bloğa yazılacak satırlar (sütun başına dizi)"""
+
+    def __init__(self, classes: Sequence[str]):
+        self.classes = list(classes)
+        self.class_ids = {name: i for i, name in enumerate(self.classes)}
+        self.class_ids[UNCERTAIN_LABEL] = UNCERTAIN_CLASS
+        self.clear()
+
+    def clear(self):
+        self.timestamps = array("d")
+        self.class_id = array("B")
+        self.pool_version = array("I")
+        self.asked: List[bytes] = []
+        self.answers: List[bytes] = []
+        self.confidences = array("f")
+        self.cursor: Optional[Cursor] = None
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def add(self, doc_id: str, data: Dict):
+        ts = data["timestamp"]
+        self.timestamps.append(ts.timestamp())
+        self.class_id.append(self.class_ids.get(data.get("predicted_class"), UNKNOWN_CLASS))
+        self.pool_version.append(data.get("pool_version") or 0)
+        asked = (data.get("asked_questions") or [])[:255]
+        answers = (data.get("answers") or [])[:len(asked)]
+        self.asked.append(bytes(q if 0 <= q < NO_QUESTION else NO_QUESTION for q in asked))
+        self.answers.append(bytes(v & 0xFF for v in answers))
+        confidences = data.get("confidences") or {}
+        self.confidences.extend(confidences.get(c, float("nan")) for c in self.classes)
+        self.cursor = (timestamp_us(data[WRITTEN_AT]), doc_id)
+
+    def encode(self) -> bytes:
+        rows = len(self)
+        width = max((len(a) for a in self.asked), default=0)
+        asked = np.full((rows, width), NO_QUESTION, dtype=np.uint8)
+        answers = np.full((rows, width), NO_ANSWER, dtype=np.int8)
+        for i, (qs, vs) in enumerate(zip(self.asked, self.answers)):
+            asked[i, :len(qs)] = np.frombuffer(qs, dtype=np.uint8)
+            answers[i, :len(vs)] = np.frombuffer(vs, dtype=np.int8)
+        n_asked = np.fromiter((len(a) for a in self.asked), dtype=np.uint8, count=rows)
+        doc_id = self.cursor[1].encode()
+        body = b"".join((
+            _BLOCK_HEADER.pack(BLOCK_MAGIC, rows, width, len(self.classes), self.cursor[0],
+                               len(doc_id)),
+            doc_id,
+            self.timestamps.tobytes(), self.class_id.tobytes(), self.pool_version.tobytes(),
+            n_asked.tobytes(), asked.tobytes(), answers.tobytes(), self.confidences.tobytes(),
+        ))
+        return body + _CRC.pack(zlib.crc32(body))
+
+
+def _column_count(per_row, rows: int, width: int, n_classes: int) -> int:
+    return rows * {1: 1, "width": width, "classes": n_classes}[per_row]
+
+
+def _payload_size(rows: int, width: int, n_classes: int) -> int:
+    return sum(np.dtype(dtype).itemsize * _column_count(per_row, rows, width, n_classes)
+               for _, dtype, per_row in _COLUMNS)
+
+
+def _scan_blocks(data: bytes, start: int):
+    """Geçerli blokları (konum, başlık alanları, ID) olarak üret; bozuk/yarım blokta durur"""
+    offset = start
+    while offset + _BLOCK_HEADER.size <= len(data):
+        magic, rows, width, n_classes, cursor_us, id_len = _BLOCK_HEADER.unpack_from(data, offset)
+        end = offset + _BLOCK_HEADER.size + id_len + _payload_size(rows, width, n_classes)
+        if magic != BLOCK_MAGIC or end + _CRC.size > len(data):
+            return
+        if _CRC.unpack_from(data, end)[0] != zlib.crc32(memoryview(data)[offset:end]):
+            return
+        doc_id = data[offset + _BLOCK_HEADER.size:offset + _BLOCK_HEADER.size + id_len].decode()
+        yield offset, (rows, width, n_classes, cursor_us), doc_id, end + _CRC.size
+        offset = end + _CRC.size
+
+
+def _read_header(data: bytes, path: str) -> Tuple[List[str], int]:
+    magic, version, names_len = _FILE_HEADER.unpack_from(data)
+    if magic != FILE_MAGIC or version != FORMAT_VERSION:
+        raise ValueError(f"{path} is not a game export (version {FORMAT_VERSION})")
+    start = _FILE_HEADER.size + names_len
+    return data[_FILE_HEADER.size:start].decode().split("\n"), start
+
+
+class ExportFile:
+    """Eklemeye açık dışa aktarım dosyası; açılışta son geçerli bloğa kadar doğrulanır"""
+
+    def __init__(self, path: str, classes: Sequence[str]):
+        self.path = path
+        self.classes = list(classes)
+        self.rows = 0
+        self.blocks = 0
+        self.cursor: Optional[Cursor] = None
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            names = "\n".join(self.classes).encode()
+            with open(path, "wb") as f:
+                f.write(_FILE_HEADER.pack(FILE_MAGIC, FORMAT_VERSION, len(names)) + names)
+                f.flush()
+                os.fsync(f.fileno())
+            return
+
+        with open(path, "rb") as f:
+            data = f.read()
+        names, start = _read_header(data, path)
+        if names != self.classes:
+            raise ValueError(f"{path} was exported with classes {names}")
+        end = start
+        for _, (rows, _, _, cursor_us), doc_id, end in _scan_blocks(data, start):
+            self.rows += rows
+            self.blocks += 1
+            self.cursor = (cursor_us, doc_id)
+        if end < len(data):
+            logger.warning("⚠️ Game export %s: dropping %d bytes of an incomplete block",
+                           path, len(data) - end)
+            with open(path, "r+b") as f:
+                f.truncate(end)
+
+    def append(self, buffer: ExportBuffer):
+        """Bloğu dosyaya ekle ve diske indir; imleç ancak bundan sonra ilerler"""
+        block = buffer.encode()
+        with open(self.path, "ab") as f:
+            f.write(block)
+            f.flush()
+            os.fsync(f.fileno())
+        self.rows += len(buffer)
+        self.blocks += 1
+        self.cursor = buffer.cursor
+
+
+class GameExport:
+    """Yüklenmiş dışa aktarım: sütun başına numpy dizisi"""
+
+    def __init__(self, classes: List[str], columns: Dict[str, np.ndarray]):
+        self.classes = classes
+        self.timestamp = columns["timestamp"]
+        self.class_id = columns["class_id"]
+        self.pool_version = columns["pool_version"]
+        self.n_asked = columns["n_asked"]
+        self.asked = columns["asked"]
+        self.answers = columns["answers"]
+        self.confidences = columns["confidences"]
+
+    def __len__(self) -> int:
+        return self.timestamp.shape[0]
+
+    def answer_matrix(self, n_questions: int, pool_version: Optional[int] = None) -> np.ndarray:
+        """(N, Q) int8 cevap indeksleri (likelihood_model.answer_matrix ile aynı kodlama).
+
+        Cevabı olmayan oyunlar ve başka havuz sürümüyle oynanmışlar çıkarılır;
+        pool_version kaydı olmayanlar kabul edilir.
+        """
+        from likelihood_model import NOT_ASKED
+
+        keep = (self.answers != NO_ANSWER).any(axis=1)
+        if pool_version is not None:
+            keep &= (self.pool_version == 0) | (self.pool_version == pool_version)
+        # Cevaplanmış ama havuzda olmayan soru (255: 0..254 dışı indeks) -> oyun atlanır
+        keep &= ~((self.answers != NO_ANSWER) & (self.asked >= n_questions)).any(axis=1)
+        asked, answers = self.asked[keep], self.answers[keep]
+        matrix = np.full((asked.shape[0], n_questions), NOT_ASKED, dtype=np.int8)
+        rows, cols = np.nonzero((answers != NO_ANSWER) & (asked != NO_QUESTION))
+        # value_index: Likert değeri -> indeks (2 - değer)
+        matrix[rows, asked[rows, cols]] = 2 - answers[rows, cols]
+        return matrix
+
+
+def load_export(path: str) -> GameExport:
+    """Tüm blokları sütun dizilerine yükle"""
+    with open(path, "rb") as f:
+        data = f.read()
+    classes, start = _read_header(data, path)
+    parts: Dict[str, List[np.ndarray]] = {name: [] for name, _, _ in _COLUMNS}
+    max_width = 0
+    for offset, (rows, width, n_classes, _), doc_id, _ in _scan_blocks(data, start):
+        at = offset + _BLOCK_HEADER.size + len(doc_id.encode())
+        for name, dtype, per_row in _COLUMNS:
+            column = np.frombuffer(data, dtype=dtype, offset=at,
+                                   count=_column_count(per_row, rows, width, n_classes))
+            at += column.nbytes
+            if per_row != 1:
+                column = column.reshape(rows, width if per_row == "width" else n_classes)
+            parts[name].append(column)
+        max_width = max(max_width, width)
+
+    columns = {}
+    for name, dtype, per_row in _COLUMNS:
+        chunks = parts[name]
+        if per_row == 1:
+            columns[name] = np.concatenate(chunks) if chunks else np.zeros(0, dtype=dtype)
+            continue
+        # Blokların soru sütunu genişlikleri farklı olabilir: en genişe doldurulur
+        cols = max_width if per_row == "width" else len(classes)
+        fill = {"asked": NO_QUESTION, "answers": NO_ANSWER}.get(name, np.nan)
+        column = np.full((sum(c.shape[0] for c in chunks), cols), fill, dtype=dtype)
+        row = 0
+        for c in chunks:
+            column[row:row + c.shape[0], :c.shape[1]] = c
+            row += c.shape[0]
+        columns[name] = column
+    return GameExport(classes, columns)
+
+
+if __name__ == "__main__":
+    import argparse
+    import asyncio
+    import time
+
+    from app_logging import setup_logging
+
+    parser = argparse.ArgumentParser(description="game_results sütunlu dışa aktarımı")
+    sub = parser.add_subparsers(dest="command", required=True)
+    ex = sub.add_parser("export", help="Firestore'dan yeni kayıtları dosyaya ekle")
+    ex.add_argument("path")
+    ex.add_argument("--page-size", type=int, default=GAME_EXPORT_PAGE_SIZE)
+    bf = sub.add_parser("backfill", help="written_at'ı olmayan eski belgeleri işaretle")
+    bf.add_argument("--page-size", type=int, default=GAME_EXPORT_PAGE_SIZE)
+    info = sub.add_parser("info", help="dosyayı yükle ve özetle")
+    info.add_argument("path")
+    args = parser.parse_args()
+
+    setup_logging()
+    if args.command == "export":
+        from firebase_service import firebase_service
+        from main import CLASSES
+
+        summary = asyncio.run(firebase_service.export_game_results(args.path, CLASSES,
+                                                                   args.page_size))
+        for key, value in summary.items():
+            print(f"{key:16s} {value}")
+    elif args.command == "backfill":
+        from firebase_service import firebase_service
+
+        marked = asyncio.run(firebase_service.backfill_written_at(args.page_size))
+        print(f"marked           {marked}")
+    else:
+        started = time.perf_counter()
+        export = load_export(args.path)
+        elapsed = time.perf_counter() - started
+        print(f"games            {len(export)}")
+        print(f"load_seconds     {elapsed:.3f}")
+        if len(export):
+            first, last = export.timestamp.min(), export.timestamp.max()
+            print(f"from             {datetime.fromtimestamp(first, timezone.utc).isoformat()}")
+            print(f"to               {datetime.fromtimestamp(last, timezone.utc).isoformat()}")
+            counts = np.bincount(export.class_id, minlength=256)
+            labels = [*enumerate(export.classes), (UNCERTAIN_CLASS, UNCERTAIN_LABEL),
+                      (UNKNOWN_CLASS, "?")]
+            for class_id, name in labels:
+                print(f"  {name:14s} {counts[class_id]}")
@@ -0,0 +1,293 @@
+"""Kayıtlı oyunlardan öğrenilen cevap olabilirlik modeli.
+
+Elle verilmiş w ağırlıkları yerine, her soru ve sınıf için cevap dağılımı
+P(cevap | soru, sınıf) game_results'taki cevaplardan toplu (vektörel) olarak
+öğrenilir. Gerçek sınıf kayıtlı değildir (sadece tahmin), bu yüzden model
+gizli sınıflı naive Bayes karışımı olarak EM ile uydurulur. Elle verilmiş
+modelin örtük olabilirlikleri (question_tree.answer_likelihoods) hem başlangıç
+hem de Dirichlet önsel olarak kullanılır; az cevaplanan sorular elle modele
+yakın kalır.
+
+Sunucu modeli açılışta (ve havuz sürümüyle birlikte) yükler ve step_game'de
+puan yerine log-posterior günceller: skor = log P(sınıf) + Σ log P(cevap | soru, sınıf).
+Model sadece eğitildiği havuzla (ağırlık matrisi parmak izi) kullanılır.
+
+Eğitim: python likelihood_model.py train [--journal DİZİN] [--days 90] [--out likelihood_model.bin]
+"""
+import math
+import os
+import struct
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+
+from app_logging import get_logger
+from question_tree import LIKERT_VALUES, answer_likelihoods, pool_fingerprint
+
+logger = get_logger(__name__)
+
+LIKELIHOOD_MODEL_PATH = os.getenv(
+    "LIKELIHOOD_MODEL_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "likelihood_model.bin"),
+)
+
+MODEL_MAGIC = b"ALKM"
+MODEL_VERSION = 1
+# magic, sürüm, soru sayısı, cevap değeri sayısı, sınıf sayısı, havuz parmak izi, oyun sayısı;
+# ardından float32 log P(sınıf) (C) ve log P(cevap | soru, sınıf) (Q, V, C)
+_HEADER = struct.Struct("<4sBBBB8sI")
+N_VALUES = len(LIKERT_VALUES)
+# Sorulmamış soru (cevap matrisinde)
+NOT_ASKED = -1
+# Toplu E/M adımlarında bir seferde işlenen oyun sayısı (bellek sınırı)
+FIT_CHUNK = 65536
+
+
+def value_index(value: int) -> int:
+    """Likert değeri (-2..2) -> LIKERT_VALUES indeksi"""
+    return 2 - value
+
+
+class LikelihoodModel:
+    def __init__(self, log_likelihood: np.ndarray, log_prior: np.ndarray,
+                 fingerprint: bytes, games: int = 0):
+        self.log_likelihood = np.asarray(log_likelihood, dtype=np.float64)  # (Q, V, C)
+        self.log_prior = np.asarray(log_prior, dtype=np.float64)  # (C,)
+        self.fingerprint = fingerprint
+        self.games = games
+        # İstek yolu: soru -> cevap indeksi -> sınıf sırasıyla log-olabilirlik satırı
+        self.rows: Tuple[Tuple[Tuple[float, ...], ...], ...] = tuple(
+            tuple(tuple(float(x) for x in row) for row in per_question)
+            for per_question in self.log_likelihood
+        )
+        self.prior: Tuple[float, ...] = tuple(float(x) for x in self.log_prior)
+
+    @classmethod
+    def from_weights(cls, weight_matrix: np.ndarray) -> "LikelihoodModel":
+        """Elle verilmiş ağırlıkların örtük modeli (eşit sınıf önseli)"""
+        n_classes = weight_matrix.shape[1]
+        return cls(np.log(answer_likelihoods(weight_matrix)),
+                   np.full(n_classes, -math.log(n_classes)), pool_fingerprint(weight_matrix))
+
+    def save(self, path: str):
+        n_questions, n_values, n_classes = self.log_likelihood.shape
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(_HEADER.pack(MODEL_MAGIC, MODEL_VERSION, n_questions, n_values, n_classes,
+                                 self.fingerprint, min(self.games, 0xFFFFFFFF)))
+            f.write(self.log_prior.astype("<f4").tobytes())
+            f.write(self.log_likelihood.astype("<f4").tobytes())
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str, weight_matrix: np.ndarray) -> Optional["LikelihoodModel"]:
+        """Modeli yükle; dosya yoksa veya başka bir havuz için eğitildiyse None"""
+        if not path or not os.path.exists(path):
+            return None
+        with open(path, "rb") as f:
+            data = f.read()
+        magic, version, n_questions, n_values, n_classes, fingerprint, games = \
+            _HEADER.unpack_from(data)
+        if magic != MODEL_MAGIC or version != MODEL_VERSION:
+            logger.warning("⚠️ Likelihood model %s has an unknown format, ignoring it", path)
+            return None
+        if fingerprint != pool_fingerprint(weight_matrix):
+            logger.warning("⚠️ Likelihood model %s was trained for another question pool, "
+                           "ignoring it", path)
+            return None
+        values = np.frombuffer(data, dtype="<f4", offset=_HEADER.size)
+        if n_values != N_VALUES or values.size != n_classes + n_questions * n_values * n_classes:
+            logger.warning("⚠️ Likelihood model %s is truncated, ignoring it", path)
+            return None
+        return cls(values[n_classes:].reshape(n_questions, n_values, n_classes),
+                   values[:n_classes], fingerprint, games)
+
+    def log_joint(self, answers: np.ndarray) -> np.ndarray:
+        """answers (N, Q) cevap indeksleri (sorulmayan = NOT_ASKED) -> (N, C) log P(sınıf, cevaplar)"""
+        return _log_joint(answers, self.log_likelihood, self.log_prior)
+
+
+def answer_matrix(results: Iterable[Dict], n_questions: int,
+                  pool_version: Optional[int] = None) -> Tuple[np.ndarray, int]:
+    """game_results belgelerinden (N, Q) int8 cevap matrisi; (matris, atlanan belge sayısı).
+
+    Cevapları olmayan (eski) kayıtlar ve başka bir havuz sürümüyle oynanmış oyunlar atlanır;
+    pool_version alanı olmayan kayıtlar kabul edilir.
+    """
+    chunks, rows, skipped = [], 0, 0
+    chunk = np.full((FIT_CHUNK, n_questions), NOT_ASKED, dtype=np.int8)
+    for result in results:
+        asked = result.get("asked_questions") or []
+        answers = result.get("answers") or []
+        version = result.get("pool_version")
+        if (not answers or len(answers) > len(asked)
+                or (pool_version is not None and version is not None and version != pool_version)
+                or any(not 0 <= q < n_questions for q in asked[:len(answers)])):
+            skipped += 1
+            continue
+        row = chunk[rows]
+        for q, v in zip(asked, answers):
+            row[q] = value_index(v)
+        rows += 1
+        if rows == FIT_CHUNK:
+            chunks.append(chunk)
+            chunk = np.full((FIT_CHUNK, n_questions), NOT_ASKED, dtype=np.int8)
+            rows = 0
+    chunks.append(chunk[:rows])
+    return np.concatenate(chunks), skipped
+
+
+def _log_joint(answers: np.ndarray, log_likelihood: np.ndarray,
+               log_prior: np.ndarray) -> np.ndarray:
+    joint = np.broadcast_to(log_prior, (answers.shape[0], log_prior.shape[0])).copy()
+    for v in range(N_VALUES):
+        joint += (answers == v).astype(np.float64) @ log_likelihood[:, v, :]
+    return joint
+
+
+def _log_normalize(joint: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Satır başına (log Σ exp, sorumluluklar)"""
+    mx = joint.max(axis=1, keepdims=True)
+    exps = np.exp(joint - mx)
+    total = exps.sum(axis=1, keepdims=True)
+    return (mx + np.log(total))[:, 0], exps / total
+
+
+def fit(answers: np.ndarray, prior_likelihoods: np.ndarray, prior_strength: float = 10.0,
+        iterations: int = 20, tolerance: float = 1e-4) -> Tuple[np.ndarray, np.ndarray, float]:
+    """Gizli sınıflı naive Bayes karışımını EM ile uydur.
+
+    prior_likelihoods (Q, V, C): başlangıç ve Dirichlet önsel (soru-sınıf başına
+    prior_strength sahte cevap). -> (log P(cevap | soru, sınıf), log P(sınıf), oyun başına
+    ortalama log-olabilirlik)
+    """
+    n_games, n_questions = answers.shape
+    n_classes = prior_likelihoods.shape[2]
+    log_likelihood = np.log(prior_likelihoods)
+    log_prior = np.full(n_classes, -math.log(n_classes))
+    pseudo = prior_strength * prior_likelihoods
+    previous = -math.inf
+    mean_ll = 0.0
+    for iteration in range(iterations):
+        counts = pseudo.copy()
+        class_totals = np.ones(n_classes)  # Laplace
+        total_ll = 0.0
+        for start in range(0, n_games, FIT_CHUNK):
+            block = answers[start:start + FIT_CHUNK]
+            # E: oyun başına sınıf sorumlulukları
+            ll, resp = _log_normalize(_log_joint(block, log_likelihood, log_prior))
+            total_ll += float(ll.sum())
+            class_totals += resp.sum(axis=0)
+            # M: sorumluluk ağırlıklı cevap sayıları (Q, C) her cevap değeri için
+            for v in range(N_VALUES):
+                counts[:, v, :] += (block == v).astype(np.float64).T @ resp
+        log_likelihood = np.log(counts / counts.sum(axis=1, keepdims=True))
+        log_prior = np.log(class_totals / class_totals.sum())
+        mean_ll = total_ll / max(n_games, 1)
+        logger.info("EM iteration %d: mean log-likelihood %.5f", iteration + 1, mean_ll)
+        if mean_ll - previous < tolerance:
+            break
+        previous = mean_ll
+    return log_likelihood, log_prior, mean_ll
+
+
+def train(results: Iterable[Dict], weight_matrix: np.ndarray, pool_version: Optional[int] = None,
+          prior_strength: float = 10.0, iterations: int = 20,
+          holdout: float = 0.0, seed: int = 0) -> Tuple[LikelihoodModel, Dict]:
+    """Sonuç akışından model eğit -> (model, özet). holdout oranı kadar oyun değerlendirmeye ayrılır."""
+    answers, skipped = answer_matrix(results, weight_matrix.shape[0], pool_version)
+    return train_answers(answers, weight_matrix, prior_strength, iterations, holdout, seed, skipped)
+
+
+def train_answers(answers: np.ndarray, weight_matrix: np.ndarray, prior_strength: float = 10.0,
+                  iterations: int = 20, holdout: float = 0.0, seed: int = 0,
+                  skipped: int = 0) -> Tuple[LikelihoodModel, Dict]:
+    """Hazır (N, Q) cevap matrisinden eğit (ör. game_export dosyasından)"""
+    rng = np.random.default_rng(seed)
+    order = rng.permutation(answers.shape[0])
+    n_holdout = int(answers.shape[0] * holdout)
+    held, used = answers[order[:n_holdout]], answers[order[n_holdout:]]
+
+    prior_likelihoods = answer_likelihoods(weight_matrix)
+    log_likelihood, log_prior, mean_ll = fit(used, prior_likelihoods, prior_strength, iterations)
+    model = LikelihoodModel(log_likelihood, log_prior, pool_fingerprint(weight_matrix),
+                            used.shape[0])
+    summary = {"games": int(used.shape[0]), "skipped": skipped, "train_log_likelihood": mean_ll}
+    if n_holdout:
+        hand = LikelihoodModel.from_weights(weight_matrix)
+        summary["holdout_games"] = n_holdout
+        for name, m in (("hand", hand), ("learned", model)):
+            ll, _ = _log_normalize(m.log_joint(held))
+            summary[f"holdout_log_likelihood_{name}"] = float(ll.mean())
+    return model, summary
+
+
+def stream_game_results(db, since: Optional[datetime] = None) -> Iterator[Dict]:
+    """game_results'tan eğitim alanlarını tek tek akıt (liste tutulmaz)"""
+    query = db.collection("game_results")
+    if since is not None:
+        query = query.where("timestamp", ">=", since)
+    query = query.order_by("timestamp").select(
+        ["asked_questions", "answers", "pool_version", "timestamp"])
+    for doc in query.stream():
+        yield doc.to_dict()
+
+
+def journal_game_results(directory: str) -> Iterator[Dict]:
+    """Yerel sonuç günlüğündeki game_results kayıtları"""
+    from result_journal import iter_records
+
+    for path, data in iter_records(directory):
+        if path.startswith("game_results/"):
+            yield data
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from app_logging import setup_logging
+
+    parser = argparse.ArgumentParser(description="Cevap olabilirlik modelini eğit")
+    sub = parser.add_subparsers(dest="command", required=True)
+    tr = sub.add_parser("train", help="game_results'tan eğit ve model dosyasını yaz")
+    tr.add_argument("--journal", help="Firestore yerine bu sonuç günlüğü dizininden oku")
+    tr.add_argument("--export", help="Firestore yerine bu sütunlu dışa aktarımdan oku (game_export)")
+    tr.add_argument("--days", type=float, default=90, help="son kaç günün oyunları (Firestore)")
+    tr.add_argument("--out", default=LIKELIHOOD_MODEL_PATH)
+    tr.add_argument("--iterations", type=int, default=20)
+    tr.add_argument("--prior-strength", type=float, default=10.0,
+                    help="soru-sınıf başına elle modelden sahte cevap sayısı")
+    tr.add_argument("--holdout", type=float, default=0.1,
+                    help="değerlendirmeye ayrılan oyun oranı")
+    args = parser.parse_args()
+
+    setup_logging()
+    from question_pool import QUESTION_POOL_PATH, load_pool
+    import main
+
+    pool = load_pool(QUESTION_POOL_PATH, main.CLASSES)
+    if args.export:
+        from game_export import load_export
+
+        export = load_export(args.export)
+        answers = export.answer_matrix(pool.weight_matrix.shape[0], pool.version)
+        model, summary = train_answers(answers, pool.weight_matrix, args.prior_strength,
+                                       args.iterations, args.holdout,
+                                       skipped=len(export) - answers.shape[0])
+    else:
+        if args.journal:
+            source = journal_game_results(args.journal)
+        else:
+            from firebase_service import FirebaseService
+            since = datetime.fromtimestamp(
+                datetime.now(timezone.utc).timestamp() - args.days * 86400, timezone.utc)
+            source = stream_game_results(FirebaseService._create_client(), since)
+        model, summary = train(source, pool.weight_matrix, pool.version, args.prior_strength,
+                               args.iterations, args.holdout)
+    if not summary["games"]:
+        raise SystemExit("no games with stored answers for this question pool")
+    model.save(args.out)
+    for key, value in summary.items():
+        print(f"{key:32s} {value:.5f}" if isinstance(value, float) else f"{key:32s} {value}")
+    print(f"✅ Likelihood model written to {args.out} ({os.path.getsize(args.out)} bytes)")
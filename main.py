@@ -1,13 +1,81 @@
-from fastapi import FastAPI, HTTPException
+import time
+# Soğuk başlangıç ölçümü: modül import süresi (uvicorn portu bundan sonra açar)
+_IMPORT_STARTED = time.perf_counter()
+
+import os
+import asyncio
+import json
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from typing import Dict, List, Optional, Literal
+from typing import Dict, List, Optional, Literal, Sequence, Tuple
 from uuid import uuid4
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from array import array
 import math
+import struct
+import numpy as np
 import random
+import logging
+from app_logging import get_logger, log_sampled, setup_logging
+from fast_response import RESPONSE_VALIDATION, QuestionResponses, RawJSONResponse, model_json
 from firebase_service import firebase_service
-
-app = FastAPI(title="YTU-Akinator-Server (Branching)")
+from metrics import (GAME_RESULTS, QUESTION_SELECT_SECONDS, QUESTIONS_PER_GAME, REGISTRY,
+                     WEBSOCKET_CLOSES, MetricsMiddleware)
+from session_snapshot import SESSION_SNAPSHOT_INTERVAL, save_snapshot
+from session_store import SessionFinished, SessionStoreBusy, create_session_store
+from session_token import SESSION_MODE, TokenError, create_token_codec, new_nonce
+from question_pool import (POOL_RELOAD_INTERVAL, QUESTION_POOL_PATH, CompiledPool,
+                           PoolRegistry, UnknownPoolVersion)
+from question_tree import BUCKETS, NO_QUESTION, child_node
+
+setup_logging()
+logger = get_logger(__name__)
+
+# Import süresi bu bütçeyi (saniye) aşarsa açılışta uyarı yazılır
+STARTUP_IMPORT_BUDGET = float(os.getenv("STARTUP_IMPORT_BUDGET", "2.0"))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Firestore istemcisi ve global ağırlıklar arka planda hazırlanır; açılış beklemez
+    firebase_service.warm_up()
+    reload_task = asyncio.create_task(_reload_pool_loop()) if POOL_RELOAD_INTERVAL > 0 else None
+    snapshot_task = (asyncio.create_task(_snapshot_loop())
+                     if SESSIONS.snapshot_path and SESSION_SNAPSHOT_INTERVAL > 0 else None)
+    yield
+    for task in (reload_task, snapshot_task):
+        if task is not None:
+            task.cancel()
+    if SESSIONS.snapshot_path:
+        # Yarım oyunlar yeni süreçte devam etsin (deploy / yeniden başlatma)
+        try:
+            result = await save_snapshot(SESSIONS, SESSIONS.snapshot_path)
+            logger.info("💾 Session snapshot written: %d sessions, %d bytes in %.2fs",
+                        result["sessions"], result["bytes"], result["seconds"])
+        except Exception as e:
+            # Snapshot kaybı sonuç kaybına dönüşmesin: yazım kuyruğu her durumda boşaltılır
+            logger.exception("❌ Session snapshot failed at shutdown: %s", e)
+    await firebase_service.shutdown()
+
+async def _snapshot_loop():
+    """Oturum tablosunu periyodik olarak snapshot'a yaz (çökmede kaybı sınırlar)"""
+    while True:
+        await asyncio.sleep(SESSION_SNAPSHOT_INTERVAL)
+        try:
+            await save_snapshot(SESSIONS, SESSIONS.snapshot_path)
+        except Exception as e:
+            # Döngü durmasın: sonraki turda tekrar denenir
+            logger.exception("⚠️ Session snapshot failed: %s", e)
+
+async def _reload_pool_loop():
+    """Soru havuzu dosyasını periyodik kontrol et (değiştiyse yeni sürüm yüklenir)"""
+    while True:
+        await asyncio.sleep(POOL_RELOAD_INTERVAL)
+        await asyncio.to_thread(POOLS.reload)
+
+app = FastAPI(title="YTU-Akinator-Server (Branching)", lifespan=lifespan)
 
 # CORS ayarları - Frontend'in erişebilmesi için
 app.add_middleware(
@@ -18,6 +86,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Oyun uç noktalarının gecikme histogramları (/metrics)
+app.add_middleware(MetricsMiddleware, paths=("/start", "/answer", "/answers", "/evaluate"))
+
+@app.exception_handler(SessionStoreBusy)
+async def session_store_busy(request, exc: SessionStoreBusy):
+    """Paylaşılan oturum deposu kilitli: worker beklemez, istemci tekrar dener.
+    Durum yazılmadan önce reddedildiği için aynı cevabı tekrar göndermek güvenlidir."""
+    return JSONResponse({"detail": "session store is busy, retry"}, status_code=503,
+                        headers={"Retry-After": "1"})
+
 # --- 5 ekip sınıfı ---
 CLASSES = [
     "Proje-Yarışma",
@@ -49,15 +127,37 @@ def bucket_of(val: int) -> str:
 
 # --- API modelleri ---
 class AnswerIn(BaseModel):
-    session_id: str
+    session_id: Optional[str] = None
+    token: Optional[str] = None  # SESSION_MODE=token: oyun durumu imzalı token'da
+    answer: AnswerKey
+
+
+class AnswerItem(BaseModel):
+    answer: AnswerKey
+    question_id: Optional[int] = None  # soru havuzu indeksi (verilirse doğrulanır)
+
+class AnswerBatchIn(BaseModel):
+    session_id: Optional[str] = None
+    token: Optional[str] = None
+    answers: List[AnswerItem]
+
+class GameAnswer(BaseModel):
+    question_id: int
     answer: AnswerKey
 
+class GameIn(BaseModel):
+    answers: List[GameAnswer]
+    pool_version: Optional[int] = None  # question_id'lerin ait olduğu havuz (yoksa güncel)
+
 
 class StartOut(BaseModel):
     session_id: str
     question_index: int
     question: str
     choices: List[str]
+    token: Optional[str] = None
+    question_id: Optional[int] = None
+    pool_version: Optional[int] = None
 
 class NextOut(BaseModel):
     done: bool
@@ -66,6 +166,8 @@ class NextOut(BaseModel):
     choices: Optional[List[str]] = None
     prediction: Optional[str] = None
     confidences: Optional[Dict[str, float]] = None
+    token: Optional[str] = None
+    question_id: Optional[int] = None
 
 # --- Parametreler ---
 CONFIDENCE_THRESHOLD = 0.75
@@ -74,238 +176,226 @@ MIN_QUESTIONS = 3  # Minimum soru sayısı
 UNCERTAINTY_THRESHOLD = 0.3  # Bu değerin altında belirsiz sayılır (30%)
 
 # --- SORU HAVUZU ---
+# Sorular QUESTION_POOL_PATH (questions.json) dosyasından yüklenir ve derlenir.
 # Her soru:
 #   q: soru metni
 #   w: {class: weight} -> puan katkısı
 #   category: birincil kategori (başlangıç seçimi için)
 #   tags: ek özellikler
-QUESTION_POOL: List[Dict] = [
-    # Proje-Yarışma soruları (Veri Bilimi, AI, ML odaklı)
-    {
-        "q": "Veri analizi ve makine öğrenmesi projelerinde çalışmak ilgimi çeker.",
-        "w": {"Proje-Yarışma": 1.6, "Eğitim": 0.4},
-        "category": "Proje-Yarışma",
-        "tags": ["veri_bilimi", "makine_öğrenmesi"]
-    },
-    {
-        "q": "Yapay zeka ve derin öğrenme konularına merak duyarım.",
-        "w": {"Proje-Yarışma": 1.5, "Eğitim": 0.5},
-        "category": "Proje-Yarışma",
-        "tags": ["yapay_zeka", "derin_öğrenme"]
-    },
-    {
-        "q": "Veri setleriyle çalışmak ve anlamlı sonuçlar çıkarmak hoşuma gider.",
-        "w": {"Proje-Yarışma": 1.4, "Eğitim": 0.6},
-        "category": "Proje-Yarışma",
-        "tags": ["veri_analizi", "istatistik"]
-    },
-    {
-        "q": "Algoritma geliştirme ve model eğitimi konularında kendimi geliştirmek isterim.",
-        "w": {"Proje-Yarışma": 1.7, "Eğitim": 0.3},
-        "category": "Proje-Yarışma",
-        "tags": ["algoritma", "model_eğitimi"]
-    },
-    {
-        "q": "Kaggle yarışmaları ve veri bilimi projeleri ilgimi çeker.",
-        "w": {"Proje-Yarışma": 1.8, "Network": 0.2},
-        "category": "Proje-Yarışma",
-        "tags": ["kaggle", "yarışma"]
-    },
-
-    # Eğitim soruları
-    {
-        "q": "Bilgimi başkalarıyla paylaşmak ve öğretmek hoşuma gider.",
-        "w": {"Eğitim": 1.7, "Network": 0.3},
-        "category": "Eğitim",
-        "tags": ["öğretme", "paylaşım"]
-    },
-    {
-        "q": "Workshop ve eğitim etkinlikleri düzenlemek isterim.",
-        "w": {"Eğitim": 1.6, "Organizasyon": 0.4},
-        "category": "Eğitim",
-        "tags": ["workshop", "etkinlik"]
-    },
-    {
-        "q": "Sunum yapmak ve topluluk önünde konuşmak beni heyecanlandırır.",
-        "w": {"Eğitim": 1.4, "Medya": 0.3, "Network": 0.3},
-        "category": "Eğitim",
-        "tags": ["sunum", "konuşma"]
-    },
-    {
-        "q": "Eğitim materyalleri hazırlamak ve kurs içerikleri geliştirmek ilgimi çeker.",
-        "w": {"Eğitim": 1.5, "Proje-Yarışma": 0.5},
-        "category": "Eğitim",
-        "tags": ["materyal", "içerik"]
-    },
-
-    # Organizasyon soruları
-    {
-        "q": "Etkinlik planlaması ve organizasyon işleri beni motive eder.",
-        "w": {"Organizasyon": 1.8, "Network": 0.2},
-        "category": "Organizasyon",
-        "tags": ["planlama", "organizasyon"]
-    },
-    {
-        "q": "Detay odaklı çalışmak ve süreçleri yönetmek hoşuma gider.",
-        "w": {"Organizasyon": 1.5, "Proje-Yarışma": 0.5},
-        "category": "Organizasyon",
-        "tags": ["detay", "süreç"]
-    },
-    {
-        "q": "Stresli durumları yönetmek ve soğukkanlı kalmak güçlü yanlarımdan.",
-        "w": {"Organizasyon": 1.4, "Proje-Yarışma": 0.6},
-        "category": "Organizasyon",
-        "tags": ["stres", "soğukkanlılık"]
-    },
-    {
-        "q": "Liderlik yapmak ve takımları koordine etmek isterim.",
-        "w": {"Organizasyon": 1.3, "Network": 0.7},
-        "category": "Organizasyon",
-        "tags": ["liderlik", "koordinasyon"]
-    },
-
-    # Network soruları
-    {
-        "q": "Yeni insanlarla tanışmak ve ağ kurmak beni mutlu eder.",
-        "w": {"Network": 1.6, "Medya": 0.4},
-        "category": "Network",
-        "tags": ["tanışma", "ağ"]
-    },
-    {
-        "q": "İş birliği ve ortaklık fırsatları aramak ilgimi çeker.",
-        "w": {"Network": 1.7, "Organizasyon": 0.3},
-        "category": "Network",
-        "tags": ["işbirliği", "ortaklık"]
-    },
-    {
-        "q": "Topluluk etkinliklerinde aktif rol almak isterim.",
-        "w": {"Network": 1.4, "Eğitim": 0.6},
-        "category": "Network",
-        "tags": ["topluluk", "aktif_rol"]
-    },
-    {
-        "q": "Dış ilişkiler ve sponsorluk konularında çalışmak hoşuma gider.",
-        "w": {"Network": 1.5, "Organizasyon": 0.5},
-        "category": "Network",
-        "tags": ["dış_ilişkiler", "sponsorluk"]
-    },
-
-    # Medya soruları
-    {
-        "q": "Görsel tasarım ve video içerik üretimi ilgi alanım.",
-        "w": {"Medya": 1.8, "Network": 0.3},
-        "category": "Medya",
-        "tags": ["tasarım", "video"]
-    },
-    {
-        "q": "Sosyal medya platformlarında içerik üretmek ve paylaşmak severim.",
-        "w": {"Medya": 1.6, "Network": 0.4},
-        "category": "Medya",
-        "tags": ["sosyal_medya", "içerik"]
-    },
-    {
-        "q": "Fotoğrafçılık ve görsel hikaye anlatımı ilgimi çeker.",
-        "w": {"Medya": 1.5, "Eğitim": 0.5},
-        "category": "Medya",
-        "tags": ["fotoğraf", "hikaye"]
-    },
-    {
-        "q": "Kreatif yazarlık ve metin içerikleri hazırlamak hoşuma gider.",
-        "w": {"Medya": 1.4, "Eğitim": 0.6},
-        "category": "Medya",
-        "tags": ["yazarlık", "metin"]
-    },
-    {
-        "q": "Kamera karşısında rahatım ve röportaj yapabilirim.",
-        "w": {"Medya": 1.3, "Network": 0.7},
-        "category": "Medya",
-        "tags": ["kamera", "röportaj"]
-    }
-]
+# Dosya değişince yeni sürüm yüklenir; oturumlar başladıkları sürümle devam eder.
+POOLS = PoolRegistry(QUESTION_POOL_PATH, CLASSES)
+# Derlenmiş soru ağacı kullanılsın mı. Varsayılan kapalı: ağaç oyunu kısaltıyor ama
+# doğruluğu düşürüyor (simülasyonda %59.8 -> %52.7) ve ilk sorudan sonra alan
+# dengeleme / global ağırlıkları atlıyor; durma kuralı rastgele yolun doğruluğuna
+# ulaşana kadar QUESTION_TREE_ENABLED=1 ile isteğe bağlı
+QUESTION_TREE_ENABLED = os.getenv("QUESTION_TREE_ENABLED", "0") == "1"
 
 # --- Oturum durumu ---
-SESSIONS: Dict[str, Dict] = {}
+class GameSession:
+    """Tek oyunun durumu: sınıf indeksli diziler ve sorulan sorular bit maskesi"""
+
+    __slots__ = ("i", "scores", "area_counts", "asked_mask", "asked_order", "answers",
+                 "current_question_idx", "positive_answers", "global_weights", "tree_node",
+                 "pool")
+
+    def __init__(self, global_weights: Tuple[float, ...], pool: CompiledPool):
+        self.i = 0  # kaç soru cevaplandı
+        # Öğrenilmiş model varsa skorlar log-posterior'dur ve sınıf önseliyle başlar
+        self.scores = array("d", pool.model.prior if pool.model is not None
+                            else [0.0] * len(CLASSES))
+        self.area_counts = bytearray(len(CLASSES))
+        self.asked_mask = 0  # havuz indeksleri üzerinde bit maskesi
+        self.asked_order = bytearray()  # sorulma sırası (kayıt için)
+        self.answers = bytearray()  # cevaplanan soruların Likert değeri + 2, aynı sırayla
+        self.current_question_idx = -1
+        self.positive_answers = 0  # Evet/Kesinlikle evet sayısı
+        self.global_weights = global_weights  # paylaşılan snapshot, kopya değil
+        self.tree_node = 0  # soru ağacındaki konum (cevap kovalarıyla ilerler)
+        self.pool = pool  # oyunun başladığı havuz sürümü (oyun boyunca sabit)
+
+    @property
+    def asked_questions(self) -> List[int]:
+        return list(self.asked_order)
+
+    def summary(self) -> Dict:
+        """Kayıt için isim anahtarlı özet"""
+        return {
+            "positive_answers": self.positive_answers,
+            "area_counts": {c: self.area_counts[i] for i, c in enumerate(CLASSES)},
+            "answers": [v - 2 for v in self.answers],
+            "pool_version": self.pool.version,
+        }
+
+    def to_bytes(self) -> bytes:
+        """Paylaşılan oturum deposu için ikili gösterim"""
+        return _SESSION_STRUCT.pack(
+            self.i, self.current_question_idx, self.positive_answers, self.tree_node,
+            self.pool.version, *self.scores, *self.area_counts, *self.global_weights,
+        ) + self.asked_order + self.answers
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "GameSession":
+        """Sürümü bu süreçte bulunamayan havuza bağlıysa UnknownPoolVersion"""
+        fields = _SESSION_STRUCT.unpack_from(data)
+        n = len(CLASSES)
+        session = cls(fields[5 + 2 * n:], POOLS.get(fields[4]))
+        (session.i, session.current_question_idx, session.positive_answers,
+         session.tree_node) = fields[:4]
+        session.scores = array("d", fields[5:5 + n])
+        session.area_counts = bytearray(fields[5 + n:5 + 2 * n])
+        # Sondaki i bayt cevaplar, öncesi sorulan sorular
+        tail = data[_SESSION_STRUCT.size:]
+        session.asked_order = bytearray(tail[:len(tail) - session.i])
+        session.answers = bytearray(tail[len(tail) - session.i:])
+        for idx in session.asked_order:
+            session.asked_mask |= 1 << idx
+        return session
+
+# i, mevcut soru, pozitif cevap, ağaç düğümü, havuz sürümü, skorlar, alan sayaçları,
+# global ağırlıklar; ardından sorulan sorular ve i adet cevap
+_SESSION_STRUCT = struct.Struct(f"<BhBHI{len(CLASSES)}d{len(CLASSES)}B{len(CLASSES)}d")
+
+# Son görülen global ağırlık sözlüğü ve sınıf indeksli karşılığı; önbellekten
+# aynı sözlük döndükçe tüm oturumlar aynı tuple'ı paylaşır
+_weights_snapshot: Tuple[Optional[Dict[str, float]], Tuple[float, ...]] = (None, ())
+
+def weights_vector(global_weights: Dict[str, float]) -> Tuple[float, ...]:
+    global _weights_snapshot
+    if _weights_snapshot[0] is not global_weights:
+        _weights_snapshot = (global_weights, tuple(global_weights.get(c, 1.0) for c in CLASSES))
+    return _weights_snapshot[1]
+
+# Boşta kalan ve biten oyunlar otomatik silinir, toplam sayı sınırlıdır.
+# SESSION_BACKEND=sqlite ile aynı makinedeki tüm worker'lar tabloyu paylaşır.
+SESSIONS = create_session_store(dumps=GameSession.to_bytes, loads=GameSession.from_bytes)
+REGISTRY.gauge("akinator_live_sessions", "Sessions currently held by this process",
+               lambda: SESSIONS.stats()["live"])
+REGISTRY.gauge("akinator_result_queue_depth", "Game results waiting to be written",
+               lambda: firebase_service.result_writer.stats()["queued"])
+
+# Durumsuz mod: oyun durumu istemcide, HMAC imzalı token olarak taşınır
+TOKENS = create_token_codec()
+
+def issue_session_token(nonce: bytes, session: GameSession) -> str:
+    return TOKENS.issue(nonce, session.i, session.to_bytes())
+
+def open_session_token(token: str) -> tuple[bytes, GameSession]:
+    """Token'ı doğrula; sahte, süresi geçmiş veya tekrar kullanılmışsa TokenError.
+    Token burada harcanmaz, adım uygulandıktan sonra consume_session_token ile harcanır"""
+    nonce, step, payload = TOKENS.open(token)
+    session = GameSession.from_bytes(payload)
+    if session.i != step:
+        raise TokenError("token step mismatch")
+    return nonce, session
+
+def consume_session_token(claim: tuple[bytes, int]):
+    """Açılan token'ı harca; aynı token'la başka bir istek önce bitirdiyse 401"""
+    try:
+        TOKENS.consume(*claim)
+    except TokenError as e:
+        raise HTTPException(401, str(e))
 
 # --- AKILLI SORU SEÇİMİ ALGORİTMALARI ---
 
-def get_random_starting_question() -> tuple[int, Dict]:
+def get_random_starting_question(pool: CompiledPool) -> tuple[int, Dict]:
     """Random başlangıç sorusu seç"""
-    idx = random.randint(0, len(QUESTION_POOL) - 1)
-    return idx, QUESTION_POOL[idx]
-
-def get_weighted_starting_question(global_weights: Dict[str, float]) -> tuple[int, Dict]:
+    idx = random.randrange(len(pool))
+    return idx, pool.questions[idx]
+
+def _pick_in_category(pool: CompiledPool, category: int, asked_mask: int, available: int) -> int:
+    """Kategorinin sorulmamış 'available' sorusundan birini eşit olasılıkla seç"""
+    k = random.randrange(available)
+    for idx in pool.category_questions[category]:
+        if not asked_mask >> idx & 1:
+            if k == 0:
+                return idx
+            k -= 1
+    raise AssertionError("category mask and question index disagree")
+
+def get_weighted_starting_question(global_weights: Dict[str, float],
+                                   pool: CompiledPool) -> tuple[int, Dict]:
     """Ağırlıklı başlangıç sorusu seç - az çıkan alanlara öncelik ver"""
-    # Her soruya ağırlık hesapla
-    weights = []
-    for i, question in enumerate(QUESTION_POOL):
-        category = question["category"]
-        weight = global_weights.get(category, 1.0)
-        weights.append(weight)
-
-    # Ağırlıklı rastgele seçim
-    selected_idx = random.choices(range(len(QUESTION_POOL)), weights=weights, k=1)[0]
-    return selected_idx, QUESTION_POOL[selected_idx]
+    # Soru ağırlığı kategorisinin global ağırlığı; alias tablosu ağırlıklar
+    # değişene kadar önbellekte, çekim O(1)
+    selected_idx = pool.sampler.start(weights_vector(global_weights))
+    return selected_idx, pool.questions[selected_idx]
 
-def get_next_question(session_state: Dict) -> Optional[tuple[int, Dict]]:
+def get_next_question(session: GameSession) -> Optional[tuple[int, Dict]]:
     """Akıllı soru seçimi - global ağırlıklar + çeşitliliği koruyarak"""
-    asked_questions = set(session_state.get("asked_questions", []))
-    area_counts = session_state.get("area_counts", {area: 0 for area in CLASSES})
-    global_weights = session_state.get("global_area_weights", {area: 1.0 for area in CLASSES})
-
-    # Henüz sorulmamış soruları filtrele
-    available_questions = [
-        (i, q) for i, q in enumerate(QUESTION_POOL)
-        if i not in asked_questions
-    ]
-
-    if not available_questions:
-        return None
-
-    # En az sorulan alanı bul
-    min_area = min(area_counts, key=area_counts.get)
-    min_count = area_counts[min_area]
-
-    # Ağırlıklı seçim: az sorulan alanlara + global ağırlıklar
+    pool = session.pool
+    area_counts = session.area_counts
+
+    # En az sorulan alan(lar) 3x; alias tablosundan ret örneklemesi ile seçilir
+    min_count = min(area_counts)
+    boosted = 0
+    for ci, count in enumerate(area_counts):
+        if count == min_count:
+            boosted |= 1 << ci
+    selected_idx = pool.sampler.next(session.global_weights, session.asked_mask, boosted,
+                                     boost=3.0)
+    if selected_idx is None:
+        # Havuzun çoğu sorulmuş: kategori sayımlarıyla doğrusal seçim
+        return _get_next_question_linear(session)
+    return selected_idx, pool.questions[selected_idx]
+
+def _get_next_question_linear(session: GameSession) -> Optional[tuple[int, Dict]]:
+    """get_next_question ile aynı dağılım; kategori başına sorulmamış soru sayımıyla"""
+    pool = session.pool
+    asked_mask = session.asked_mask
+    area_counts = session.area_counts
+    global_weights = session.global_weights
+
+    # En az sorulan alan(lar)ın sayısı
+    min_count = min(area_counts)
+
+    # Kategori başına sorulmamış soru sayısı ve ağırlığı: az sorulan alanlara + global ağırlıklar
+    available = []
     weights = []
-    for i, q in available_questions:
-        category = q["category"]
-        count = area_counts[category]
-
+    for ci, mask in enumerate(pool.category_masks):
+        count = (mask & ~asked_mask).bit_count()
         # Temel ağırlık: en az sorulan alana 3x, diğerlerine 1x
-        base_weight = 3.0 if count == min_count else 1.0
+        base_weight = 3.0 if area_counts[ci] == min_count else 1.0
+        available.append(count)
+        weights.append(count * base_weight * global_weights[ci])
 
-        # Global ağırlığı ekle
-        global_weight = global_weights.get(category, 1.0)
+    if not any(available):
+        return None
 
-        # Final ağırlık
-        final_weight = base_weight * global_weight
-        weights.append(final_weight)
+    # Ağırlıklı rastgele seçim (soru başına ağırlıklı seçimle aynı dağılım)
+    category = random.choices(range(len(weights)), weights=weights, k=1)[0]
+    selected_idx = _pick_in_category(pool, category, asked_mask, available[category])
+    return selected_idx, pool.questions[selected_idx]
+
+# Ağaçtan çıkmış oturumlar (ağaç sorusu kullanılamadı) bu düğümde kalır
+OFF_TREE = 0xFFFF
+
+def select_next_question(session: GameSession, val: int) -> Optional[tuple[int, Dict]]:
+    """Cevap kovasına göre ağaçtan O(1) soru; ağaç yoksa akıllı seçim"""
+    tree = session.pool.tree
+    if tree is not None and QUESTION_TREE_ENABLED and session.tree_node != OFF_TREE:
+        node = child_node(session.tree_node, BUCKETS.index(bucket_of(val)))
+        q = tree.next_question(session.asked_order[0], node)
+        if q != NO_QUESTION and not session.asked_mask >> q & 1:
+            session.tree_node = node
+            return q, session.pool.questions[q]
+        session.tree_node = OFF_TREE
+    return get_next_question(session)
+
+def update_session_stats(session: GameSession, question_idx: int):
+    """Oturum istatistiklerini güncelle"""
+    session.asked_mask |= 1 << question_idx
+    session.asked_order.append(question_idx)
+    session.area_counts[session.pool.category[question_idx]] += 1
 
-    # Ağırlıklı rastgele seçim
-    selected_idx = random.choices(range(len(available_questions)), weights=weights, k=1)[0]
-    return available_questions[selected_idx]
+def softmax(scores: Sequence[float]) -> List[float]:
+    mx = max(scores) if scores else 0.0
+    exps = [math.exp(v - mx) for v in scores]
+    s = sum(exps) or 1.0
+    return [e / s for e in exps]
 
-def update_session_stats(session_state: Dict, question_idx: int, question: Dict):
-    """Oturum istatistiklerini güncelle"""
-    if "asked_questions" not in session_state:
-        session_state["asked_questions"] = []
-    if "area_counts" not in session_state:
-        session_state["area_counts"] = {area: 0 for area in CLASSES}
-    if "positive_answers" not in session_state:
-        session_state["positive_answers"] = 0  # Evet/Kesinlikle evet sayısı
-
-    session_state["asked_questions"].append(question_idx)
-    session_state["area_counts"][question["category"]] += 1
-
-def softmax(scores: Dict[str, float]) -> Dict[str, float]:
-    mx = max(scores.values()) if scores else 0.0
-    exps = {k: math.exp(v - mx) for k, v in scores.items()}
-    s = sum(exps.values()) or 1.0
-    return {k: exps[k] / s for k in scores.keys()}
-
-def should_finish(scores: Dict[str, float], asked: int) -> bool:
-    probs = softmax(scores)
-    top = max(probs.values())
+def should_finish(probs: Sequence[float], asked: int) -> bool:
+    """probs: softmax(scores), cevap başına bir kez hesaplanan posterior"""
+    top = max(probs)
 
     # Minimum soru sayısına ulaşmadıysa devam et
     if asked < MIN_QUESTIONS:
@@ -321,13 +411,12 @@ def should_finish(scores: Dict[str, float], asked: int) -> bool:
 
     return False
 
-def is_uncertain_result(scores: Dict[str, float], session_state: Dict) -> bool:
+def is_uncertain_result(probs: Sequence[float], session: GameSession) -> bool:
     """Sonuç belirsiz mi kontrol et"""
-    probs = softmax(scores)
-    top = max(probs.values())
+    top = max(probs)
 
     # Hiç pozitif cevap verilmediyse belirsiz
-    if session_state.get("positive_answers", 0) == 0:
+    if session.positive_answers == 0:
         return True
 
     # Eğer en yüksek skor çok düşükse belirsiz
@@ -335,9 +424,9 @@ def is_uncertain_result(scores: Dict[str, float], session_state: Dict) -> bool:
         return True
 
     # Eğer tüm skorlar çok yakınsa (belirsiz durum)
-    score_values = list(probs.values())
-    max_score = max(score_values)
-    second_max = sorted(score_values, reverse=True)[1]
+    score_values = sorted(probs, reverse=True)
+    max_score = score_values[0]
+    second_max = score_values[1]
 
     # En yüksek ile ikinci en yüksek arasındaki fark çok azsa belirsiz
     if max_score - second_max < 0.05:  # %5 fark
@@ -345,125 +434,359 @@ def is_uncertain_result(scores: Dict[str, float], session_state: Dict) -> bool:
 
     return False
 
+# --- TOPLU PUANLAMA (offline tekrar oynatma / simülasyon) ---
+# Tek oturumda 5 elemanlı vektör için NumPy çağrı maliyeti hesaptan büyük;
+# istek yolu derlenmiş satırları (pool.weights) kullanır, toplu yol matrisi.
+# pool verilmezse güncel havuz kullanılır.
+
+def score_answers_batch(scores: np.ndarray, question_idx: np.ndarray,
+                        values: np.ndarray, pool: Optional[CompiledPool] = None) -> np.ndarray:
+    """N oturumun birer cevabını tek işlemde uygula: scores (N, C) += W[q] * v"""
+    scores += (pool or POOLS.current).weight_matrix[question_idx] * values[:, None]
+    return scores
+
+def score_answer_matrix(answers: np.ndarray, pool: Optional[CompiledPool] = None) -> np.ndarray:
+    """Tam oyunları puanla: answers (N, Q) Likert değerleri (sorulmayan = 0) -> (N, C)"""
+    return answers @ (pool or POOLS.current).weight_matrix
+
+def softmax_batch(scores: np.ndarray) -> np.ndarray:
+    exps = np.exp(scores - scores.max(axis=1, keepdims=True))
+    return exps / exps.sum(axis=1, keepdims=True)
+
+def should_finish_batch(probs: np.ndarray, asked: np.ndarray) -> np.ndarray:
+    """should_finish ile aynı kural, satır başına"""
+    top = probs.max(axis=1)
+    return (asked >= MIN_QUESTIONS) & ((top >= CONFIDENCE_THRESHOLD) | (asked >= MAX_QUESTIONS))
+
+def is_uncertain_batch(probs: np.ndarray, positive_answers: np.ndarray) -> np.ndarray:
+    """is_uncertain_result ile aynı kural, satır başına"""
+    top2 = -np.partition(-probs, 1, axis=1)[:, :2]
+    return ((positive_answers == 0) | (top2[:, 0] < UNCERTAINTY_THRESHOLD)
+            | (top2[:, 0] - top2[:, 1] < 0.05))
+
 @app.get("/")
 async def root():
     return {
         "message": "YTU Akinator Backend is running!",
-        "status": "healthy"
+        # Kalıcılık yoksa da oyunlar sunulur; durum bilgi amaçlıdır
+        "status": "healthy" if firebase_service.persistence_status == "ok" else "degraded",
+        "persistence": firebase_service.persistence_stats(),
+        "import_ms": round(IMPORT_SECONDS * 1e3, 1),
+        "weights_cache": firebase_service.weights_cache_stats(),
+        "result_writer": firebase_service.result_writer.stats(),
+        "sessions": SESSIONS.stats(),
+        "websocket_games": _ws_games,
+        "session_tokens": TOKENS.stats(),
+        "question_pool": POOLS.stats(),
     }
 
-@app.get("/start", response_model=StartOut)
-async def start():
-    sid = str(uuid4())
+# /stats cevap dağılımları için Likert değeri -> cevap anahtarı
+ANSWER_LABELS = {v: k for k, v in LIKERT.items()}
 
-    # Global ağırlıkları al
+def parse_window(window: str, max_hours: float) -> Optional[float]:
+    """"24h", "7d" veya "all" -> saat (all: None); en fazla max_hours (saklama süresi)"""
+    if window == "all":
+        return None
+    try:
+        amount = float(window[:-1])
+    except ValueError:
+        amount = 0
+    unit = {"h": 1, "d": 24}.get(window[-1:])
+    # float() "inf", "nan" ve 1e308 gibi değerleri de kabul eder
+    if unit is None or not math.isfinite(amount) or amount <= 0:
+        raise HTTPException(400, "window must look like 24h, 7d or all")
+    if amount * unit > max_hours:
+        raise HTTPException(400, f"window must be at most {max_hours:g}h (stats retention)")
+    return amount * unit
+
+@app.get("/stats")
+async def stats(window: str = "24h"):
+    """Biten oyunların bellekteki özetleri: sınıf sayıları, Belirsiz oranı,
+    oyun başına soru dağılımı ve tahmine göre soru başına cevap dağılımı"""
+    rollup = firebase_service.stats_rollup
+    max_hours = max(rollup.hourly_retention, rollup.daily_retention * 24)
+    result = rollup.query(parse_window(window, max_hours), answer_labels=ANSWER_LABELS)
+    result["window"] = window
+    return result
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus metin formatında metrikler"""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+async def _new_game() -> GameSession:
+    """Güncel havuzda yeni oyun aç ve ilk soruyu seç (HTTP ve WebSocket ortak)"""
+    # Global ağırlıkları önbellekten al (Firestore'u beklemez)
     try:
-        global_weights = await firebase_service.calculate_balanced_area_weights()
+        global_weights = await firebase_service.get_cached_area_weights()
     except:
         global_weights = {area: 1.0 for area in CLASSES}
 
+    # Oyun güncel havuz sürümüne bağlanır
+    pool = POOLS.current
+
     # Ağırlıklı başlangıç sorusu seç
-    question_idx, question = get_weighted_starting_question(global_weights)
-
-    SESSIONS[sid] = {
-        "i": 0,  # kaç soru soruldu
-        "scores": {c: 0.0 for c in CLASSES},
-        "asked_questions": [],
-        "area_counts": {area: 0 for area in CLASSES},
-        "current_question_idx": question_idx,
-        "positive_answers": 0,
-        "global_area_weights": global_weights  # Global ağırlıkları kaydet
-    }
+    question_idx, _ = get_weighted_starting_question(global_weights, pool)
+
+    # Global ağırlıklar kopyalanmaz, paylaşılan snapshot referansı tutulur
+    st = GameSession(weights_vector(global_weights), pool)
+    st.current_question_idx = question_idx
 
     # İlk soruyu istatistiklere ekle
-    update_session_stats(SESSIONS[sid], question_idx, question)
+    update_session_stats(st, question_idx)
+    return st
 
+def _start_out(sid: str, st: GameSession, token: Optional[str]):
+    """İlk soru yanıtı; RESPONSE_VALIDATION kapalıysa hazır baytlarla (StartOut ile aynı JSON)"""
+    if not RESPONSE_VALIDATION:
+        return question_responses(st.pool).start(sid, st.current_question_idx, token)
     return StartOut(
         session_id=sid,
         question_index=0,
-        question=question["q"],
+        question=st.pool.texts[st.current_question_idx],
         choices=list(LIKERT.keys()),
+        token=token,
+        question_id=st.current_question_idx,
+        pool_version=st.pool.version,
     )
 
-@app.post("/answer", response_model=NextOut)
-async def answer(body: AnswerIn):
-    print(f"🎮 ANSWER: {body.answer} for session {body.session_id}")
+@app.get("/start", response_model=StartOut)
+async def start():
+    token_mode = SESSION_MODE == "token"
+    nonce = new_nonce() if token_mode else None
+    sid = nonce.hex() if token_mode else str(uuid4())
+
+    st = await _new_game()
+    token = issue_session_token(nonce, st) if token_mode else _save_session(sid, st, None)
+    return _start_out(sid, st, token)
+
+def _load_session(session_id: Optional[str], token: Optional[str]):
+    """(sid, oturum, claim) döndür; token geldiyse durum token'dan açılır.
+
+    claim token modunda (nonce, açılan adım), sunucu modunda None; token
+    _save_session / _finish içinde, adım uygulandıktan sonra harcanır.
+    """
+    if token is not None:
+        try:
+            nonce, st = open_session_token(token)
+        except TokenError as e:
+            raise HTTPException(401, str(e))
+        except UnknownPoolVersion as e:
+            raise HTTPException(409, str(e))
+        return nonce.hex(), st, (nonce, st.i)
 
-    if body.session_id not in SESSIONS:
+    try:
+        st = SESSIONS.get(session_id) if session_id is not None else None
+    except UnknownPoolVersion as e:
+        # Oyunun başladığı havuz sürümü emekliye ayrılmış (veya başka worker'da yeni)
+        raise HTTPException(409, str(e))
+    except SessionFinished:
+        # Bitmiş oyuna gelen cevap oyunu tekrar bitirmesin (ikinci sonuç yazılmaz)
+        raise HTTPException(410, "game is already finished")
+    if st is None:
         raise HTTPException(404, "session not found")
-    if body.answer not in LIKERT:
-        raise HTTPException(400, "invalid answer")
-
-    st = SESSIONS[body.session_id]
-    print(f"📊 BEFORE: Asked={st['i']}, should_finish={should_finish(st['scores'], st['i'])}")
-
+    return session_id, st, None
+
+def _save_session(sid: str, st: GameSession,
+                  claim: Optional[tuple[bytes, int]]) -> Optional[str]:
+    """Durumu sunucuya yaz ya da (token modunda) gelen token'ı harcayıp yenisini üret"""
+    if claim is not None:
+        consume_session_token(claim)
+        return issue_session_token(claim[0], st)
+    SESSIONS.put(sid, st)
+    return None
+
+def step_game(st: GameSession, answer_key: str, advance: bool = True) -> Optional[List[float]]:
+    """Mevcut soruya cevabı uygula ve sonraki soruya geç.
+
+    Oyun bitmesi gerekiyorsa posterior'u döndürür (sonraki soru seçilmez).
+    Sıralı, toplu ve tek seferlik değerlendirme aynı kuralı bu fonksiyonla uygular;
+    advance=False ise sonraki soruyu çağıran belirler.
+    """
     # Mevcut sorunun skorunu güncelle
-    current_q_idx = st["current_question_idx"]
-    current_question = QUESTION_POOL[current_q_idx]
-
-    val = LIKERT[body.answer]
+    val = LIKERT[answer_key]
 
     # Pozitif cevap sayacını güncelle
-    if body.answer in ["evet", "kesinlikle_evet"]:
-        st["positive_answers"] = st.get("positive_answers", 0) + 1
-
-    for c in CLASSES:
-        st["scores"][c] += current_question.get("w", {}).get(c, 0.0) * val
+    if answer_key in ["evet", "kesinlikle_evet"]:
+        st.positive_answers += 1
+
+    scores = st.scores
+    model = st.pool.model
+    if model is not None:
+        # Bayes güncellemesi: log P(cevap | soru, sınıf) eklenir, softmax posterior'u verir
+        for ci, ll in enumerate(model.rows[st.current_question_idx][2 - val]):
+            scores[ci] += ll
+    else:
+        for ci, w in enumerate(st.pool.weights[st.current_question_idx]):
+            scores[ci] += w * val
+    st.answers.append(val + 2)
 
     # Sayaç
-    st["i"] += 1
+    st.i += 1
+
+    # Posterior cevap başına bir kez hesaplanır, bitirme ve sonuç aynı değeri kullanır
+    probs = softmax(st.scores)
 
     # Bitirme kriteri?
-    print(f"📊 AFTER: Asked={st['i']}, should_finish={should_finish(st['scores'], st['i'])}")
-    if should_finish(st["scores"], st["i"]):
-        print("🏁 GAME FINISHING!")
-        return await _finish(st)
+    finishing = should_finish(probs, st.i)
+    if finishing:
+        log_sampled(logger, logging.DEBUG, "🏁 Game finishing after %d questions", st.i)
+        return probs
+    if not advance:
+        return None
 
-    # Sonraki soruyu akıllı seçim ile bul
-    next_question_result = get_next_question(st)
+    # Sonraki soruyu ağaçtan ya da akıllı seçim ile bul
+    started = time.perf_counter()
+    next_question_result = select_next_question(st, val)
+    QUESTION_SELECT_SECONDS.observe(time.perf_counter() - started)
     if not next_question_result:
-        return await _finish(st)
-
-    next_q_idx, next_question = next_question_result
+        return probs
 
     # Sonraki soruyu kaydet ve istatistikleri güncelle
-    st["current_question_idx"] = next_q_idx
-    update_session_stats(st, next_q_idx, next_question)
-
+    next_q_idx, _ = next_question_result
+    st.current_question_idx = next_q_idx
+    update_session_stats(st, next_q_idx)
+    return None
+
+@lru_cache(maxsize=8)
+def question_responses(pool: CompiledPool) -> QuestionResponses:
+    """Havuz sürümünün önceden kodlanmış soru yanıtları (ilk kullanımda bir kez)"""
+    return QuestionResponses(pool.texts, LIKERT.keys(), pool.version)
+
+# Açılıştaki havuzun yanıtları import sırasında kodlanır
+question_responses(POOLS.current)
+
+def _question_out(st: GameSession, token: Optional[str]):
+    """Sonraki soru yanıtı; RESPONSE_VALIDATION kapalıysa hazır baytlarla (NextOut ile aynı JSON)"""
+    if not RESPONSE_VALIDATION:
+        return question_responses(st.pool).next_question(st.current_question_idx, st.i, token)
     return NextOut(
         done=False,
-        question_index=st["i"],
-        question=next_question["q"],
+        question_index=st.i,
+        question=st.pool.texts[st.current_question_idx],
         choices=list(LIKERT.keys()),
+        question_id=st.current_question_idx,
+        token=token,
     )
 
-async def _finish(st: Dict) -> NextOut:
-    print("🎯 Game finished! Processing results...")
+@app.post("/answer", response_model=NextOut)
+async def answer(body: AnswerIn):
+    log_sampled(logger, logging.DEBUG, "🎮 ANSWER: %s for session %s", body.answer, body.session_id)
+
+    sid, st, claim = _load_session(body.session_id, body.token)
+    if body.answer not in LIKERT:
+        raise HTTPException(400, "invalid answer")
+
+    posterior = step_game(st, body.answer)
+    if posterior is not None:
+        return await _finish(sid, st, posterior, claim=claim)
+
+    return _question_out(st, _save_session(sid, st, claim))
+
+@app.post("/answers", response_model=NextOut)
+async def answer_batch(body: AnswerBatchIn):
+    """Bir oturum için sıralı cevap listesini tek istekte uygula.
+
+    Cevaplar sunucunun soracağı sırayla uygulanır. question_id verilmiş bir cevap
+    o anki soruyla eşleşmezse orada durulur ve o anki soru döndürülür; oyun
+    biterse kalan cevaplar yok sayılır.
+    """
+    if not body.answers:
+        raise HTTPException(400, "no answers")
+    log_sampled(logger, logging.DEBUG, "🎮 ANSWERS: %d for session %s",
+                len(body.answers), body.session_id)
+
+    sid, st, claim = _load_session(body.session_id, body.token)
+    opened_at = st.i
+    for item in body.answers:
+        if item.question_id is not None and item.question_id != st.current_question_idx:
+            break
+        posterior = step_game(st, item.answer)
+        if posterior is not None:
+            return await _finish(sid, st, posterior, claim=claim)
+
+    if claim is not None and st.i == opened_at:
+        # Hiçbir cevap uygulanmadı: aynı adım için yeni token harcanmış olurdu,
+        # istemcinin token'ı geçerli kalır
+        return _question_out(st, body.token)
+    return _question_out(st, _save_session(sid, st, claim))
+
+@app.post("/evaluate", response_model=NextOut)
+async def evaluate_game(body: GameIn):
+    """Çevrimdışı toplanmış tam bir oyunu tek seferde değerlendir (oturum açılmaz).
+
+    Her cevap verilen soruya uygulanır; bitirme kuralı sıralı akışla aynıdır.
+    Oyun bittikten sonraki cevaplar yok sayılır. Sonuç kaydedilmez: oturumsuz
+    istekler alan penceresini, global ağırlıkları ve istatistikleri saptırmasın.
+    """
+    if not body.answers:
+        raise HTTPException(400, "no answers")
 
-    probs = softmax(st["scores"])
-    probs = {k: round(v, 4) for k, v in probs.items()}
+    try:
+        global_weights = await firebase_service.get_cached_area_weights()
+    except:
+        global_weights = {area: 1.0 for area in CLASSES}
+    if body.pool_version is None:
+        pool = POOLS.current
+    else:
+        try:
+            pool = POOLS.get(body.pool_version)
+        except UnknownPoolVersion as e:
+            raise HTTPException(409, str(e))
+    st = GameSession(weights_vector(global_weights), pool)
+
+    for item in body.answers:
+        q = item.question_id
+        if not 0 <= q < len(pool) or st.asked_mask >> q & 1:
+            raise HTTPException(400, f"invalid or repeated question {q}")
+        # Soruyu istemci belirler
+        st.current_question_idx = q
+        update_session_stats(st, q)
+        posterior = step_game(st, item.answer, advance=False)
+        if posterior is not None:
+            return await _finish(str(uuid4()), st, posterior, stateless=True, record=False)
+
+    raise HTTPException(400, f"game is not finished after {len(body.answers)} answers")
+
+async def _finish(sid: str, st: GameSession, posterior: List[float],
+                  stateless: bool = False, record: bool = True,
+                  claim: Optional[tuple[bytes, int]] = None) -> NextOut:
+    if claim is not None:
+        # Token modu: son token burada harcanır, sonuç belgesi nonce ile adlanır
+        consume_session_token(claim)
+    elif not stateless and not SESSIONS.finish(sid, st):
+        # Başka bir istek (veya worker) oyunu az önce bitirdi
+        raise HTTPException(410, "game is already finished")
+
+    probs = {c: round(p, 4) for c, p in zip(CLASSES, posterior)}
 
     # Belirsiz sonuç kontrolü (session state de gönder)
-    if is_uncertain_result(st["scores"], st):
+    if is_uncertain_result(posterior, st):
         predicted_class = "Belirsiz"
     else:
         predicted_class = max(probs, key=probs.get)
 
-    print(f"🎯 Final prediction: {predicted_class}")
+    if not record:
+        # Oynanmış oyun sayılmaz: metriklere ve game_results'a girmez
+        return NextOut(done=True, prediction=predicted_class, confidences=probs)
+
+    QUESTIONS_PER_GAME.observe(st.i)
+    GAME_RESULTS.inc(predicted_class)
+    log_sampled(logger, logging.DEBUG, "🎯 Final prediction: %s after %d questions",
+                predicted_class, st.i)
 
     # Oyun sonucunu Firebase'e kaydet
     try:
-        print("🎯 Attempting to save to Firebase...")
         await firebase_service.save_game_result(
             predicted_class=predicted_class,
-            asked_questions=st.get("asked_questions", []),
+            asked_questions=st.asked_questions,
             confidences=probs,
-            session_data=st
+            session_data=st.summary(),
+            # Başka replikada tekrar oynatılan son token aynı belgenin üzerine yazar
+            doc_id=claim[0].hex() if claim is not None else None
         )
     except Exception as e:
-        print(f"❌ Firebase save failed: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ Firebase save failed: %s", e)
         # Hata olsa da oyunu devam ettir
 
     return NextOut(
@@ -471,3 +794,138 @@ async def _finish(st: Dict) -> NextOut:
         prediction=predicted_class,
         confidences=probs
     )
+
+# --- WebSocket oyun modu ---
+# Bir oyunun tamamı tek bağlantıda oynanır: oturum durumu bağlantıya bağlıdır,
+# SESSIONS'a yazılmaz, istek başına HTTP ayrıştırma ve ara katmanlar atlanır.
+# Worker başına eşzamanlı oyun sınırı; aşılırsa bağlantı 1013 ile kapatılır
+WS_MAX_GAMES = int(os.getenv("WS_MAX_GAMES", "2000"))
+# Bu kadar saniye cevap gelmezse oyun bırakılır
+WS_IDLE_TIMEOUT = float(os.getenv("WS_IDLE_TIMEOUT", "60"))
+# Yanıtı bu sürede okumayan istemcinin bağlantısı bırakılır
+WS_SEND_TIMEOUT = float(os.getenv("WS_SEND_TIMEOUT", "10"))
+# Cevap mesajının en büyük boyutu (bayt). Bu kontrol çerçeve tamamen alındıktan
+# sonra yapılır; uvicorn çerçeveyi --ws-max-size'a kadar (varsayılan 16 MiB)
+# bellekte biriktirir. Procfile / railway.json bu yüzden --ws-max-size 4096 ile
+# başlatır: daha büyük çerçeveyi uvicorn okumadan 1009 ile kapatır. WS_MAX_MESSAGE
+# bu değerden küçük kalmalı
+WS_MAX_MESSAGE = int(os.getenv("WS_MAX_MESSAGE", "256"))
+
+# Sunucunun kapattığı bağlantılar: neden -> (kapanış kodu, açıklama)
+WS_CLOSE_CODES = {
+    "done": (1000, "game over"),
+    "idle": (1001, "idle timeout"),
+    "too_large": (1009, "message too large"),
+}
+
+_ws_games = 0
+
+def _ws_body(out) -> str:
+    """HTTP yanıtıyla aynı JSON (hazır bayt veya Pydantic modeli)"""
+    body = out.body if isinstance(out, RawJSONResponse) else model_json(out)
+    return body.decode()
+
+def _parse_ws_answer(data) -> Optional[Tuple[str, Optional[int]]]:
+    """{"answer": ..., "question_id": ...} mesajını (cevap, soru) olarak aç; geçersizse None"""
+    try:
+        message = json.loads(data)
+    except ValueError:
+        return None
+    if not isinstance(message, dict) or message.get("answer") not in LIKERT:
+        return None
+    question_id = message.get("question_id")
+    if question_id is not None and type(question_id) is not int:
+        return None
+    return message["answer"], question_id
+
+async def _ws_send(websocket: WebSocket, text: str) -> Optional[str]:
+    """Gönderim soket tamponu boşalana kadar bekler. Başarılıysa None; WS_SEND_TIMEOUT
+    aşılırsa "slow_client", istemci bağlantıyı kapatmışsa "disconnect"
+    """
+    try:
+        await asyncio.wait_for(websocket.send_text(text), WS_SEND_TIMEOUT)
+    except asyncio.TimeoutError:
+        return "slow_client"
+    except (WebSocketDisconnect, RuntimeError):
+        # Kopan bağlantıya gönderim (starlette: WebSocketDisconnect veya kapanmış durum)
+        return "disconnect"
+    return None
+
+@app.websocket("/play")
+async def play(websocket: WebSocket):
+    """Tek bağlantıda tam oyun.
+
+    Bağlanınca /start yanıtı gelir; istemci her soruya {"answer": ..., "question_id": ...}
+    gönderir (question_id isteğe bağlı, verilirse o anki soruyla eşleşmeli), sunucu
+    /answer ile aynı JSON'u döndürür. Oyun bitince sonuç gönderilir ve bağlantı
+    kapanır. Geçersiz mesaja {"error": ...} döner, oyun sürer.
+
+    Mesajlar sırayla işlenir: sunucu bir cevabı yanıtlamadan sonrakini okumaz,
+    okunmayan mesajlar sunucunun sınırlı alma kuyruğunda kalır, kuyruk dolunca
+    soket okunmaz olur (TCP geri basıncı).
+    """
+    global _ws_games
+    await websocket.accept()
+    if _ws_games >= WS_MAX_GAMES:
+        WEBSOCKET_CLOSES.inc("overloaded")
+        await websocket.close(1013, "too many games")
+        return
+    _ws_games += 1
+    try:
+        reason = await _play_game(websocket)
+    finally:
+        _ws_games -= 1
+    WEBSOCKET_CLOSES.inc(reason)
+    if reason not in ("disconnect", "slow_client"):
+        await websocket.close(*WS_CLOSE_CODES[reason])
+
+async def _play_game(websocket: WebSocket) -> str:
+    """Oyunu oynat, bağlantının neden bittiğini döndür"""
+    sid = str(uuid4())
+    st = await _new_game()
+    failed = await _ws_send(websocket, _ws_body(_start_out(sid, st, None)))
+    if failed:
+        return failed
+
+    while True:
+        try:
+            message = await asyncio.wait_for(websocket.receive(), WS_IDLE_TIMEOUT)
+        except asyncio.TimeoutError:
+            return "idle"
+        if message["type"] == "websocket.disconnect":
+            return "disconnect"
+        data = message.get("text") or message.get("bytes") or ""
+        if len(data) > WS_MAX_MESSAGE:
+            return "too_large"
+
+        item = _parse_ws_answer(data)
+        if item is None:
+            out = '{"error":"invalid answer"}'
+        elif item[1] is not None and item[1] != st.current_question_idx:
+            out = '{"error":"question_id does not match the current question"}'
+        else:
+            posterior = step_game(st, item[0])
+            if posterior is not None:
+                result = await _finish(sid, st, posterior, stateless=True)
+                # Sonuç kaydedildi; gönderilemese de kopan bağlantı kapatılmaya çalışılmaz
+                return await _ws_send(websocket, _ws_body(result)) or "done"
+            out = _ws_body(_question_out(st, None))
+        failed = await _ws_send(websocket, out)
+        if failed:
+            return failed
+
+# Modül import süresi (tüm soru havuzu, ağaç ve servisler dahil)
+IMPORT_SECONDS = time.perf_counter() - _IMPORT_STARTED
+REGISTRY.gauge("akinator_import_seconds", "Time spent importing the application module",
+               lambda: IMPORT_SECONDS)
+REGISTRY.gauge("akinator_persistence_up", "1 if the Firestore client is available",
+               lambda: 1 if firebase_service.persistence_status == "ok" else 0)
+REGISTRY.gauge("akinator_websocket_games", "WebSocket games currently open in this process",
+               lambda: _ws_games)
+REGISTRY.gauge("akinator_firestore_breaker_open", "1 if Firestore calls are being skipped",
+               lambda: 0 if firebase_service.breaker.state == "closed" else 1)
+if IMPORT_SECONDS > STARTUP_IMPORT_BUDGET:
+    logger.warning("⚠️ Import took %.0f ms, over the %.0f ms budget",
+                   IMPORT_SECONDS * 1e3, STARTUP_IMPORT_BUDGET * 1e3)
+else:
+    logger.info("🚀 Imported in %.0f ms", IMPORT_SECONDS * 1e3)
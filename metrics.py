@@ -0,0 +1,234 @@
+"""Süreç içi metrikler ve Prometheus metin formatı (ek bağımlılık yok).
+
+Sayaçlar ve histogramlar sadece bellekteki sayıları günceller; /metrics
+isteğinde metne çevrilir. Her uvicorn worker'ı kendi sayılarını tutar, çok
+worker'lı kurulumda her süreç ayrı kazınmalıdır.
+"""
+import bisect
+import math
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Gecikme histogramları için varsayılan kovalar (saniye)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help_text, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0.0)
+
+    def samples(self) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(v)}"
+                for labels, v in sorted(self._values.items())]
+
+
+class Gauge(Metric):
+    """Değeri kazıma anında bir fonksiyondan okunan gösterge"""
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, read: Callable[[], float]):
+        super().__init__(name, help_text)
+        self.read = read
+
+    def samples(self) -> List[str]:
+        try:
+            value = self.read()
+        except Exception:
+            return []
+        return [f"{self.name} {_format_value(value)}"]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # etiketler -> [kova sayıları..., +Inf sayısı], toplam
+        self._counts: Dict[Tuple[str, ...], List[int]] = {}
+        self._sums: Dict[Tuple[str, ...], float] = {}
+
+    def observe(self, value: float, *labels: str):
+        counts = self._counts.get(labels)
+        if counts is None:
+            counts = self._counts[labels] = [0] * (len(self.buckets) + 1)
+            self._sums[labels] = 0.0
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        self._sums[labels] += value
+
+    def count(self, *labels: str) -> int:
+        return sum(self._counts.get(labels, ()))
+
+    def samples(self) -> List[str]:
+        lines = []
+        for labels, counts in sorted(self._counts.items()):
+            cumulative = 0
+            for bound, n in zip(self.buckets + (math.inf,), counts):
+                cumulative += n
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} "
+                             f"{cumulative}")
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(self._sums[labels])}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help_text, labelnames))
+
+    def gauge(self, name: str, help_text: str, read: Callable[[], float]) -> Gauge:
+        return self.register(Gauge(name, help_text, read))
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help_text, labelnames, buckets))
+
+    def render(self) -> str:
+        return "\n".join(m.render() for m in self._metrics.values()) + "\n"
+
+
+REGISTRY = Registry()
+
+# --- HTTP ---
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "akinator_http_request_duration_seconds", "Request latency by endpoint", ("endpoint",))
+HTTP_REQUESTS = REGISTRY.counter(
+    "akinator_http_requests_total", "Requests by endpoint and status code", ("endpoint", "status"))
+
+# --- Firestore ---
+FIRESTORE_SECONDS = REGISTRY.histogram(
+    "akinator_firestore_operation_duration_seconds", "Firestore call latency by operation",
+    ("operation",))
+FIRESTORE_ERRORS = REGISTRY.counter(
+    "akinator_firestore_errors_total", "Failed Firestore calls by operation", ("operation",))
+FIRESTORE_DEADLINES = REGISTRY.counter(
+    "akinator_firestore_deadline_exceeded_total", "Firestore calls that ran out of their time budget",
+    ("operation",))
+FIRESTORE_BREAKER_TRIPS = REGISTRY.counter(
+    "akinator_firestore_breaker_trips_total", "Times the Firestore circuit breaker opened")
+FIRESTORE_FALLBACKS = REGISTRY.counter(
+    "akinator_firestore_fallbacks_total", "Firestore results replaced by a local fallback",
+    ("reason",))
+
+# --- Oyun ---
+QUESTION_SELECT_SECONDS = REGISTRY.histogram(
+    "akinator_question_selection_duration_seconds", "Time to pick the next question",
+    buckets=(0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.005))
+QUESTIONS_PER_GAME = REGISTRY.histogram(
+    "akinator_questions_per_game", "Questions asked before a game finished",
+    buckets=tuple(range(1, 21)))
+GAME_RESULTS = REGISTRY.counter(
+    "akinator_game_results_total", "Finished games by predicted class (including Belirsiz)",
+    ("prediction",))
+WEBSOCKET_CLOSES = REGISTRY.counter(
+    "akinator_websocket_games_closed_total", "WebSocket games by how the connection ended",
+    ("reason",))
+
+
+class Timer:
+    """with Timer(histogram, etiket...) bloğun süresini kaydeder; hata sayacı isteğe bağlı"""
+    __slots__ = ("histogram", "labels", "errors", "started")
+
+    def __init__(self, histogram: Histogram, *labels: str, errors: Optional[Counter] = None):
+        self.histogram = histogram
+        self.labels = labels
+        self.errors = errors
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.observe(time.perf_counter() - self.started, *self.labels)
+        if exc_type is not None and self.errors is not None:
+            self.errors.inc(*self.labels)
+        return False
+
+
+def firestore_timer(operation: str) -> Timer:
+    return Timer(FIRESTORE_SECONDS, operation, errors=FIRESTORE_ERRORS)
+
+
+class MetricsMiddleware:
+    """Seçili yollar için istek süresini ve durum kodunu ölçen saf ASGI ara katmanı"""
+
+    def __init__(self, app, paths: Sequence[str]):
+        self.app = app
+        self.paths = frozenset(paths)
+
+    async def __call__(self, scope, receive, send):
+        path = scope.get("path")
+        if scope["type"] != "http" or path not in self.paths:
+            return await self.app(scope, receive, send)
+
+        started = time.perf_counter()
+        status = "500"
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, path)
+            HTTP_REQUESTS.inc(path, status)
@@ -0,0 +1,206 @@
+"""Veri dosyasından yüklenen, derlenmiş ve sürümlü soru havuzu.
+
+questions.json ({"questions": [{"q", "w", "category", "tags"}, ...]}) yüklenirken
+değişmez bir yapıya derlenir: sınıf indeksli kategori ve ağırlık satırları,
+kategori başına soru indeksi / bit maskesi, yoğun ağırlık matrisi ve (havuzla
+eşleşiyorsa) derlenmiş soru ağacı. İstek yolu sözlük veya metin anahtarına
+bakmaz.
+
+Dosya değişince (mtime) yeni sürüm derlenip güncel havuz olur; başlamış oyunlar
+başladıkları sürüme bağlı kalır. Sürüm kimliği dosya içeriğinin özetidir, bu
+yüzden tüm worker'larda ve token'larda aynıdır. Emekliye ayrılan sürümler
+POOL_VERSION_RETENTION saniye daha tutulur (bağlı oyunlar bitsin diye).
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app_logging import get_logger
+from likelihood_model import LIKELIHOOD_MODEL_PATH, LikelihoodModel
+from question_sampler import QuestionSampler
+from question_tree import QUESTION_TREE_PATH, QuestionTree
+from session_store import SESSION_IDLE_TTL
+
+logger = get_logger(__name__)
+
+QUESTION_POOL_PATH = os.getenv(
+    "QUESTION_POOL_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "questions.json"),
+)
+# Dosya değişikliği kontrol aralığı (saniye); 0 ise sıcak yükleme kapalı
+POOL_RELOAD_INTERVAL = float(os.getenv("POOL_RELOAD_INTERVAL", "30"))
+# Emekli sürümlerin tutulma süresi (varsayılan: oturum boşta kalma süresi)
+POOL_VERSION_RETENTION = float(os.getenv("POOL_VERSION_RETENTION", str(SESSION_IDLE_TTL)))
+
+# Soru indeksleri bayt olarak saklanır (sorulanlar, ağaç tablosu)
+MAX_POOL_QUESTIONS = 255
+
+
+class UnknownPoolVersion(Exception):
+    """Oturumun bağlı olduğu havuz sürümü bu süreçte yok"""
+
+
+class CompiledPool:
+    """Tek bir havuz sürümü; oluşturulduktan sonra değiştirilmez"""
+
+    __slots__ = ("version", "questions", "texts", "category", "weights", "weight_matrix",
+                 "category_questions", "category_masks", "sampler", "tree", "model")
+
+    def __init__(self, version: int, questions: Sequence[Dict], classes: Sequence[str],
+                 tree: Optional[QuestionTree] = None, tree_path: Optional[str] = QUESTION_TREE_PATH,
+                 model_path: Optional[str] = LIKELIHOOD_MODEL_PATH):
+        class_index = {c: i for i, c in enumerate(classes)}
+        if not questions:
+            raise ValueError("question pool is empty")
+        if len(questions) > MAX_POOL_QUESTIONS:
+            raise ValueError(f"question pool has more than {MAX_POOL_QUESTIONS} questions")
+        for n, q in enumerate(questions):
+            if not q.get("q") or q.get("category") not in class_index:
+                raise ValueError(f"question {n} needs text and a known category")
+            unknown = set(q.get("w", {})) - set(class_index)
+            if unknown:
+                raise ValueError(f"question {n} has weights for unknown classes {sorted(unknown)}")
+
+        self.version = version
+        # API uyumluluğu için orijinal kayıtlar (salt okunur kabul edilir)
+        self.questions: Tuple[Dict, ...] = tuple(questions)
+        self.texts: Tuple[str, ...] = tuple(q["q"] for q in questions)
+        # Soru -> birincil kategori indeksi
+        self.category: Tuple[int, ...] = tuple(class_index[q["category"]] for q in questions)
+        # Soru -> sınıf sırasına göre puan katkıları
+        self.weights: Tuple[Tuple[float, ...], ...] = tuple(
+            tuple(float(q.get("w", {}).get(c, 0.0)) for c in classes) for q in questions
+        )
+        # Aynı katkılar yoğun soru x sınıf matrisi olarak (toplu puanlama için)
+        self.weight_matrix = np.array(self.weights, dtype=np.float64)
+        self.weight_matrix.setflags(write=False)
+        # Kategori -> soru indeksleri ve aynı kümenin bit maskesi
+        self.category_questions: Tuple[Tuple[int, ...], ...] = tuple(
+            tuple(i for i, c in enumerate(self.category) if c == ci) for ci in range(len(classes))
+        )
+        self.category_masks: Tuple[int, ...] = tuple(
+            sum(1 << i for i in members) for members in self.category_questions
+        )
+        # Global ağırlıklarla O(1) seçim için alias tabloları (ağırlık snapshot'ı başına)
+        self.sampler = QuestionSampler(self.category)
+        # Derlenmiş soru ağacı (python question_tree.py); yoksa veya başka havuz içinse None
+        if tree is None and tree_path:
+            tree = QuestionTree.load(tree_path, self.weight_matrix)
+        self.tree = tree
+        # Öğrenilmiş cevap olabilirlikleri (python likelihood_model.py train); yoksa elle ağırlıklar
+        self.model = LikelihoodModel.load(model_path, self.weight_matrix) if model_path else None
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def replace(self, **changes) -> "CompiledPool":
+        """Aynı sürüm, farklı ağaç / model (değerlendirme ve karşılaştırma için)"""
+        pool = object.__new__(CompiledPool)
+        for name in CompiledPool.__slots__:
+            setattr(pool, name, changes.get(name, getattr(self, name)))
+        return pool
+
+
+def content_version(data: bytes) -> int:
+    """Dosya içeriğinden 32 bit sürüm kimliği (süreçler arası aynı)"""
+    return int.from_bytes(hashlib.sha256(data).digest()[:4], "little")
+
+
+def load_pool(path: str, classes: Sequence[str]) -> CompiledPool:
+    with open(path, "rb") as f:
+        data = f.read()
+    questions = json.loads(data)["questions"]
+    return CompiledPool(content_version(data), questions, classes)
+
+
+class PoolRegistry:
+    """Güncel havuz ve emekli sürümler; sıcak yükleme dosya mtime'ı ile tetiklenir"""
+
+    def __init__(self, path: str, classes: Sequence[str],
+                 retention: float = POOL_VERSION_RETENTION):
+        self.path = path
+        self.classes = tuple(classes)
+        self.retention = retention
+        self.current = load_pool(path, self.classes)
+        self._mtime = os.stat(path).st_mtime_ns
+        # sürüm -> (havuz, emekliye ayrılma zamanı; güncel için None)
+        self._versions: Dict[int, Tuple[CompiledPool, Optional[float]]] = {
+            self.current.version: (self.current, None)
+        }
+        self.reloads = 0
+        self.reload_errors = 0
+        self.misses = 0
+        # reload() iş parçacığında çalışır (periyodik görev); force ile elle de çağrılabilir
+        self._lock = threading.Lock()
+
+    def get(self, version: int) -> CompiledPool:
+        """Sürümü bul; bilinmiyorsa UnknownPoolVersion.
+
+        İstek yolunda dosya okunmaz: başka worker'ın yüklediği yeni sürüm bu
+        süreçte periyodik kontrolden (POOL_RELOAD_INTERVAL) sonra bulunur.
+        """
+        entry = self._versions.get(version)
+        if entry is None:
+            self.misses += 1
+            raise UnknownPoolVersion(f"question pool version {version:08x} is not available")
+        return entry[0]
+
+    def reload(self, force: bool = False) -> bool:
+        """Dosya değiştiyse yeni sürümü derle ve güncel yap; değiştiyse True"""
+        with self._lock:
+            return self._reload(force)
+
+    def _reload(self, force: bool) -> bool:
+        now = time.time()
+        self._expire(now)
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+            if mtime == self._mtime and not force:
+                return False
+            pool = load_pool(self.path, self.classes)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            # Bozuk dosya güncel sürümü bozmaz
+            self.reload_errors += 1
+            logger.error("❌ Question pool reload failed, keeping version %08x: %s",
+                         self.current.version, e)
+            return False
+        self._mtime = mtime
+        if pool.version == self.current.version:
+            return False
+
+        previous = self.current
+        self._versions[previous.version] = (previous, now)
+        self._versions[pool.version] = (pool, None)
+        self.current = pool
+        self.reloads += 1
+        logger.warning("🔁 Question pool reloaded: %08x -> %08x (%d questions, tree %s, model %s)",
+                       previous.version, pool.version, len(pool),
+                       "loaded" if pool.tree is not None else "missing",
+                       "loaded" if pool.model is not None else "missing")
+        return True
+
+    def _expire(self, now: float):
+        for version, (_, retired_at) in list(self._versions.items()):
+            if retired_at is not None and now - retired_at > self.retention:
+                del self._versions[version]
+
+    def stats(self) -> Dict:
+        return {
+            "current_version": f"{self.current.version:08x}",
+            "questions": len(self.current),
+            "tree": self.current.tree is not None,
+            "model_games": self.current.model.games if self.current.model is not None else None,
+            "sampler": self.current.sampler.stats(),
+            "versions": len(self._versions),
+            "reloads": self.reloads,
+            "reload_errors": self.reload_errors,
+            "misses": self.misses,
+        }
+
+    def versions(self) -> List[int]:
+        return list(self._versions)
@@ -0,0 +1,110 @@
+"""Walker alias tabloları ile O(1) ağırlıklı soru seçimi.
+
+Sorunun seçilme ağırlığı kategorisinin global ağırlığıdır. Her havuz sürümü
+için bu ağırlıklarla bir alias tablosu kurulur ve global ağırlık snapshot'ı
+ile önbelleğe alınır; tablo sadece ağırlıklar değişince
+(calculate_balanced_area_weights yeni değer döndürünce) yeniden kurulur.
+
+Oyun içindeki seçim ("en az sorulan alana 3x" ve sorulmuş soruların dışlanması)
+aynı tablodan ret örneklemesi ile yapılır: tablodan çekilen soru sorulmuşsa
+reddedilir, artırılmamış alandaysa 1/boost olasılıkla kabul edilir. Kabul edilen
+sorunun dağılımı global ağırlık x alan katsayısı ile orantılıdır, yani doğrusal
+seçimle aynıdır. Deneme sınırı aşılırsa (havuzun çoğu sorulmuşsa) None döner,
+çağıran doğrusal seçime düşer.
+"""
+import os
+import random
+from collections import OrderedDict
+from typing import Optional, Sequence, Tuple
+
+# Ret örneklemesinde en fazla deneme (sonra doğrusal seçim)
+SAMPLER_MAX_TRIES = int(os.getenv("SAMPLER_MAX_TRIES", "16"))
+# Havuz başına önbellekte tutulan ağırlık snapshot'ı sayısı
+SAMPLER_CACHE_SIZE = int(os.getenv("SAMPLER_CACHE_SIZE", "8"))
+
+
+class AliasTable:
+    """Vose'un alias yöntemi: O(n) kurulum, O(1) çekim"""
+
+    __slots__ = ("n", "prob", "alias")
+
+    def __init__(self, weights: Sequence[float]):
+        n = len(weights)
+        total = float(sum(weights))
+        if n == 0 or total <= 0:
+            raise ValueError("alias table needs at least one positive weight")
+        scaled = [w * n / total for w in weights]
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        prob = [1.0] * n
+        alias = list(range(n))
+        while small and large:
+            s, l = small.pop(), large.pop()
+            prob[s] = scaled[s]
+            alias[s] = l
+            scaled[l] += scaled[s] - 1.0
+            (small if scaled[l] < 1.0 else large).append(l)
+        # Kalanlar (yuvarlama artıkları dahil) tam olasılıkla kendisi
+        self.n = n
+        self.prob = prob
+        self.alias = alias
+
+    def sample(self, rand=random.random) -> int:
+        u = rand() * self.n
+        i = int(u)
+        return i if u - i < self.prob[i] else self.alias[i]
+
+
+class QuestionSampler:
+    """Bir havuz sürümünün soru -> kategori eşlemesi üzerinde önbellekli alias tabloları"""
+
+    def __init__(self, category: Sequence[int], cache_size: int = SAMPLER_CACHE_SIZE):
+        self.category: Tuple[int, ...] = tuple(category)
+        self.cache_size = cache_size
+        # ağırlık vektörü (sınıf sırasıyla) -> tablo; en son kullanılan sonda
+        self._tables: "OrderedDict[Tuple[float, ...], AliasTable]" = OrderedDict()
+        # Paylaşılan snapshot tuple'ı için kimlik kontrolü (hash hesaplamadan)
+        self._last: Tuple[Optional[Tuple[float, ...]], Optional[AliasTable]] = (None, None)
+        self.builds = 0
+        self.fallbacks = 0
+
+    def table(self, weights: Tuple[float, ...]) -> AliasTable:
+        last_weights, last_table = self._last
+        if last_weights is weights:
+            return last_table
+        table = self._tables.get(weights)
+        if table is None:
+            table = self._tables[weights] = AliasTable([weights[c] for c in self.category])
+            self.builds += 1
+            if len(self._tables) > self.cache_size:
+                self._tables.popitem(last=False)
+        else:
+            self._tables.move_to_end(weights)
+        self._last = (weights, table)
+        return table
+
+    def start(self, weights: Tuple[float, ...]) -> int:
+        """Global ağırlıklarla başlangıç sorusu"""
+        return self.table(weights).sample()
+
+    def next(self, weights: Tuple[float, ...], asked_mask: int, boosted_mask: int,
+             boost: float = 3.0, max_tries: int = SAMPLER_MAX_TRIES) -> Optional[int]:
+        """Sorulmamış bir soru; boosted_mask'teki kategoriler boost kat ağırlıklı.
+
+        max_tries denemede kabul edilen olmazsa None (çağıran doğrusal seçime düşer).
+        """
+        sample = self.table(weights).sample
+        category = self.category
+        accept = 1.0 / boost
+        rand = random.random
+        for _ in range(max_tries):
+            q = sample()
+            if asked_mask >> q & 1:
+                continue
+            if boosted_mask >> category[q] & 1 or rand() < accept:
+                return q
+        self.fallbacks += 1
+        return None
+
+    def stats(self):
+        return {"tables": len(self._tables), "builds": self.builds, "fallbacks": self.fallbacks}
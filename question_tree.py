@@ -0,0 +1,228 @@
+"""Önceden derlenmiş dallanan soru ağacı.
+
+Her başlangıç sorusu için, cevap kovalarına (pos/neu/neg) göre dallanan tam
+bir üçlü ağaç derlenir. Her düğümde CLASSES üzerindeki beklenen bilgi
+kazancı en yüksek soru seçilir. Ağaç düz bir bayt tablosu olarak saklanır;
+çalışma anında sonraki soru O(1) indeks ile bulunur.
+
+Derleme: python question_tree.py [--out question_tree.bin] [--evaluate 20000]
+Soru havuzu (questions.json) değişince ağaç yeniden derlenmelidir; eşleşmeyen
+ağaç yüklenmez ve o havuz sürümü akıllı seçimle çalışır. Oyunlarda ağaç sadece
+QUESTION_TREE_ENABLED=1 ile kullanılır (main.py).
+"""
+import hashlib
+import os
+import struct
+from typing import Optional, Sequence
+
+import numpy as np
+
+from app_logging import get_logger
+
+logger = get_logger(__name__)
+
+QUESTION_TREE_PATH = os.getenv(
+    "QUESTION_TREE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "question_tree.bin"),
+)
+
+TREE_MAGIC = b"QTRE"
+TREE_VERSION = 1
+BUCKETS = ("pos", "neu", "neg")
+NO_QUESTION = 255
+LIKERT_VALUES = np.array([2.0, 1.0, 0.0, -1.0, -2.0])
+# Her Likert değerinin kovası (BUCKETS indeksi)
+VALUE_BUCKETS = np.array([0, 0, 1, 2, 2])
+
+# magic, sürüm, soru sayısı, sınıf sayısı, derinlik, havuz parmak izi
+_HEADER = struct.Struct("<4sBBBB8s")
+
+
+def pool_fingerprint(weight_matrix: np.ndarray) -> bytes:
+    """Ağaç sadece derlendiği havuzla kullanılır"""
+    matrix = np.ascontiguousarray(weight_matrix, dtype="<f8")
+    return hashlib.sha256(matrix.tobytes() + bytes(matrix.shape)).digest()[:8]
+
+
+def nodes_for_depth(depth: int) -> int:
+    # 0..depth-1 seviyelerindeki düğüm sayısı: (3^depth - 1) / 2
+    return (3 ** depth - 1) // 2
+
+
+def child_node(node: int, bucket: int) -> int:
+    return 3 * node + 1 + bucket
+
+
+def answer_likelihoods(weight_matrix: np.ndarray) -> np.ndarray:
+    """P(cevap | sınıf, soru) ~ exp(w * v): puanlamanın örtük cevap modeli -> (Q, V, C)"""
+    logits = weight_matrix[:, None, :] * LIKERT_VALUES[None, :, None]
+    exps = np.exp(logits)
+    return exps / exps.sum(axis=1, keepdims=True)
+
+
+def _entropy(probs: np.ndarray) -> np.ndarray:
+    return -(probs * np.log(np.clip(probs, 1e-12, None))).sum(axis=-1)
+
+
+def _softmax(scores: np.ndarray) -> np.ndarray:
+    exps = np.exp(scores - scores.max(axis=-1, keepdims=True))
+    return exps / exps.sum(axis=-1, keepdims=True)
+
+
+def best_question(weight_matrix: np.ndarray, likelihoods: np.ndarray,
+                  scores: np.ndarray, asked_mask: int) -> int:
+    """Beklenen bilgi kazancı en yüksek, henüz sorulmamış soru"""
+    available = [q for q in range(weight_matrix.shape[0]) if not asked_mask >> q & 1]
+    if not available:
+        return NO_QUESTION
+
+    probs = _softmax(scores)
+    value_probs = likelihoods[available] @ probs  # (Qa, V)
+    posterior = _softmax(scores + weight_matrix[available][:, None, :]
+                         * LIKERT_VALUES[None, :, None])  # (Qa, V, C)
+    gain = _entropy(probs) - (value_probs * _entropy(posterior)).sum(axis=1)
+    return available[int(np.argmax(gain))]
+
+
+def bucket_expectations(likelihoods: np.ndarray, question: int,
+                        scores: np.ndarray) -> np.ndarray:
+    """Her kova için beklenen Likert değeri (çocuk düğümün temsili durumu için)"""
+    value_probs = likelihoods[question] @ _softmax(scores)  # (V,)
+    expected = np.zeros(len(BUCKETS))
+    for b in range(len(BUCKETS)):
+        in_bucket = VALUE_BUCKETS == b
+        mass = value_probs[in_bucket].sum()
+        if mass > 0:
+            expected[b] = (value_probs[in_bucket] * LIKERT_VALUES[in_bucket]).sum() / mass
+    return expected
+
+
+def compile_tree(weight_matrix: np.ndarray, depth: int) -> np.ndarray:
+    """Her başlangıç sorusu için 'depth' soruluk ağacı derle -> (Q, düğüm) uint8"""
+    n_questions, n_classes = weight_matrix.shape
+    n_nodes = nodes_for_depth(depth)
+    likelihoods = answer_likelihoods(weight_matrix)
+    table = np.full((n_questions, n_nodes), NO_QUESTION, dtype=np.uint8)
+
+    for root in range(n_questions):
+        table[root, 0] = root
+        # (düğüm, skorlar, sorulanlar maskesi, bu düğümde sorulan soru)
+        frontier = [(0, np.zeros(n_classes), 1 << root, root)]
+        while frontier:
+            next_frontier = []
+            for node, scores, asked_mask, question in frontier:
+                expected = bucket_expectations(likelihoods, question, scores)
+                for b in range(len(BUCKETS)):
+                    child = child_node(node, b)
+                    if child >= n_nodes:
+                        continue
+                    child_scores = scores + weight_matrix[question] * expected[b]
+                    q = best_question(weight_matrix, likelihoods, child_scores, asked_mask)
+                    table[root, child] = q
+                    if q != NO_QUESTION:
+                        next_frontier.append((child, child_scores, asked_mask | 1 << q, q))
+            frontier = next_frontier
+    return table
+
+
+class QuestionTree:
+    """Yüklenmiş ağaç: (başlangıç sorusu, düğüm) -> sonraki soru"""
+
+    def __init__(self, table: bytes, n_questions: int, depth: int, fingerprint: bytes):
+        self.table = table
+        self.n_questions = n_questions
+        self.depth = depth
+        self.n_nodes = nodes_for_depth(depth)
+        self.fingerprint = fingerprint
+
+    def next_question(self, root: int, node: int) -> int:
+        if node >= self.n_nodes:
+            return NO_QUESTION
+        return self.table[root * self.n_nodes + node]
+
+    def save(self, path: str, n_classes: int):
+        with open(path, "wb") as f:
+            f.write(_HEADER.pack(TREE_MAGIC, TREE_VERSION, self.n_questions, n_classes,
+                                 self.depth, self.fingerprint))
+            f.write(self.table)
+
+    @classmethod
+    def load(cls, path: str, weight_matrix: np.ndarray) -> Optional["QuestionTree"]:
+        """Ağacı yükle; dosya yoksa veya başka bir havuz için derlendiyse None"""
+        if not os.path.exists(path):
+            return None
+        with open(path, "rb") as f:
+            data = f.read()
+        magic, version, n_questions, n_classes, depth, fingerprint = _HEADER.unpack_from(data)
+        if magic != TREE_MAGIC or version != TREE_VERSION:
+            logger.warning("⚠️ Question tree %s has an unknown format, ignoring it", path)
+            return None
+        if fingerprint != pool_fingerprint(weight_matrix):
+            logger.warning("⚠️ Question tree %s was built for another question pool, ignoring it", path)
+            return None
+        table = data[_HEADER.size:]
+        if len(table) != n_questions * nodes_for_depth(depth):
+            logger.warning("⚠️ Question tree %s is truncated, ignoring it", path)
+            return None
+        return cls(table, n_questions, depth, fingerprint)
+
+
+def build(weight_matrix: np.ndarray, depth: int) -> QuestionTree:
+    table = compile_tree(weight_matrix, depth)
+    return QuestionTree(table.tobytes(), weight_matrix.shape[0], depth,
+                        pool_fingerprint(weight_matrix))
+
+
+def simulate(pool, games: int, seed: int = 0) -> Sequence[float]:
+    """pool (ve ağacı) ile sentetik oyunlar oynat: (ortalama soru sayısı, doğruluk)"""
+    import main
+
+    rng = np.random.default_rng(seed)
+    likelihoods = answer_likelihoods(pool.weight_matrix)
+    weights = tuple(1.0 for _ in main.CLASSES)
+    questions = correct = 0
+    for _ in range(games):
+        true_class = rng.integers(len(main.CLASSES))
+        root = int(rng.integers(len(pool)))
+        st = main.GameSession(weights, pool)
+        st.current_question_idx = root
+        main.update_session_stats(st, root)
+        while True:
+            v = int(rng.choice(LIKERT_VALUES, p=likelihoods[st.current_question_idx, :, true_class]))
+            for ci, w in enumerate(pool.weights[st.current_question_idx]):
+                st.scores[ci] += w * v
+            st.i += 1
+            probs = main.softmax(st.scores)
+            if main.should_finish(probs, st.i):
+                break
+            result = main.select_next_question(st, v)
+            if result is None:
+                break
+            st.current_question_idx = result[0]
+            main.update_session_stats(st, result[0])
+        questions += st.i
+        correct += int(np.argmax(probs)) == true_class
+    return questions / games, correct / games
+
+
+if __name__ == "__main__":
+    import argparse
+
+    import main
+
+    parser = argparse.ArgumentParser(description="Soru ağacını derle")
+    parser.add_argument("--out", default=QUESTION_TREE_PATH)
+    parser.add_argument("--evaluate", type=int, default=0,
+                        help="derlemeden sonra bu kadar sentetik oyunla karşılaştır")
+    args = parser.parse_args()
+
+    # Ağaç güncel soru havuzu (QUESTION_POOL_PATH) için derlenir
+    pool = main.POOLS.current
+    tree = build(pool.weight_matrix, main.MAX_QUESTIONS)
+    tree.save(args.out, len(main.CLASSES))
+    print(f"✅ Question tree written to {args.out} ({os.path.getsize(args.out)} bytes)")
+
+    if args.evaluate:
+        for name, policy in (("random", None), ("tree", tree)):
+            mean_questions, accuracy = simulate(pool.replace(tree=policy), args.evaluate)
+            print(f"{name:6s} questions/game={mean_questions:.3f} accuracy={accuracy:.3f}")
@@ -0,0 +1,314 @@
+"""Oyun sonuçları için yerel, sadece-ekleme (append-only) günlük.
+
+Kayıtlar JSONL segment dosyalarına yazılır (results-000001.jsonl, ...). Her satır
+{"path": "game_results/<id>", "data": {...}} biçimindedir; datetime değerleri
+{"$ts": "<iso>"} olarak saklanır. Yazımlar tamponlanır, fsync gruplar halinde
+(flush + fsync) arka planda yapılır. Yükleyici (ResultWriter) sadece fsync edilmiş kayıtları okur
+ve ilerlemesini checkpoint.json'a yazar; belge ID'leri günlükte olduğu için
+aynı kayıtların tekrar yüklenmesi aynı belgelerin üzerine yazar.
+
+Her süreç kendi alt dizinini kilitler (0/, 1/, ...); yeniden başlayan worker
+boşta kalan dizini ve checkpoint'ini devralır.
+
+Tekrar oynatma / çevrimdışı analiz:
+    python result_journal.py cat <dizin>                      # kayıtları JSONL yaz
+    python result_journal.py replay <dizin> --collection <ad> # başka koleksiyona yükle
+"""
+import fcntl
+import json
+import os
+import uuid
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Boşsa günlük kullanılmaz, sonuçlar bellekteki kuyrukta bekler
+RESULT_JOURNAL_DIR = os.getenv("RESULT_JOURNAL_DIR", "")
+RESULT_JOURNAL_SEGMENT_BYTES = int(os.getenv("RESULT_JOURNAL_SEGMENT_BYTES", str(4 * 1024 * 1024)))
+# fsync grubu: bu kadar kayıt birikince veya bu süre (saniye) dolunca
+RESULT_JOURNAL_SYNC_EVERY = int(os.getenv("RESULT_JOURNAL_SYNC_EVERY", "256"))
+RESULT_JOURNAL_SYNC_INTERVAL = float(os.getenv("RESULT_JOURNAL_SYNC_INTERVAL", "0.2"))
+# Yüklenmiş segmentlerden tekrar oynatma için saklanacak olanların sayısı
+RESULT_JOURNAL_KEEP_SEGMENTS = int(os.getenv("RESULT_JOURNAL_KEEP_SEGMENTS", "100"))
+
+_SEGMENT_PREFIX = "results-"
+_SEGMENT_SUFFIX = ".jsonl"
+_CHECKPOINT = "checkpoint.json"
+
+# (segment numarası, bayt konumu)
+Position = Tuple[int, int]
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {"$ts": value.isoformat()}
+    raise TypeError(f"cannot journal {type(value).__name__}")
+
+
+def _decode_object(obj: Dict):
+    if len(obj) == 1 and "$ts" in obj:
+        return datetime.fromisoformat(obj["$ts"])
+    return obj
+
+
+# Kodlayıcılar bir kez kurulur (json.dumps her çağrıda yenisini kurar)
+_ENCODER = json.JSONEncoder(default=_encode_value, ensure_ascii=False, separators=(",", ":"))
+_DECODER = json.JSONDecoder(object_hook=_decode_object)
+
+
+def encode_record(path: str, data: Dict) -> bytes:
+    return (_ENCODER.encode({"path": path, "data": data}) + "\n").encode()
+
+
+def decode_record(line: bytes) -> Tuple[str, Dict]:
+    record = _DECODER.decode(line.decode())
+    return record["path"], record["data"]
+
+
+def _segment_name(seq: int) -> str:
+    return f"{_SEGMENT_PREFIX}{seq:06d}{_SEGMENT_SUFFIX}"
+
+
+def list_segments(directory: str) -> List[int]:
+    seqs = []
+    for name in os.listdir(directory):
+        if name.startswith(_SEGMENT_PREFIX) and name.endswith(_SEGMENT_SUFFIX):
+            seqs.append(int(name[len(_SEGMENT_PREFIX):-len(_SEGMENT_SUFFIX)]))
+    return sorted(seqs)
+
+
+def _fsync_dir(directory: str):
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class ResultJournal:
+    """Tek bir sürecin günlük dizini: ekleme, grup fsync, okuma ve checkpoint"""
+
+    def __init__(self, directory: str, segment_bytes: int = RESULT_JOURNAL_SEGMENT_BYTES,
+                 sync_every: int = RESULT_JOURNAL_SYNC_EVERY,
+                 keep_segments: int = RESULT_JOURNAL_KEEP_SEGMENTS):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.sync_every = sync_every
+        self.keep_segments = keep_segments
+        os.makedirs(directory, exist_ok=True)
+
+        # Dizin bu sürece ait olsun (aynı dizine iki worker yazmasın)
+        self._lock_file = open(os.path.join(directory, "LOCK"), "a")
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            self._lock_file.close()
+            raise
+
+        self.checkpoint = self._read_checkpoint()
+        segments = list_segments(directory)
+        self._seq = segments[-1] if segments else self.checkpoint[0] + 1
+        self._offset = self._recover_tail(self._seq)
+        self._file = open(self._segment_path(self._seq), "ab")
+        self.synced: Position = (self._seq, self._offset)
+
+        self.appended = 0
+        self.unsynced = 0
+        self.syncs = 0
+
+    @classmethod
+    def open_for_process(cls, base_dir: str, **kwargs) -> "ResultJournal":
+        """base_dir altında kilitli olmayan ilk alt dizini al (worker başına bir dizin)"""
+        n = 0
+        while True:
+            try:
+                return cls(os.path.join(base_dir, str(n)), **kwargs)
+            except BlockingIOError:
+                n += 1
+
+    def _segment_path(self, seq: int) -> str:
+        return os.path.join(self.directory, _segment_name(seq))
+
+    def _recover_tail(self, seq: int) -> int:
+        """Çökme sonrası yarım kalmış son satırı at; dosya boyunu döndür"""
+        path = self._segment_path(seq)
+        if not os.path.exists(path):
+            return 0
+        with open(path, "rb+") as f:
+            data = f.read()
+            end = data.rfind(b"\n") + 1
+            if end != len(data):
+                f.truncate(end)
+                os.fsync(f.fileno())
+        return end
+
+    def _read_checkpoint(self) -> Position:
+        try:
+            with open(os.path.join(self.directory, _CHECKPOINT)) as f:
+                checkpoint = json.load(f)
+            return checkpoint["segment"], checkpoint["offset"]
+        except FileNotFoundError:
+            return 0, 0
+
+    # --- İstek yolu ---
+
+    def append(self, path: str, data: Dict) -> bool:
+        """Kaydı tampona yaz; fsync grubu dolduysa True döner"""
+        line = encode_record(path, data)
+        self._file.write(line)
+        self._offset += len(line)
+        self.appended += 1
+        self.unsynced += 1
+        return self.unsynced >= self.sync_every
+
+    # --- Arka plan (ResultWriter) ---
+
+    def flush(self) -> Position:
+        """Tamponu işletim sistemine ver; fsync edilecek konumu döndür (event loop'ta)"""
+        self._file.flush()
+        self.unsynced = 0
+        return self._seq, self._offset
+
+    def fsync(self, position: Position):
+        """flush() ile alınan konuma kadar diske yaz (thread'de çalışabilir)"""
+        os.fsync(self._file.fileno())
+        self.synced = position
+        self.syncs += 1
+
+    def rotate_if_full(self) -> bool:
+        """Segment doluysa (ve tamamı fsync edildiyse) yenisine geç (event loop'ta)"""
+        if self._offset < self.segment_bytes or self.synced != (self._seq, self._offset):
+            return False
+        self._file.close()
+        self._seq += 1
+        self._offset = 0
+        self._file = open(self._segment_path(self._seq), "ab")
+        _fsync_dir(self.directory)
+        self.synced = (self._seq, 0)
+        return True
+
+    def read_batch(self, start: Position, limit: int) -> Tuple[List[Tuple[str, Dict]], Position]:
+        """start'tan itibaren fsync edilmiş en fazla limit kaydı ve sonraki konumu oku"""
+        records: List[Tuple[str, Dict]] = []
+        seq, offset = start
+        seq = max(seq, 1)
+        while len(records) < limit and (seq, offset) < self.synced:
+            end = self.synced[1] if seq == self.synced[0] else None
+            path = self._segment_path(seq)
+            if os.path.exists(path):
+                with open(path, "rb") as f:
+                    f.seek(offset)
+                    while len(records) < limit and (end is None or offset < end):
+                        line = f.readline()
+                        if not line.endswith(b"\n"):
+                            break
+                        records.append(decode_record(line))
+                        offset += len(line)
+            if len(records) < limit and seq < self.synced[0]:
+                seq, offset = seq + 1, 0
+            else:
+                break
+        return records, (seq, offset)
+
+    def save_checkpoint(self, position: Position):
+        """Yükleme ilerlemesini atomik olarak yaz, tamamen yüklenmiş eski segmentleri sil"""
+        tmp = os.path.join(self.directory, _CHECKPOINT + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump({"segment": position[0], "offset": position[1]}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, os.path.join(self.directory, _CHECKPOINT))
+        self.checkpoint = position
+
+        uploaded = [seq for seq in list_segments(self.directory) if seq < position[0]]
+        for seq in uploaded[:max(len(uploaded) - self.keep_segments, 0)]:
+            os.remove(self._segment_path(seq))
+
+    def pending(self) -> List[Dict]:
+        """Henüz yüklenmemiş (checkpoint sonrası) kayıtların verisi"""
+        records, _ = self.read_batch(self.checkpoint, 1 << 30)
+        return [data for _, data in records]
+
+    def close(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        self._lock_file.close()
+
+    def stats(self) -> Dict:
+        pending_bytes = 0
+        for seq in list_segments(self.directory):
+            if seq >= self.checkpoint[0]:
+                size = self.synced[1] if seq == self.synced[0] else \
+                    os.path.getsize(self._segment_path(seq))
+                pending_bytes += size - (self.checkpoint[1] if seq == self.checkpoint[0] else 0)
+        return {
+            "directory": self.directory,
+            "segment": self._seq,
+            "appended": self.appended,
+            "syncs": self.syncs,
+            "unsynced": self.unsynced,
+            "pending_bytes": max(pending_bytes, 0),
+        }
+
+
+def new_document_path(collection: str) -> str:
+    return f"{collection}/{uuid.uuid4().hex[:20]}"
+
+
+def iter_records(directory: str) -> Iterator[Tuple[str, Dict]]:
+    """Bir günlük dizinindeki (veya alt dizinlerindeki) tüm tam kayıtlar, yazım sırasıyla"""
+    subdirs = sorted((d for d in os.listdir(directory)
+                      if os.path.isdir(os.path.join(directory, d))), key=lambda d: (len(d), d))
+    for d in subdirs:
+        yield from iter_records(os.path.join(directory, d))
+    for seq in list_segments(directory):
+        with open(os.path.join(directory, _segment_name(seq)), "rb") as f:
+            for line in f:
+                if line.endswith(b"\n"):
+                    yield decode_record(line)
+
+
+def replay(directory: str, db, collection: Optional[str] = None, batch_size: int = 499) -> int:
+    """Günlükteki kayıtları Firestore'a yaz; collection verilirse oraya (aynı ID'lerle)"""
+    # Döngüsel import olmasın (result_writer bu modülü kullanır)
+    from result_writer import WRITTEN_AT, server_timestamp
+
+    written_at = server_timestamp(db)
+    written = 0
+    batch, size = db.batch(), 0
+    for path, data in iter_records(directory):
+        if collection:
+            path = f"{collection}/{path.rsplit('/', 1)[1]}"
+        batch.set(db.document(path), {**data, WRITTEN_AT: written_at})
+        size += 1
+        if size == batch_size:
+            batch.commit()
+            written += size
+            batch, size = db.batch(), 0
+    if size:
+        batch.commit()
+        written += size
+    return written
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Sonuç günlüğünü oku veya tekrar oynat")
+    sub = parser.add_subparsers(dest="command", required=True)
+    cat = sub.add_parser("cat", help="kayıtları JSONL olarak stdout'a yaz")
+    cat.add_argument("directory")
+    rep = sub.add_parser("replay", help="kayıtları Firestore'a yükle")
+    rep.add_argument("directory")
+    rep.add_argument("--collection", help="hedef koleksiyon (varsayılan: kayıttaki yol)")
+    args = parser.parse_args()
+
+    if args.command == "cat":
+        for path, data in iter_records(args.directory):
+            sys.stdout.write(json.dumps({"path": path, "data": data}, default=_encode_value,
+                                        ensure_ascii=False) + "\n")
+    else:
+        from firebase_service import FirebaseService
+        count = replay(args.directory, FirebaseService._create_client(), args.collection)
+        print(f"✅ Replayed {count} results from {args.directory}")
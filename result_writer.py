@@ -0,0 +1,322 @@
+import asyncio
+import logging
+import os
+import random
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from app_logging import get_logger, log_sampled
+from circuit_breaker import CircuitBreaker
+from metrics import firestore_timer
+from result_journal import RESULT_JOURNAL_SYNC_INTERVAL, ResultJournal, new_document_path
+
+logger = get_logger(__name__)
+
+# Kuyruk ve batch ayarları
+RESULT_QUEUE_MAX = int(os.getenv("RESULT_QUEUE_MAX", "10000"))
+# Firestore batch limiti 500 yazım; ek yazımlar için bir yer bırak
+RESULT_BATCH_SIZE = min(int(os.getenv("RESULT_BATCH_SIZE", "100")), 499)
+RESULT_FLUSH_INTERVAL = float(os.getenv("RESULT_FLUSH_INTERVAL", "1.0"))
+# Kuyruk dolduğunda: "drop_oldest" en eski kaydı atar, "drop_newest" yeni kaydı reddeder
+RESULT_OVERFLOW = os.getenv("RESULT_OVERFLOW", "drop_oldest")
+RESULT_MAX_RETRIES = int(os.getenv("RESULT_MAX_RETRIES", "5"))
+RESULT_DRAIN_TIMEOUT = float(os.getenv("RESULT_DRAIN_TIMEOUT", "10"))
+# Tek batch commit'inin süre bütçesi (saniye)
+RESULT_COMMIT_DEADLINE = float(os.getenv("RESULT_COMMIT_DEADLINE", "5.0"))
+
+# (belge referansı, belge yolu veya koleksiyon adı, veri) çifti; koleksiyon adı
+# verilirse belge ID'si yazım anında üretilir (istemci henüz kurulmamışken kuyruğa alınanlar)
+PendingWrite = Tuple[object, Dict]
+
+# Kaydın Firestore'a yazıldığı an (sunucu zaman damgası). Oyunun bitiş zamanı
+# (timestamp) kuyruk / günlük gecikmesi kadar eski olabilir; artımlı okuyucular
+# (game_export) bu alanla ilerler, geç yüklenen kayıtları kaçırmaz
+WRITTEN_AT = "written_at"
+
+
+def document_path(ref: str) -> str:
+    """Belge yolu aynen, koleksiyon adı yeni bir belge yolu olarak döner"""
+    return ref if "/" in ref else new_document_path(ref)
+
+
+def server_timestamp(db):
+    """İstemcinin sunucu zaman damgası değeri (firestore.SERVER_TIMESTAMP)"""
+    sentinel = getattr(db, "SERVER_TIMESTAMP", None)  # sahte istemci
+    if sentinel is None:
+        from google.cloud.firestore import SERVER_TIMESTAMP as sentinel
+    return sentinel
+
+
+class ResultWriter:
+    """Oyun sonuçlarını kuyruğa alıp Firestore'a WriteBatch ile toplu yazan işçi.
+
+    submit() beklemeden döner; arka plan görevi kuyruğu boyut veya süre dolunca
+    boşaltır, hata durumunda üstel geri çekilme ile tekrar dener. db None iken
+    (istemci kurulmamış) kayıtlar kuyrukta bekler.
+
+    journal verilirse kayıtlar bellekteki kuyruk yerine yerel günlüğe yazılır:
+    işçi günlüğü gruplar halinde fsync eder, fsync edilmiş kayıtları checkpoint'ten
+    itibaren yükler ve checkpoint'i ilerletir. Firestore kesintisi veya süreç
+    çökmesinde kayıtlar kaybolmaz, yeniden başlayınca yükleme kaldığı yerden sürer.
+
+    breaker verilirse commit'ler devre kesiciden geçer; devre açıkken deneme
+    hakkı harcanmaz, kayıtlar kuyrukta / günlükte devrenin açılmasını bekler.
+
+    on_lost verilirse kabul edilmiş ama yazılamayan kayıtlar (taşmada atılan en
+    eski kayıt, denemeleri tükenen batch) kayıp sayısıyla bildirilir.
+
+    Her kayda yazım anında WRITTEN_AT (sunucu zaman damgası) eklenir; kuyruktaki
+    ve günlükteki veri değişmez.
+    """
+
+    def __init__(self, db, max_queue: int = RESULT_QUEUE_MAX,
+                 batch_size: int = RESULT_BATCH_SIZE,
+                 flush_interval: float = RESULT_FLUSH_INTERVAL,
+                 overflow: str = RESULT_OVERFLOW,
+                 max_retries: int = RESULT_MAX_RETRIES,
+                 extra_writes: Optional[Callable[[], List[PendingWrite]]] = None,
+                 journal: Optional[ResultJournal] = None,
+                 breaker: Optional[CircuitBreaker] = None,
+                 commit_deadline: float = RESULT_COMMIT_DEADLINE,
+                 on_lost: Optional[Callable[[int], None]] = None):
+        self.db = db
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self.max_retries = max_retries
+        # Her batch'e eklenecek ek yazımlar (ör. toplu istatistik belgesi)
+        self.extra_writes = extra_writes
+        self.journal = journal
+        self.breaker = breaker
+        self.commit_deadline = commit_deadline
+        self.on_lost = on_lost
+        self._uploaded_at = 0.0
+
+        self._queue: Deque[PendingWrite] = deque()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._inflight = 0
+
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.retries = 0
+        self.batches = 0
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._stopping = False
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def submit(self, doc_ref, data: Dict) -> bool:
+        """Yazımı kuyruğa ekle; kayıt reddedildiyse False döner"""
+        self.start()
+        if self.journal is not None:
+            path = doc_ref.path if not isinstance(doc_ref, str) else document_path(doc_ref)
+            if self.journal.append(path, data):
+                self._wakeup.set()
+            self.enqueued += 1
+            return True
+
+        if len(self._queue) >= self.max_queue:
+            self.dropped += 1
+            if self.overflow == "drop_newest":
+                log_sampled(logger, logging.WARNING, "⚠️ Result queue full, dropping newest result")
+                return False
+            self._queue.popleft()
+            log_sampled(logger, logging.WARNING, "⚠️ Result queue full, dropping oldest result")
+            self._lost(1)
+
+        self._queue.append((doc_ref, data))
+        self.enqueued += 1
+        if len(self._queue) >= self.batch_size:
+            self._wakeup.set()
+        return True
+
+    def _lost(self, count: int):
+        if self.on_lost is not None:
+            self.on_lost(count)
+
+    async def pending(self) -> List[Dict]:
+        """Henüz yazılmamış kayıtların verisi.
+
+        Günlükte bekleyen kayıtlar Firestore kesintisinde çok büyüyebilir; okuma ve
+        çözümleme event loop'u bloklamasın diye thread'de yapılır.
+        """
+        if self.journal is not None:
+            return await asyncio.to_thread(self.journal.pending)
+        return [data for _, data in self._queue]
+
+    async def stop(self, timeout: float = RESULT_DRAIN_TIMEOUT):
+        """Kuyruğu boşaltıp işçiyi durdur (kapanışta sonuç kaybolmasın)"""
+        if self._task is None:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        try:
+            await asyncio.wait_for(asyncio.shield(self._task), timeout=timeout)
+        except asyncio.TimeoutError:
+            self._task.cancel()
+            if self.journal is None:
+                lost = len(self._queue) + self._inflight
+                logger.error("❌ Result queue drain timed out, %d results lost", lost)
+            else:
+                logger.warning("⚠️ Journal upload unfinished at shutdown, resumes on next start")
+        if self.journal is not None:
+            # Kapanışta tamponda kalan kayıtlar da diske
+            self.journal.fsync(self.journal.flush())
+        self._task = None
+
+    async def _run(self):
+        if self.journal is not None:
+            return await self._run_journal()
+        while True:
+            if self.db is None:
+                if self._stopping:
+                    if self._queue:
+                        logger.error("❌ Firestore unavailable at shutdown, %d results lost",
+                                     len(self._queue))
+                    return
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                continue
+
+            if len(self._queue) < self.batch_size and not self._stopping:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+
+            # Bu turda boşaltılacak kayıtların uyandırmaları da tüketilir; aksi halde
+            # kalan yarım batch süre dolmadan hemen yazılırdı
+            self._wakeup.clear()
+            while self._queue:
+                items = [self._queue.popleft()
+                         for _ in range(min(self.batch_size, len(self._queue)))]
+                self._inflight = len(items)
+                if not await self._commit_with_retry(items):
+                    self.failed += len(items)
+                    logger.error("❌ Firebase batch write gave up, %d results lost", len(items))
+                    self._lost(len(items))
+                self._inflight = 0
+                if len(self._queue) < self.batch_size and not self._stopping:
+                    break
+
+            if self._stopping and not self._queue:
+                return
+
+    async def _run_journal(self):
+        journal = self.journal
+        while True:
+            # Durdurma istendiyse bu tur son turdur: kalan her şey fsync edilip yüklenir
+            stopping = self._stopping
+            if not stopping:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=RESULT_JOURNAL_SYNC_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+
+            # Grup fsync: son turdan beri eklenen tüm kayıtlar tek fsync ile
+            if journal.unsynced:
+                await asyncio.to_thread(journal.fsync, journal.flush())
+            journal.rotate_if_full()
+
+            due = time.monotonic() - self._uploaded_at >= self.flush_interval
+            if self.db is not None and (due or stopping):
+                await self._upload_journal()
+            if stopping:
+                return
+
+    async def _upload_journal(self):
+        """Checkpoint'ten itibaren fsync edilmiş kayıtları batch'ler halinde yükle"""
+        journal = self.journal
+        self._uploaded_at = time.monotonic()
+        if self.breaker is not None and self.breaker.retry_in() > 0:
+            return  # devre açık: kayıtlar günlükte bekler
+        while True:
+            records, position = await asyncio.to_thread(
+                journal.read_batch, journal.checkpoint, self.batch_size)
+            if not records:
+                return
+            items = [(self.db.document(path), data) for path, data in records]
+            self._inflight = len(items)
+            # Günlük döngüsü fsync'i de yapar; devre açıksa beklemeden bırak
+            ok = await self._commit_with_retry(items, wait_for_circuit=False)
+            self._inflight = 0
+            if not ok:
+                # Kayıtlar günlükte kalır, sonraki turda aynı ID'lerle tekrar denenir
+                logger.warning("⚠️ Journal upload paused, %d results stay in the journal", len(items))
+                return
+            await asyncio.to_thread(journal.save_checkpoint, position)
+
+    def _document(self, ref: str):
+        # Belge yolu verilmişse o belge, koleksiyon adıysa yeni ID'li belge
+        return self.db.document(ref) if "/" in ref else self.db.collection(ref).document()
+
+    async def _commit_with_retry(self, items: List[PendingWrite],
+                                 wait_for_circuit: bool = True) -> bool:
+        # ID'ler denemelerden önce bir kez üretilir, tekrar denemeler aynı belgeye yazar
+        written_at = server_timestamp(self.db)
+        items = [(self._document(ref) if isinstance(ref, str) else ref,
+                  {**data, WRITTEN_AT: written_at})
+                 for ref, data in items]
+        delay = 0.5
+        attempt = 0
+        while True:
+            if self.breaker is not None and not self.breaker.allow():
+                if not wait_for_circuit:
+                    return False
+                # Devre açık: deneme hakkı harcamadan deneme zamanını bekle
+                await asyncio.sleep(max(self.breaker.retry_in(), 0.05))
+                continue
+            # Ek yazımlar event loop'ta hazırlanır (paylaşılan durumu thread'de okumamak için)
+            extras = self.extra_writes() if self.extra_writes else []
+            try:
+                with firestore_timer("batch_commit"):
+                    if self.breaker is not None:
+                        await self.breaker.run(self._commit, items + extras,
+                                               deadline=self.commit_deadline)
+                    else:
+                        await asyncio.wait_for(asyncio.to_thread(self._commit, items + extras),
+                                               timeout=self.commit_deadline)
+                self.written += len(items)
+                self.batches += 1
+                return True
+            except Exception as e:
+                if attempt == self.max_retries:
+                    return False
+                attempt += 1
+                self.retries += 1
+                logger.warning("⚠️ Firebase batch write failed (attempt %d): %s",
+                               attempt, e or type(e).__name__)
+                await asyncio.sleep(delay + random.uniform(0, delay / 2))
+                delay = min(delay * 2, 8.0)
+
+    def _commit(self, items: List[PendingWrite]):
+        # WriteBatch tek seferlik; her denemede yeniden kurulur (set idempotent)
+        batch = self.db.batch()
+        for doc_ref, data in items:
+            batch.set(doc_ref, data)
+        batch.commit()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "queued": len(self._queue) if self.journal is None else max(self.enqueued - self.written, 0),
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "batches": self.batches,
+            "retries": self.retries,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "journal": self.journal.stats() if self.journal is not None else None,
+        }
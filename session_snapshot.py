@@ -0,0 +1,230 @@
+"""Bellekteki oturum tablosunun ikili anlık görüntüsü (snapshot).
+
+Süreç yeniden başladığında (deploy, çökme) SESSIONS'taki yarım oyunlar
+kaybolmasın diye tablo kapanışta ve SESSION_SNAPSHOT_INTERVAL'da bir dosyaya
+yazılır. Dosya açılışta okunmaz, mmap ile eşlenir: açılış oturum sayısından
+bağımsızdır, oturumlar ilk istendiklerinde tek tek açılır (SessionStore.get).
+
+Dosya düzeni (little-endian):
+  başlık   magic "AKSS", biçim sürümü, yuva sayısı, kayıt sayısı, yazılma zamanı
+  tablo    yuva başına (sid hash, kayıt konumu, kayıt uzunluğu); açık adresleme,
+           doluluk en fazla %50, boş yuvanın konumu 0
+  kayıtlar (son erişim zamanı, sid uzunluğu, sid, durum baytları)
+
+Zamanlar duvar saatidir; süresi (SESSION_IDLE_TTL) dolmuş oturumlar yazılmaz,
+açılışta da süresi dolanlar istendiklerinde atılır. Tüm kayıtların süresi
+dolunca dosya kapatılır.
+
+Dosyanın yanındaki .lock ile tek süreç sahiplenir; çok worker'lı memory
+kurulumunda sadece kilidi alan worker snapshot yazar.
+"""
+import asyncio
+import fcntl
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import time
+from typing import Callable, Dict, IO, Iterator, List, Optional, Tuple
+
+from app_logging import get_logger
+
+logger = get_logger(__name__)
+
+# Boşsa snapshot alınmaz (Railway'de kalıcı volume yolu verilmeli)
+SESSION_SNAPSHOT_PATH = os.getenv("SESSION_SNAPSHOT_PATH", "")
+SESSION_SNAPSHOT_INTERVAL = float(os.getenv("SESSION_SNAPSHOT_INTERVAL", "30"))
+# Periyodik yazımda olay döngüsüne bu kadar oturumda bir sıra verilir
+SESSION_SNAPSHOT_CHUNK = int(os.getenv("SESSION_SNAPSHOT_CHUNK", "2000"))
+
+MAGIC = b"AKSS"
+FORMAT_VERSION = 1
+
+_HEADER = struct.Struct("<4sBxxxIId")  # magic, sürüm, yuva sayısı, kayıt sayısı, yazılma zamanı
+_SLOT = struct.Struct("<QII")  # sid hash, kayıt konumu, kayıt uzunluğu
+_RECORD = struct.Struct("<dB")  # son erişim zamanı, sid uzunluğu
+_EMPTY = 0
+_TOMBSTONE = 0xFFFFFFFF  # geri yüklenmiş veya süresi dolmuş kayıt (aramada atlanır)
+
+# (sid, son erişim zamanı, durum baytları)
+Entry = Tuple[bytes, float, bytes]
+
+# Kilit dosyası süreç boyunca açık tutulur
+_lock_file: Optional[IO] = None
+# İptal edilen periyodik yazımın thread'i kapanış yazımıyla aynı geçici dosyaya yazmasın
+_write_lock = threading.Lock()
+
+
+def sid_hash(sid: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(sid, digest_size=8).digest(), "little")
+
+
+def write_snapshot(path: str, entries: List[Entry], written_at: float) -> int:
+    """Kayıtları atomik olarak yaz (geçici dosya + fsync + rename), dosya boyutunu döndür"""
+    slots = 8
+    while slots < 2 * len(entries):
+        slots *= 2
+    mask = slots - 1
+    table = bytearray(slots * _SLOT.size)
+    records = []
+    offset = _HEADER.size + len(table)
+    for sid, touched_at, state in entries:
+        record = _RECORD.pack(touched_at, len(sid)) + sid + state
+        h = sid_hash(sid)
+        i = h & mask
+        while _SLOT.unpack_from(table, i * _SLOT.size)[1] != _EMPTY:
+            i = (i + 1) & mask
+        _SLOT.pack_into(table, i * _SLOT.size, h, offset, len(record))
+        records.append(record)
+        offset += len(record)
+
+    tmp = f"{path}.tmp"
+    with _write_lock:
+        with open(tmp, "wb") as f:
+            f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, slots, len(entries), written_at))
+            f.write(table)
+            f.write(b"".join(records))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    directory = os.path.dirname(os.path.abspath(path))
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+    return offset
+
+
+class SessionSnapshot:
+    """mmap ile açılmış snapshot: açılış ve arama O(1), dosya bütünüyle okunmaz.
+
+    Eşleme kopyala-yaz (ACCESS_COPY) açılır; geri yüklenen kaydın yuvası sadece
+    bu süreçte mezar taşıyla işaretlenir, dosya değişmez.
+    """
+
+    def __init__(self, path: str, mm: mmap.mmap, idle_ttl: float,
+                 clock: Callable[[], float] = time.time):
+        self.path = path
+        self.idle_ttl = idle_ttl
+        self.clock = clock
+        self._mm = mm
+        _, _, self.slots, self.count, self.written_at = _HEADER.unpack_from(mm)
+        self.restored = 0
+        self.expired = 0
+
+    @classmethod
+    def open(cls, path: str, idle_ttl: float,
+             clock: Callable[[], float] = time.time) -> Optional["SessionSnapshot"]:
+        """Dosya yoksa, bozuksa veya tüm oturumların süresi dolmuşsa None"""
+        try:
+            with open(path, "rb") as f:
+                size = os.fstat(f.fileno()).st_size
+                if size < _HEADER.size:
+                    raise ValueError("truncated header")
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning("⚠️ Session snapshot %s unreadable: %s", path, e)
+            return None
+
+        magic, version, slots, count, written_at = _HEADER.unpack_from(mm)
+        if magic != MAGIC or version != FORMAT_VERSION or size < _HEADER.size + slots * _SLOT.size:
+            logger.warning("⚠️ Session snapshot %s has an unknown format, ignored", path)
+            mm.close()
+            return None
+        if written_at + idle_ttl <= clock():
+            logger.info("🗑️ Session snapshot %s expired (%d sessions dropped)", path, count)
+            mm.close()
+            return None
+        logger.info("♻️ Session snapshot %s mapped: %d sessions, %.0fs old",
+                    path, count, clock() - written_at)
+        return cls(path, mm, idle_ttl, clock)
+
+    @property
+    def exhausted(self) -> bool:
+        """Geri yüklenecek kayıt kalmadı (hepsi alındı ya da süresi doldu)"""
+        return (self.restored + self.expired >= self.count
+                or self.written_at + self.idle_ttl <= self.clock())
+
+    def pop(self, sid: str) -> Optional[bytes]:
+        """Oturumun durum baytlarını döndür ve kaydı tüket; yoksa veya süresi dolmuşsa None"""
+        key = sid.encode()
+        h = sid_hash(key)
+        mask = self.slots - 1
+        i = h & mask
+        while True:
+            slot_at = _HEADER.size + i * _SLOT.size
+            slot_hash, offset, length = _SLOT.unpack_from(self._mm, slot_at)
+            if offset == _EMPTY:
+                return None
+            if offset != _TOMBSTONE and slot_hash == h:
+                touched_at, sid_len = _RECORD.unpack_from(self._mm, offset)
+                start = offset + _RECORD.size
+                if self._mm[start:start + sid_len] == key:
+                    _SLOT.pack_into(self._mm, slot_at, slot_hash, _TOMBSTONE, 0)
+                    if touched_at + self.idle_ttl <= self.clock():
+                        self.expired += 1
+                        return None
+                    self.restored += 1
+                    return self._mm[start + sid_len:offset + length]
+            i = (i + 1) & mask
+
+    def entries(self) -> Iterator[Entry]:
+        """Henüz geri yüklenmemiş ve süresi dolmamış kayıtlar (sonraki snapshot'a taşınır)"""
+        deadline = self.clock() - self.idle_ttl
+        for i in range(self.slots):
+            _, offset, length = _SLOT.unpack_from(self._mm, _HEADER.size + i * _SLOT.size)
+            if offset == _EMPTY or offset == _TOMBSTONE:
+                continue
+            touched_at, sid_len = _RECORD.unpack_from(self._mm, offset)
+            if touched_at <= deadline:
+                continue
+            start = offset + _RECORD.size
+            yield (self._mm[start:start + sid_len], touched_at,
+                   self._mm[start + sid_len:offset + length])
+
+    def close(self):
+        self._mm.close()
+
+    def stats(self) -> Dict:
+        return {
+            "sessions": self.count,
+            "restored": self.restored,
+            "expired": self.expired,
+            "age_seconds": round(self.clock() - self.written_at, 1),
+        }
+
+
+def lock_snapshot(path: str) -> bool:
+    """Snapshot dosyasını bu süreç adına kilitle; başka süreç tutuyorsa False"""
+    global _lock_file
+    f = open(f"{path}.lock", "a")
+    try:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        f.close()
+        return False
+    _lock_file = f
+    return True
+
+
+async def save_snapshot(store, path: str, chunk: int = SESSION_SNAPSHOT_CHUNK) -> Dict:
+    """Oturum tablosunu yaz; durumlar döngüde parça parça kodlanır, dosya thread'de yazılır"""
+    started = time.perf_counter()
+    # Aynı sid iki kez gelebilir (önceki snapshot'tan taşınırken geri yüklenen);
+    # sonra gelen canlı durum geçerlidir
+    entries: Dict[bytes, Entry] = {}
+    for n, entry in enumerate(store.snapshot_entries(), 1):
+        entries[entry[0]] = entry
+        if n % chunk == 0:
+            await asyncio.sleep(0)
+    # Kayıt zamanlarıyla aynı saat (SessionStore.wall_clock)
+    written_at = store.wall_clock()
+    size = await asyncio.to_thread(write_snapshot, path, list(entries.values()), written_at)
+    result = {"sessions": len(entries), "bytes": size,
+              "seconds": round(time.perf_counter() - started, 3), "written_at": written_at}
+    store.last_snapshot = result
+    return result
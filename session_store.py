@@ -0,0 +1,427 @@
+import os
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from typing import Callable, Deque, Dict, Iterator, List, Optional, Set, Tuple
+
+from app_logging import get_logger
+from session_snapshot import SESSION_SNAPSHOT_PATH, Entry, SessionSnapshot, lock_snapshot
+
+logger = get_logger(__name__)
+
+# Oturum saklama ayarları
+SESSION_IDLE_TTL = float(os.getenv("SESSION_IDLE_TTL", "1800"))  # 30 dk cevapsız kalan oyun silinir
+SESSION_MAX = int(os.getenv("SESSION_MAX", "50000"))  # Üst sınır aşılınca en eski (LRU) oturum atılır
+SESSION_FINISHED_GRACE = float(os.getenv("SESSION_FINISHED_GRACE", "60"))  # Biten oyun bu süre sonra silinir
+
+# "memory": süreç içi tablo (tek worker, en hızlısı), "sqlite": makinedeki tüm worker'lar için
+# paylaşılan, yeniden başlatmada korunan tablo (istek başına daha yavaş)
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "memory")
+SESSION_DB_PATH = os.getenv("SESSION_DB_PATH", "sessions.db")
+SESSION_SWEEP_INTERVAL = float(os.getenv("SESSION_SWEEP_INTERVAL", "1.0"))
+# SQLite yazım kilidi için en fazla bekleme (saniye). Çağrılar event loop'ta çalışır;
+# kilit bu sürede alınamazsa istek SessionStoreBusy ile hemen reddedilir (503)
+SESSION_DB_BUSY_TIMEOUT = float(os.getenv("SESSION_DB_BUSY_TIMEOUT", "0.05"))
+
+
+class SessionFinished(Exception):
+    """Oyun bitmiş; bekleme süresi dolana kadar oturum cevap kabul etmez"""
+
+
+class SessionStoreBusy(Exception):
+    """Paylaşılan depo başka bir worker'ın yazımıyla kilitli; istek tekrar denenmeli"""
+
+
+class SessionBackend(ABC):
+    """Oturum deposu arayüzü.
+
+    get() ile alınan durum değiştirildikten sonra put() ile geri yazılmalıdır;
+    paylaşılan depolarda değişiklik ancak böyle diğer worker'lara ulaşır.
+    """
+
+    # Snapshot yazılacak dosya (sadece süreç içi tablo; None ise kapalı)
+    snapshot_path: Optional[str] = None
+
+    @abstractmethod
+    def get(self, sid: str) -> Optional[object]:
+        """Oturum yoksa None, bitmişse SessionFinished"""
+
+    @abstractmethod
+    def put(self, sid: str, state: object):
+        """Yeni oturumu ekle veya değişen durumu geri yaz"""
+
+    def __contains__(self, sid: str) -> bool:
+        """Cevap kabul eden (canlı ve bitmemiş) oturum var mı"""
+        try:
+            return self.get(sid) is not None
+        except SessionFinished:
+            return False
+
+    @abstractmethod
+    def finish(self, sid: str, state: object) -> bool:
+        """Son durumu yaz ve oturumu bekleme süresinden sonra silinmek üzere işaretle.
+
+        Oyunu bu çağrı bitirdiyse True (zaten bitmişse False).
+        """
+
+    @abstractmethod
+    def stats(self) -> Dict[str, int]:
+        """Canlı oturum sayısı ve silinme sayaçları"""
+
+
+class SessionStore(SessionBackend):
+    """TTL ve LRU ile sınırlandırılmış oturum tablosu.
+
+    Oturumlar son erişim sırasına göre tutulur; süresi dolanlar hep baştadır.
+    Bu yüzden süpürme tabloyu taramaz, sadece baştaki süresi dolmuş kayıtları
+    atar (işlem başına amortize O(1)).
+
+    dumps/loads verilirse tablo snapshot'a yazılabilir; restore() ile eşlenen
+    snapshot'taki oturumlar tabloda bulunamadıklarında oradan açılır.
+    """
+
+    def __init__(self, idle_ttl: float = SESSION_IDLE_TTL,
+                 max_sessions: int = SESSION_MAX,
+                 finished_grace: float = SESSION_FINISHED_GRACE,
+                 clock: Callable[[], float] = time.monotonic,
+                 dumps: Optional[Callable[[object], bytes]] = None,
+                 loads: Optional[Callable[[bytes], object]] = None,
+                 wall_clock: Callable[[], float] = time.time):
+        self.idle_ttl = idle_ttl
+        self.max_sessions = max_sessions
+        self.finished_grace = finished_grace
+        self.clock = clock
+        self.dumps = dumps
+        self.loads = loads
+        # Snapshot'taki zamanlar süreçler arası geçerli olsun diye duvar saati
+        self.wall_clock = wall_clock
+        self._snapshot: Optional[SessionSnapshot] = None
+        # Eski snapshot'ı okumakta olan snapshot yazımları; bitene kadar eşleme kapatılmaz
+        self._snapshot_readers = 0
+        self.last_snapshot: Optional[Dict] = None
+
+        # sid -> [son erişim, durum]; en eski erişim başta (durum canlı nesnedir, kopyalanmaz)
+        self._sessions: "OrderedDict[str, List]" = OrderedDict()
+        # (silinme zamanı, sid); bekleme süresi sabit olduğu için sıralı kalır
+        self._finished: Deque[Tuple[float, str]] = deque()
+        # Bitmiş oyunlar (bekleme süresince cevap reddedilir)
+        self._finished_sids: Set[str] = set()
+
+        self.created = 0
+        self.expired = 0
+        self.evicted = 0
+        self.finished_removed = 0
+        self.restored = 0
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def get(self, sid: str) -> Optional[object]:
+        """Oturumu getir ve son erişim zamanını yenile"""
+        now = self.clock()
+        self.sweep(now)
+        if sid in self._finished_sids:
+            raise SessionFinished(f"session {sid} is already finished")
+        entry = self._sessions.get(sid)
+        if entry is None:
+            return self._restore(sid, now) if self._snapshot is not None else None
+        entry[0] = now
+        self._sessions.move_to_end(sid)
+        return entry[1]
+
+    def put(self, sid: str, state: object):
+        now = self.clock()
+        self.sweep(now)
+        if sid in self._sessions:
+            self._sessions[sid] = [now, state]
+            self._sessions.move_to_end(sid)
+            return
+
+        self._sessions[sid] = [now, state]
+        self.created += 1
+        self._evict_overflow()
+
+    def _evict_overflow(self):
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+            self.evicted += 1
+
+    def restore(self, snapshot: SessionSnapshot):
+        """Önceki süreçten kalan snapshot'ı bağla (oturumlar istendikçe açılır)"""
+        self._snapshot = snapshot
+
+    def _restore(self, sid: str, now: float) -> Optional[object]:
+        """Tabloda olmayan oturumu snapshot'tan aç; açılamayan kayıt (ör. bilinmeyen
+        havuz sürümü) tüketilmiş sayılır ve hata çağırana iletilir"""
+        snapshot = self._snapshot
+        data = snapshot.pop(sid)
+        if snapshot.exhausted:
+            logger.info("♻️ Session snapshot drained: %d restored, %d expired",
+                        snapshot.restored, snapshot.expired)
+            self._snapshot = None
+            if not self._snapshot_readers:
+                snapshot.close()
+        if data is None:
+            return None
+        state = self.loads(data)
+        self._sessions[sid] = [now, state]
+        self.restored += 1
+        self._evict_overflow()
+        return state
+
+    def snapshot_entries(self) -> Iterator[Entry]:
+        """Snapshot'a yazılacak kayıtlar: henüz açılmamış eski kayıtlar, sonra canlı tablo.
+
+        Biten oyunlar ve süresi dolanlar yazılmaz. Kayıtlar tek tek üretilir;
+        çağıran aralarda olay döngüsüne sıra verebilir. Bu sırada eski snapshot
+        tükenirse eşleme son okuyucu bitince kapatılır.
+        """
+        snapshot = self._snapshot
+        if snapshot is not None:
+            self._snapshot_readers += 1
+            try:
+                yield from snapshot.entries()
+            finally:
+                self._snapshot_readers -= 1
+                if snapshot is not self._snapshot and not self._snapshot_readers:
+                    snapshot.close()
+        now, wall = self.clock(), self.wall_clock()
+        deadline = now - self.idle_ttl
+        finished = self._finished_sids
+        for sid, entry in list(self._sessions.items()):
+            touched, state = entry
+            if touched > deadline and sid not in finished:
+                yield sid.encode(), wall - (now - touched), self.dumps(state)
+
+    def finish(self, sid: str, state: object) -> bool:
+        if sid in self._finished_sids:
+            return False
+        entry = self._sessions.get(sid)
+        if entry is not None:
+            entry[1] = state
+            self._finished_sids.add(sid)
+            self._finished.append((self.clock() + self.finished_grace, sid))
+        return True
+
+    def sweep(self, now: Optional[float] = None):
+        """Süresi dolan oturumları baştan temizle"""
+        if now is None:
+            now = self.clock()
+
+        while self._finished and self._finished[0][0] <= now:
+            _, sid = self._finished.popleft()
+            self._finished_sids.discard(sid)
+            if self._sessions.pop(sid, None) is not None:
+                self.finished_removed += 1
+
+        deadline = now - self.idle_ttl
+        while self._sessions:
+            sid, entry = next(iter(self._sessions.items()))
+            if entry[0] > deadline:
+                break
+            del self._sessions[sid]
+            self.expired += 1
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "live": len(self._sessions),
+            "created": self.created,
+            "expired": self.expired,
+            "evicted": self.evicted,
+            "finished_removed": self.finished_removed,
+            "restored": self.restored,
+            "snapshot": self._snapshot.stats() if self._snapshot is not None else None,
+            "last_snapshot": self.last_snapshot,
+        }
+
+
+class SqliteSessionStore(SessionBackend):
+    """Aynı makinedeki tüm uvicorn worker'larının paylaştığı SQLite (WAL) tablosu.
+
+    Durumlar dumps/loads ile bayt olarak saklanır. Süresi dolan satırlar
+    expires_at indeksi üzerinden, en fazla SESSION_SWEEP_INTERVAL'da bir silinir.
+    Satır sayısı tetikleyicilerle session_count tablosunda tutulur (COUNT(*)
+    taraması yapılmaz).
+
+    Amaç hız değil paylaşım ve kalıcılıktır: oturumlar tüm worker'larda görünür
+    ve süreç yeniden başlayınca kaybolmaz. İstek başına bellekteki tablodan
+    yavaştır ve yazımlar tek kilitte sıralanır; worker eklemek istek/saniyeyi
+    artırmaz (tek çekirdekli ölçüm için bkz. benchmarks/session_throughput.py).
+    Tek worker yetiyorsa "memory" kullanılmalı.
+
+    Çağrılar event loop'ta, thread'e geçmeden yapılır (işlem başına mikro
+    saniyeler). Kilit beklemesi busy_timeout ile sınırlıdır: başka worker yazarken
+    kilit alınamazsa worker'ı dondurmak yerine SessionStoreBusy yükseltilir;
+    süpürme o tur atlanır.
+    """
+
+    def __init__(self, path: str, dumps: Callable[[object], bytes],
+                 loads: Callable[[bytes], object],
+                 idle_ttl: float = SESSION_IDLE_TTL,
+                 max_sessions: int = SESSION_MAX,
+                 finished_grace: float = SESSION_FINISHED_GRACE,
+                 sweep_interval: float = SESSION_SWEEP_INTERVAL,
+                 busy_timeout: float = SESSION_DB_BUSY_TIMEOUT,
+                 clock: Callable[[], float] = time.time):
+        self.path = path
+        self.dumps = dumps
+        self.loads = loads
+        self.idle_ttl = idle_ttl
+        self.max_sessions = max_sessions
+        self.finished_grace = finished_grace
+        self.sweep_interval = sweep_interval
+        self.busy_timeout = busy_timeout
+        # Süreçler arası karşılaştırılabilir olması için duvar saati
+        self.clock = clock
+
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid = None
+        self._next_sweep = 0.0
+
+        # Bu sürecin yaptığı işlemler
+        self.created = 0
+        self.expired = 0
+        self.evicted = 0
+        self.finished_removed = 0
+        self.busy = 0
+
+    def _db(self) -> sqlite3.Connection:
+        # Bağlantı fork sonrası paylaşılmamalı; her süreç kendi bağlantısını açar
+        if self._conn is None or self._pid != os.getpid():
+            conn = sqlite3.connect(self.path, isolation_level=None, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                " sid TEXT PRIMARY KEY,"
+                " state BLOB NOT NULL,"
+                " touched_at REAL NOT NULL,"
+                " expires_at REAL NOT NULL,"
+                " finished INTEGER NOT NULL DEFAULT 0"
+                ") WITHOUT ROWID"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS sessions_expires ON sessions(expires_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS sessions_touched ON sessions(touched_at)")
+            # Satır sayacı: tüm worker'ların ekleme / silmeleri tetikleyicilerle işlenir.
+            # Kurulum bir kez yapılır; kilidi uzun bekleyebilir
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("CREATE TABLE IF NOT EXISTS session_count (n INTEGER NOT NULL)")
+            conn.execute("INSERT INTO session_count SELECT COUNT(*) FROM sessions"
+                         " WHERE NOT EXISTS (SELECT 1 FROM session_count)")
+            conn.execute("CREATE TRIGGER IF NOT EXISTS sessions_count_insert AFTER INSERT ON sessions"
+                         " BEGIN UPDATE session_count SET n = n + 1; END")
+            conn.execute("CREATE TRIGGER IF NOT EXISTS sessions_count_delete AFTER DELETE ON sessions"
+                         " BEGIN UPDATE session_count SET n = n - 1; END")
+            conn.execute("COMMIT")
+            conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout * 1000)}")
+            self._conn = conn
+            self._pid = os.getpid()
+        return self._conn
+
+    def _execute(self, sql: str, params: Tuple = ()) -> sqlite3.Cursor:
+        try:
+            return self._db().execute(sql, params)
+        except sqlite3.OperationalError as e:
+            if "locked" not in str(e) and "busy" not in str(e):
+                raise
+            self.busy += 1
+            raise SessionStoreBusy(f"session store is busy: {e}") from None
+
+    def __len__(self) -> int:
+        return self._execute("SELECT n FROM session_count").fetchone()[0]
+
+    def get(self, sid: str) -> Optional[object]:
+        now = self.clock()
+        self._maybe_sweep(now)
+        row = self._execute(
+            "SELECT state, finished FROM sessions WHERE sid = ? AND expires_at > ?", (sid, now)
+        ).fetchone()
+        if row is None:
+            return None
+        if row[1]:
+            raise SessionFinished(f"session {sid} is already finished")
+        return self.loads(row[0])
+
+    def put(self, sid: str, state: object):
+        now = self.clock()
+        self._maybe_sweep(now)
+        data = self.dumps(state)
+        # Cevaplarda satır zaten var: tek UPDATE; yoksa yeni oturum ekle
+        updated = self._execute(
+            "UPDATE sessions SET state = ?, touched_at = ?, expires_at = ?"
+            " WHERE sid = ? AND finished = 0",
+            (data, now, now + self.idle_ttl, sid),
+        ).rowcount
+        if not updated:
+            self.created += self._execute(
+                "INSERT OR IGNORE INTO sessions (sid, state, touched_at, expires_at)"
+                " VALUES (?, ?, ?, ?)",
+                (sid, data, now, now + self.idle_ttl),
+            ).rowcount
+
+    def finish(self, sid: str, state: object) -> bool:
+        now = self.clock()
+        # Aynı oyunu iki worker aynı anda bitirirse sadece biri satırı günceller
+        return self._execute(
+            "UPDATE sessions SET state = ?, touched_at = ?, expires_at = ?, finished = 1"
+            " WHERE sid = ? AND finished = 0",
+            (self.dumps(state), now, now + self.finished_grace, sid),
+        ).rowcount > 0
+
+    def _maybe_sweep(self, now: float):
+        if now >= self._next_sweep:
+            self._next_sweep = now + self.sweep_interval
+            try:
+                self.sweep(now)
+            except SessionStoreBusy:
+                pass  # başka worker yazıyor; sonraki turda süpürülür
+
+    def sweep(self, now: Optional[float] = None):
+        """Süresi dolanları indeks üzerinden sil, üst sınır aşıldıysa en eskileri at"""
+        if now is None:
+            now = self.clock()
+        finished = self._execute(
+            "DELETE FROM sessions WHERE expires_at <= ? AND finished = 1", (now,)
+        ).rowcount
+        expired = self._execute("DELETE FROM sessions WHERE expires_at <= ?", (now,)).rowcount
+        self.finished_removed += finished
+        self.expired += expired
+
+        overflow = len(self) - self.max_sessions
+        if overflow > 0:
+            self.evicted += self._execute(
+                "DELETE FROM sessions WHERE sid IN"
+                " (SELECT sid FROM sessions ORDER BY touched_at LIMIT ?)", (overflow,)
+            ).rowcount
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "live": len(self),
+            "created": self.created,
+            "expired": self.expired,
+            "evicted": self.evicted,
+            "finished_removed": self.finished_removed,
+            "busy": self.busy,
+        }
+
+
+def create_session_store(dumps: Callable[[object], bytes],
+                         loads: Callable[[bytes], object]) -> SessionBackend:
+    """SESSION_BACKEND ayarına göre oturum deposunu oluştur"""
+    if SESSION_BACKEND == "sqlite":
+        return SqliteSessionStore(SESSION_DB_PATH, dumps, loads)
+    if SESSION_BACKEND != "memory":
+        raise ValueError(f"Unknown SESSION_BACKEND: {SESSION_BACKEND}")
+    store = SessionStore(dumps=dumps, loads=loads)
+    if SESSION_SNAPSHOT_PATH:
+        if lock_snapshot(SESSION_SNAPSHOT_PATH):
+            store.snapshot_path = SESSION_SNAPSHOT_PATH
+            # Sadece eşlenir; oturumlar ilk istendiklerinde açılır
+            snapshot = SessionSnapshot.open(SESSION_SNAPSHOT_PATH, store.idle_ttl)
+            if snapshot is not None:
+                store.restore(snapshot)
+        else:
+            logger.warning("⚠️ Session snapshot %s is owned by another worker; "
+                           "this worker's sessions are not snapshotted", SESSION_SNAPSHOT_PATH)
+    return store
@@ -0,0 +1,139 @@
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+import struct
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Tuple
+
+from app_logging import get_logger
+
+logger = get_logger(__name__)
+
+# "server": oturum sunucuda tutulur (session_id), "token": durum imzalı token'da taşınır
+SESSION_MODE = os.getenv("SESSION_MODE", "server")
+# Tüm worker/replikalarda aynı olmalı; yoksa süreç başına rastgele üretilir
+SESSION_TOKEN_SECRET = os.getenv("SESSION_TOKEN_SECRET", "")
+SESSION_TOKEN_TTL = float(os.getenv("SESSION_TOKEN_TTL", "1800"))
+# Tekrar kullanım kontrolü için hatırlanan en fazla token sayısı
+SESSION_TOKEN_REPLAY_MAX = int(os.getenv("SESSION_TOKEN_REPLAY_MAX", "200000"))
+
+# Oturum ikili biçimi değiştiğinde artırılır (eski token'lar reddedilir)
+TOKEN_VERSION = 3
+# sürüm, oyun nonce'u, adım (cevap sayısı), verilme zamanı
+_HEADER = struct.Struct("<B8sBI")
+_MAC_SIZE = 16
+
+
+class TokenError(Exception):
+    """Geçersiz, süresi dolmuş veya tekrar kullanılmış token"""
+
+
+class SessionTokenCodec:
+    """Oyun durumunu HMAC ile imzalanmış, ikili paketlenmiş token olarak taşır.
+
+    Token bir oyunun (nonce) belirli bir adımına bağlıdır. open() doğrular,
+    consume() adım uygulandıktan sonra token'ı harcar; reddedilen veya yarıda
+    kalan istek token'ı yakmaz. Her token bu süreçte en fazla bir kez harcanır;
+    tekrar kontrolü süreç içidir, farklı worker'lar arasında sadece TTL ile
+    sınırlanır (kaydedilen sonuçlar nonce ile tekilleştirilir).
+    """
+
+    def __init__(self, secret: bytes, ttl: float = SESSION_TOKEN_TTL,
+                 replay_max: int = SESSION_TOKEN_REPLAY_MAX,
+                 clock: Callable[[], float] = time.time):
+        self.secret = secret
+        self.ttl = ttl
+        self.replay_max = replay_max
+        self.clock = clock
+        # (nonce, adım) -> son geçerlilik; eklenme sırası ~ son geçerlilik sırası
+        self._used: "OrderedDict[Tuple[bytes, int], float]" = OrderedDict()
+
+        self.issued = 0
+        self.accepted = 0
+        self.rejected = 0
+        self.replays = 0
+
+    def _mac(self, body: bytes) -> bytes:
+        return hmac.new(self.secret, body, hashlib.sha256).digest()[:_MAC_SIZE]
+
+    def issue(self, nonce: bytes, step: int, payload: bytes) -> str:
+        body = _HEADER.pack(TOKEN_VERSION, nonce, step, int(self.clock())) + payload
+        self.issued += 1
+        return base64.urlsafe_b64encode(body + self._mac(body)).rstrip(b"=").decode()
+
+    def open(self, token: str) -> Tuple[bytes, int, bytes]:
+        """Token'ı doğrula (harcamaz); (nonce, adım, durum baytları) döndürür"""
+        try:
+            raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        except (ValueError, TypeError):
+            return self._reject("malformed token")
+        if len(raw) < _HEADER.size + _MAC_SIZE:
+            return self._reject("malformed token")
+
+        body, mac = raw[:-_MAC_SIZE], raw[-_MAC_SIZE:]
+        if not hmac.compare_digest(mac, self._mac(body)):
+            return self._reject("invalid token signature")
+
+        version, nonce, step, issued_at = _HEADER.unpack_from(body)
+        if version != TOKEN_VERSION:
+            return self._reject("unsupported token version")
+
+        now = self.clock()
+        expires_at = issued_at + self.ttl
+        if now > expires_at:
+            return self._reject("token expired")
+
+        self._sweep(now)
+        if (nonce, step) in self._used:
+            self.replays += 1
+            return self._reject("token already used")
+
+        self.accepted += 1
+        return nonce, step, body[_HEADER.size:]
+
+    def consume(self, nonce: bytes, step: int):
+        """Açılmış token'ı harca; aynı token'la eşzamanlı gelen ikinci istek TokenError alır"""
+        key = (nonce, step)
+        if key in self._used:
+            self.replays += 1
+            return self._reject("token already used")
+        # Token'ın kalan ömrü en fazla TTL: o zamana kadar hatırlanır
+        self._used[key] = self.clock() + self.ttl
+        while len(self._used) > self.replay_max:
+            self._used.popitem(last=False)
+
+    def _reject(self, reason: str):
+        self.rejected += 1
+        raise TokenError(reason)
+
+    def _sweep(self, now: float):
+        while self._used:
+            key, expires_at = next(iter(self._used.items()))
+            if expires_at > now:
+                break
+            del self._used[key]
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "issued": self.issued,
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "replays": self.replays,
+            "remembered": len(self._used),
+        }
+
+
+def create_token_codec() -> SessionTokenCodec:
+    secret = SESSION_TOKEN_SECRET.encode()
+    if not secret:
+        if SESSION_MODE == "token":
+            logger.warning("⚠️ SESSION_TOKEN_SECRET not set, tokens are only valid on this process")
+        secret = secrets.token_bytes(32)
+    return SessionTokenCodec(secret)
+
+
+def new_nonce() -> bytes:
+    return secrets.token_bytes(8)
@@ -0,0 +1,158 @@
+"""Biten oyunlardan artımlı güncellenen bellek içi istatistik özetleri.
+
+Her oyun üç kovaya eklenir: saatlik, günlük ve başlangıçtan beri toplam. Bir kova
+sınıf sayılarını, Belirsiz sayısını, oyun başına soru dağılımını ve tahmine göre
+soru başına cevap dağılımını tutar. Sorgu, pencereye düşen kovaları toplar;
+saatlik saklama süresini aşan pencereler günlük kovalardan hesaplanır.
+
+Özetler süreç içidir; çok worker'lı kurulumda her worker kendi oyunlarını görür,
+game_results'tan yeniden kurulum (FirebaseService.rebuild_stats) hepsini toplar.
+"""
+import math
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+STATS_HOURLY_RETENTION_HOURS = int(os.getenv("STATS_HOURLY_RETENTION_HOURS", "168"))
+STATS_DAILY_RETENTION_DAYS = int(os.getenv("STATS_DAILY_RETENTION_DAYS", "90"))
+
+# Cevap değerleri (Likert) -2..2 -> dizi indeksi 0..4
+_ANSWER_VALUES = (-2, -1, 0, 1, 2)
+
+
+class RollupBucket:
+    __slots__ = ("games", "uncertain", "classes", "questions", "answers")
+
+    def __init__(self):
+        self.games = 0
+        self.uncertain = 0
+        self.classes: Dict[str, int] = {}
+        self.questions: Dict[int, int] = {}  # soru sayısı -> oyun
+        # (soru, tahmin) -> cevap değeri başına sayı
+        self.answers: Dict[Tuple[int, str], List[int]] = {}
+
+    def add(self, predicted_class: str, asked_questions: List[int], answers: List[int]):
+        self.games += 1
+        if predicted_class == "Belirsiz":
+            self.uncertain += 1
+        self.classes[predicted_class] = self.classes.get(predicted_class, 0) + 1
+        n = len(asked_questions)
+        self.questions[n] = self.questions.get(n, 0) + 1
+        for q, v in zip(asked_questions, answers):
+            counts = self.answers.get((q, predicted_class))
+            if counts is None:
+                counts = self.answers[(q, predicted_class)] = [0] * len(_ANSWER_VALUES)
+            counts[v + 2] += 1
+
+    def merge(self, other: "RollupBucket"):
+        self.games += other.games
+        self.uncertain += other.uncertain
+        for c, n in other.classes.items():
+            self.classes[c] = self.classes.get(c, 0) + n
+        for k, n in other.questions.items():
+            self.questions[k] = self.questions.get(k, 0) + n
+        for key, counts in other.answers.items():
+            mine = self.answers.get(key)
+            if mine is None:
+                self.answers[key] = list(counts)
+            else:
+                for i, n in enumerate(counts):
+                    mine[i] += n
+
+
+class StatsRollup:
+    def __init__(self, hourly_retention: int = STATS_HOURLY_RETENTION_HOURS,
+                 daily_retention: int = STATS_DAILY_RETENTION_DAYS):
+        self.hourly_retention = hourly_retention
+        self.daily_retention = daily_retention
+        # saat / gün numarası (epoch // 3600, // 86400) -> kova; eskiden yeniye
+        self._hours: "OrderedDict[int, RollupBucket]" = OrderedDict()
+        self._days: "OrderedDict[int, RollupBucket]" = OrderedDict()
+        self.total = RollupBucket()
+        self.started_at = time.time()
+
+    def add_result(self, result: Dict):
+        """game_results belgesi biçimindeki sonucu ekle (canlı veya yeniden kurulum)"""
+        timestamp = result.get("timestamp")
+        ts = timestamp.timestamp() if timestamp is not None else time.time()
+        self.add(result.get("predicted_class", ""), result.get("asked_questions") or [],
+                 result.get("answers") or [], ts)
+
+    def add(self, predicted_class: str, asked_questions: List[int], answers: List[int],
+            ts: float):
+        hour, day = int(ts // 3600), int(ts // 86400)
+        for key, buckets, retention in ((hour, self._hours, self.hourly_retention),
+                                        (day, self._days, self.daily_retention)):
+            bucket = buckets.get(key)
+            if bucket is None:
+                newest = next(reversed(buckets)) if buckets else key
+                if key <= newest - retention:
+                    continue  # saklama süresinden eski
+                bucket = buckets[key] = RollupBucket()
+                if key < newest:
+                    # Sıra dışı (eski) kova: sıralamayı koru (yeniden kurulumda nadir)
+                    ordered = sorted(buckets.items())
+                    buckets.clear()
+                    buckets.update(ordered)
+                else:
+                    while next(iter(buckets)) <= key - retention:
+                        buckets.popitem(last=False)
+            bucket.add(predicted_class, asked_questions, answers)
+        self.total.add(predicted_class, asked_questions, answers)
+
+    def query(self, window_hours: Optional[float], now: Optional[float] = None,
+              answer_labels: Optional[Dict[int, str]] = None) -> Dict:
+        """Son window_hours saatin özeti (None: başlangıçtan / yeniden kurulumdan beri)"""
+        now = time.time() if now is None else now
+        series: List[Dict] = []
+        if window_hours is None:
+            merged, resolution = self.total, "all"
+            since = self.started_at
+        else:
+            if window_hours <= self.hourly_retention:
+                buckets, size, resolution = self._hours, 3600, "hour"
+            else:
+                buckets, size, resolution = self._days, 86400, "day"
+            first = int(now // size) - math.ceil(window_hours * 3600 / size) + 1
+            since = first * size
+            merged = RollupBucket()
+            for key, bucket in buckets.items():
+                if key >= first:
+                    merged.merge(bucket)
+                    series.append({"start": key * size, "games": bucket.games,
+                                   "classes": dict(bucket.classes)})
+        return self._summary(merged, since, now, resolution, series, answer_labels)
+
+    @staticmethod
+    def _summary(bucket: RollupBucket, since: float, now: float, resolution: str,
+                 series: List[Dict], answer_labels: Optional[Dict[int, str]]) -> Dict:
+        labels = [answer_labels.get(v, str(v)) if answer_labels else str(v)
+                  for v in _ANSWER_VALUES]
+        answers: Dict[str, Dict[str, Dict[str, int]]] = {}
+        for (q, predicted_class), counts in sorted(bucket.answers.items()):
+            answers.setdefault(str(q), {})[predicted_class] = dict(zip(labels, counts))
+        asked = sum(n * c for n, c in bucket.questions.items())
+        return {
+            "since": since,
+            "until": now,
+            "resolution": resolution,
+            "games": bucket.games,
+            "classes": dict(bucket.classes),
+            "uncertain_rate": bucket.uncertain / bucket.games if bucket.games else 0.0,
+            "questions_per_game": {
+                "mean": asked / bucket.games if bucket.games else 0.0,
+                "histogram": {str(n): c for n, c in sorted(bucket.questions.items())},
+            },
+            "answers_by_prediction": answers,
+            "series": series,
+        }
+
+
+def build_rollup(results: Iterable[Dict], since: float, **kwargs) -> StatsRollup:
+    """Sonuç akışından tek geçişte yeni özet kur (since: akışın başladığı an)"""
+    rollup = StatsRollup(**kwargs)
+    rollup.started_at = since
+    for result in results:
+        rollup.add_result(result)
+    return rollup
@@ -0,0 +1,11 @@
+"""Testler bellekteki sahte Firestore ile, yerel dosya yazmadan çalışır."""
+import os
+import sys
+
+# Ayarlar modüller yüklenirken okunur; uygulama modüllerinden önce
+os.environ["FIRESTORE_BACKEND"] = "memory"
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+for name in ("RESULT_JOURNAL_DIR", "SESSION_SNAPSHOT_PATH", "LIKELIHOOD_MODEL_PATH"):
+    os.environ[name] = ""
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,95 @@
+import asyncio
+import random
+
+from fake_firestore import InMemoryFirestore
+from firebase_service import AREA_WINDOW_SIZE, AreaWindow, FirebaseService
+from result_writer import ResultWriter
+
+CLASSES = ["Proje-Yarışma", "Medya", "Network", "Organizasyon", "Eğitim", "Belirsiz"]
+
+
+def recount(db: InMemoryFirestore, size: int = AREA_WINDOW_SIZE) -> dict:
+    """Son size sonucun tam sayımı (yazım sırasıyla)"""
+    counts = {}
+    for _, data in db._scan("game_results")[-size:]:
+        counts[data["predicted_class"]] = counts.get(data["predicted_class"], 0) + 1
+    return counts
+
+
+async def play(service: FirebaseService, games: int, seed: int = 0):
+    rng = random.Random(seed)
+    for _ in range(games):
+        await service.save_game_result(rng.choice(CLASSES), [1, 2, 3], {}, {})
+
+
+def test_incremental_window_matches_recount():
+    window = AreaWindow(50)
+    rng = random.Random(1)
+    played = []
+    for _ in range(500):
+        played.append(rng.choice(CLASSES))
+        window.add(played[-1])
+        expected = {}
+        for predicted_class in played[-50:]:
+            expected[predicted_class] = expected.get(predicted_class, 0) + 1
+        assert window.counts() == expected
+
+
+def test_window_matches_recount_over_fake_store():
+    async def scenario():
+        service = FirebaseService(db=InMemoryFirestore())
+        service.result_writer.flush_interval = 0.01
+        await play(service, 3 * AREA_WINDOW_SIZE)
+        await service.result_writer.stop()
+        assert service.area_window.counts() == recount(service.db)
+        # Üretimdeki uzlaştırma da fark bulmamalı
+        assert await service.reconcile_area_window() == {}
+
+    asyncio.run(scenario())
+
+
+def test_rejected_results_do_not_change_window():
+    async def scenario():
+        service = FirebaseService(db=InMemoryFirestore())
+        # İşçi başlamadan dolan kuyruk yeni kayıtları reddeder
+        service.result_writer = ResultWriter(service.db, max_queue=10, overflow="drop_newest",
+                                             flush_interval=0.01)
+        # İstatistik yeniden kurulumu sürüyor: gelen sonuçlar tampona da eklenir
+        service._stats_rebuild_buffer = []
+        await play(service, 25)
+        assert sum(service.area_window.counts().values()) == 10
+        assert service.stats_rollup.query(None)["games"] == 10
+        assert len(service._stats_rebuild_buffer) == 10
+        service._stats_rebuild_buffer = None
+        await service.result_writer.stop()
+        assert service.area_window.counts() == recount(service.db)
+
+    asyncio.run(scenario())
+
+
+def test_lost_results_are_reconciled():
+    async def scenario():
+        db = InMemoryFirestore()
+        service = FirebaseService(db=db)
+        service._area_window_ready = True
+        writer = service.result_writer
+        writer.max_retries = 0
+        writer.flush_interval = 0.01
+        await play(service, 20, seed=1)
+        await asyncio.sleep(0.1)
+
+        # Yazımlar başarısız: kabul edilen sonuçlar kaybolur
+        db.error_rate = 1.0
+        await play(service, 30, seed=2)
+        await asyncio.sleep(0.1)
+        assert writer.failed == 30
+        db.error_rate = 0.0
+
+        # Kayıp pencereyi eskimiş işaretler; sonraki ağırlık yenilemesi uzlaştırır
+        assert service._area_window_stale
+        await service._refresh_area_weights()
+        assert not service._area_window_stale
+        assert service.area_window.counts() == recount(db)
+        await service.shutdown()
+
+    asyncio.run(scenario())
@@ -0,0 +1,107 @@
+import asyncio
+import time
+
+import pytest
+
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+from fake_firestore import InMemoryFirestore, ServiceUnavailable
+from firebase_service import FirebaseService
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_breaker_transitions():
+    clock = Clock()
+    opened = []
+    breaker = CircuitBreaker("test", failure_threshold=3, reset_timeout=10, clock=clock,
+                             on_open=lambda: opened.append(clock.now))
+
+    # Kapalı: ardışık olmayan hatalar devreyi açmaz
+    breaker.record(False)
+    breaker.record(False)
+    breaker.record(True)
+    breaker.record(False)
+    breaker.record(False)
+    assert breaker.state == CLOSED and breaker.allow()
+
+    # Kapalı -> açık
+    breaker.record(False)
+    assert breaker.state == OPEN and opened == [100.0]
+    assert not breaker.allow()
+    assert breaker.retry_in() == 10
+    clock.now += 4
+    assert not breaker.allow() and breaker.retry_in() == 6
+
+    # Açık -> yarı açık: tek deneme çağrısı; deneme başarısızsa tekrar açık
+    clock.now += 6
+    assert breaker.allow() and breaker.state == HALF_OPEN
+    assert not breaker.allow()
+    breaker.record(False)
+    assert breaker.state == OPEN and len(opened) == 2
+
+    # Yarı açık -> kapalı
+    clock.now += 10
+    assert breaker.allow()
+    breaker.record(True)
+    assert breaker.state == CLOSED and breaker.allow() and breaker.allow()
+    assert breaker.stats()["trips"] == 2 and breaker.stats()["probes"] == 2
+    assert breaker.stats()["rejected"] == 3
+
+
+def test_run_counts_errors_timeouts_and_slow_calls():
+    async def scenario():
+        breaker = CircuitBreaker("test", failure_threshold=3, reset_timeout=60, slow_fraction=0.5)
+
+        def fail():
+            raise ServiceUnavailable("down")
+
+        with pytest.raises(ServiceUnavailable):
+            await breaker.call(fail, deadline=1.0)
+        with pytest.raises(asyncio.TimeoutError):
+            await breaker.call(time.sleep, 0.3, deadline=0.05)
+        # Bütçenin yarısından uzun süren başarılı çağrı da hata sayılır
+        await breaker.call(time.sleep, 0.06, deadline=0.1)
+        assert breaker.state == OPEN
+        assert (breaker.failures, breaker.timeouts, breaker.slow_calls) == (1, 1, 1)
+        with pytest.raises(CircuitOpenError):
+            await breaker.call(lambda: None, deadline=1.0)
+
+    asyncio.run(scenario())
+
+
+def test_call_enforces_deadline_and_opens_circuit():
+    async def scenario():
+        db = InMemoryFirestore(latency=0.3)
+        service = FirebaseService(db=db)
+        service.breaker.failure_threshold = 2
+        get = db.collection("game_results").document("a").get
+
+        for _ in range(2):
+            started = time.perf_counter()
+            with pytest.raises(asyncio.TimeoutError, match="budget"):
+                await service._call("doc_get", get, deadline=0.05)
+            # Yavaş çağrı beklenmez, bütçe dolunca dönülür
+            assert time.perf_counter() - started < 0.2
+        assert service.breaker.state == OPEN
+        assert service.breaker.timeouts == 2
+
+        # Açık devre: istemci çağrılmadan reddedilir
+        rpcs = db.rpcs
+        with pytest.raises(CircuitOpenError):
+            await service._call("doc_get", get, deadline=0.05)
+        assert db.rpcs == rpcs
+
+        # Bütçe içindeki çağrı başarılı olur
+        db.latency = 0.0
+        service.breaker.reset_timeout = 0
+        assert not (await service._call("doc_get", get, deadline=1.0)).exists
+        assert service.breaker.state == CLOSED
+        await asyncio.sleep(0.3)  # bütçeyi aşan thread'ler bitsin
+
+    asyncio.run(scenario())
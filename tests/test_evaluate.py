@@ -0,0 +1,25 @@
+import random
+
+from fastapi.testclient import TestClient
+
+ANSWERS = ["kesinlikle_evet", "evet", "bilmiyorum", "hayir", "kesinlikle_hayir"]
+
+
+def test_evaluated_games_are_not_recorded():
+    import main
+    from firebase_service import firebase_service
+
+    rng = random.Random(0)
+    with TestClient(main.app) as client:
+        before = client.get("/stats?window=all").json()["games"]
+        enqueued = firebase_service.result_writer.stats()["enqueued"]
+        window = firebase_service.area_window.counts()
+        for _ in range(20):
+            questions = rng.sample(range(len(main.POOLS.current)), main.MAX_QUESTIONS)
+            answers = [{"question_id": q, "answer": rng.choice(ANSWERS)} for q in questions]
+            out = client.post("/evaluate", json={"answers": answers}).json()
+            assert out["done"] and out["prediction"]
+        # Alan penceresi, istatistikler ve yazım kuyruğu değişmez
+        assert client.get("/stats?window=all").json()["games"] == before
+        assert firebase_service.result_writer.stats()["enqueued"] == enqueued
+        assert firebase_service.area_window.counts() == window
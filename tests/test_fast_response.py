@@ -0,0 +1,54 @@
+import asyncio
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+
+from fast_response import QuestionResponses
+
+
+def route_field(app, path: str):
+    return next(route.response_field for route in app.routes if getattr(route, "path", None) == path)
+
+
+def encoded(field, model) -> bytes:
+    """FastAPI'nin response_model + JSONResponse yolunun ürettiği gövde"""
+    content = asyncio.run(serialize_response(field=field, response_content=model))
+    return JSONResponse(content).body
+
+
+def pools():
+    import main
+
+    # Kaçış gerektiren metinler: tırnak, ters bölü, satır sonu, Türkçe karakter, emoji
+    odd = SimpleNamespace(texts=['"Tırnak" \\ ters bölü', "satır\nsonu\tsekme", "🎤 Sahne?"],
+                          version=7)
+    return [main.POOLS.current, odd]
+
+
+@pytest.mark.parametrize("pool", pools(), ids=["current", "escapes"])
+@pytest.mark.parametrize("token_mode", [False, True], ids=["server", "token"])
+def test_preencoded_bytes_match_response_model(pool, token_mode):
+    import main
+    from session_token import new_nonce
+
+    responses = QuestionResponses(pool.texts, main.LIKERT.keys(), pool.version)
+    choices = list(main.LIKERT.keys())
+    start_field = route_field(main.app, "/start")
+    next_field = route_field(main.app, "/answer")
+
+    for q, text in enumerate(pool.texts):
+        nonce = new_nonce()
+        sid = nonce.hex() if token_mode else str(uuid4())
+        token = main.TOKENS.issue(nonce, q % 8, b"state" * q) if token_mode else None
+
+        start = main.StartOut(session_id=sid, question_index=0, question=text, choices=choices,
+                              token=token, question_id=q, pool_version=pool.version)
+        assert responses.start(sid, q, token).body == encoded(start_field, start)
+
+        index = q % 8 + 1
+        out = main.NextOut(done=False, question_index=index, question=text, choices=choices,
+                           question_id=q, token=token)
+        assert responses.next_question(q, index, token).body == encoded(next_field, out)
@@ -0,0 +1,101 @@
+import asyncio
+import random
+from datetime import datetime, timedelta, timezone
+
+from fake_firestore import InMemoryFirestore
+from firebase_service import FirebaseService
+from game_export import load_export
+from result_journal import ResultJournal, replay
+from result_writer import WRITTEN_AT, ResultWriter
+
+CLASSES = ["Proje-Yarışma", "Medya", "Network", "Organizasyon", "Eğitim"]
+
+
+def result(rng: random.Random, finished_at: datetime) -> dict:
+    asked = rng.sample(range(40), 8)
+    return {
+        "timestamp": finished_at,
+        "predicted_class": rng.choice([*CLASSES, "Belirsiz"]),
+        "asked_questions": asked,
+        "answers": [rng.randint(-2, 2) for _ in asked],
+        "confidences": {c: 0.2 for c in CLASSES},
+        "pool_version": 1,
+    }
+
+
+async def write(db, results, batch_size=5):
+    writer = ResultWriter(db, batch_size=batch_size, flush_interval=0.01)
+    for data in results:
+        writer.submit("game_results", data)
+    await writer.stop()
+
+
+def exported_timestamps(path) -> list:
+    return sorted(load_export(str(path)).timestamp.tolist())
+
+
+def stored_timestamps(db) -> list:
+    return sorted(data["timestamp"].timestamp() for _, data in db._scan("game_results"))
+
+
+def test_late_results_are_exported(tmp_path):
+    async def scenario():
+        db = InMemoryFirestore()
+        service = FirebaseService(db=db)
+        path = str(tmp_path / "games.akgx")
+        rng = random.Random(0)
+        now = datetime.now(timezone.utc)
+
+        async def export():
+            summary = await service.export_game_results(path, CLASSES, page_size=7,
+                                                        block_rows=10, settle=0)
+            return summary["exported"]
+
+        await write(db, [result(rng, now) for _ in range(30)])
+        assert await export() == 30
+
+        # Kesintiden sonra yüklenen, imleçten eski zamanlı oyunlar
+        await write(db, [result(rng, now - timedelta(hours=2)) for _ in range(20)])
+        assert await export() == 20
+        assert await export() == 0
+        assert exported_timestamps(path) == stored_timestamps(db)
+
+    asyncio.run(scenario())
+
+
+def test_journal_replay_and_legacy_documents_are_exported(tmp_path):
+    async def scenario():
+        db = InMemoryFirestore()
+        service = FirebaseService(db=db)
+        path = str(tmp_path / "games.akgx")
+        rng = random.Random(1)
+        old = datetime.now(timezone.utc) - timedelta(days=3)
+
+        async def export():
+            return (await service.export_game_results(path, CLASSES, page_size=4,
+                                                      settle=0))["exported"]
+
+        # written_at'tan önce yazılmış belgeler sorguya girmez
+        batch = db.batch()
+        for _ in range(12):
+            batch.set(db.collection("game_results").document(), result(rng, old))
+        batch.commit()
+        await write(db, [result(rng, old + timedelta(days=1)) for _ in range(6)])
+        assert await export() == 6
+
+        assert await service.backfill_written_at(page_size=5) == 12
+        assert await service.backfill_written_at(page_size=5) == 0
+        assert all(WRITTEN_AT in data for _, data in db._scan("game_results"))
+        assert await export() == 12
+
+        # Günlükten elle yeniden oynatma da yazım zamanı koyar
+        journal = ResultJournal(str(tmp_path / "journal"), sync_every=1)
+        for _ in range(5):
+            journal.append("game_results/" + f"{rng.getrandbits(64):016x}", result(rng, old))
+        journal.fsync(journal.flush())
+        journal.close()
+        assert replay(str(tmp_path / "journal"), db) == 5
+        assert await export() == 5
+        assert exported_timestamps(path) == stored_timestamps(db)
+
+    asyncio.run(scenario())
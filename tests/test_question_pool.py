@@ -0,0 +1,56 @@
+import json
+import os
+import shutil
+
+import pytest
+
+from question_pool import PoolRegistry, UnknownPoolVersion
+
+CLASSES = ["Proje-Yarışma", "Medya", "Network", "Organizasyon", "Eğitim"]
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def pool_path(tmp_path):
+    path = tmp_path / "questions.json"
+    shutil.copy(os.path.join(ROOT, "questions.json"), path)
+    return path
+
+
+def edit_pool(path):
+    data = json.loads(path.read_text())
+    data["questions"][0]["q"] += "?"
+    path.write_text(json.dumps(data, ensure_ascii=False))
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+
+def test_unknown_version_does_not_touch_the_file(pool_path, monkeypatch):
+    registry = PoolRegistry(str(pool_path), CLASSES)
+    old = registry.current.version
+    edit_pool(pool_path)
+
+    def no_reload(*args, **kwargs):
+        raise AssertionError("request path must not reload the pool")
+
+    monkeypatch.setattr(registry, "reload", no_reload)
+    monkeypatch.setattr(registry, "_reload", no_reload)
+    for _ in range(3):
+        with pytest.raises(UnknownPoolVersion):
+            registry.get(old + 1)
+    assert registry.stats()["misses"] == 3
+    assert registry.get(old) is registry.current
+
+
+def test_new_version_is_found_after_periodic_reload(pool_path):
+    registry = PoolRegistry(str(pool_path), CLASSES)
+    old = registry.current
+    edit_pool(pool_path)
+    new_version = PoolRegistry(str(pool_path), CLASSES).current.version
+    with pytest.raises(UnknownPoolVersion):
+        registry.get(new_version)
+
+    assert registry.reload()
+    assert registry.get(new_version) is registry.current
+    # Eski sürümle başlamış oyunlar devam eder
+    assert registry.get(old.version) is old
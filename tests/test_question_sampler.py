@@ -0,0 +1,104 @@
+import math
+import random
+
+import pytest
+
+from question_sampler import AliasTable, QuestionSampler
+
+# 5 kategori, kategori başına farklı sayıda soru
+CATEGORY = [q % 5 for q in range(23)]
+WEIGHTS = (0.8, 1.4, 1.0, 1.2, 0.6)
+DRAWS = 200_000
+
+
+def assert_frequencies(counts, weights, draws=DRAWS):
+    """Her soru için |gözlenen - beklenen| <= 5 standart sapma"""
+    total = sum(weights.values())
+    for q, w in weights.items():
+        p = w / total
+        sigma = math.sqrt(draws * p * (1 - p))
+        assert abs(counts.get(q, 0) - draws * p) <= 5 * sigma + 1, (q, counts.get(q, 0), draws * p)
+    assert set(counts) <= set(weights)
+
+
+def test_alias_table_matches_weights():
+    random.seed(7)
+    weights = [WEIGHTS[c] for c in CATEGORY]
+    table = AliasTable(weights)
+    counts = {}
+    for _ in range(DRAWS):
+        q = table.sample()
+        counts[q] = counts.get(q, 0) + 1
+    assert_frequencies(counts, dict(enumerate(weights)))
+
+
+def test_alias_table_needs_positive_weight():
+    with pytest.raises(ValueError):
+        AliasTable([0.0, 0.0])
+    with pytest.raises(ValueError):
+        AliasTable([])
+
+
+@pytest.mark.parametrize("asked,boosted", [
+    ((), 0b00001),
+    ((0, 1, 6, 12), 0b00100),
+    ((0, 3, 5, 8, 9, 14, 17, 20), 0b10010),
+    (tuple(range(20)), 0b00001),
+])
+def test_next_matches_global_weight_times_boost(asked, boosted):
+    random.seed(11)
+    sampler = QuestionSampler(CATEGORY)
+    asked_mask = sum(1 << q for q in asked)
+    counts = {}
+    for _ in range(DRAWS):
+        q = sampler.next(WEIGHTS, asked_mask, boosted, boost=3.0, max_tries=1000)
+        counts[q] = counts.get(q, 0) + 1
+    assert None not in counts
+    expected = {q: WEIGHTS[c] * (3.0 if boosted >> c & 1 else 1.0)
+                for q, c in enumerate(CATEGORY) if q not in asked}
+    assert_frequencies(counts, expected)
+
+
+def test_next_falls_back_after_max_tries():
+    random.seed(3)
+    sampler = QuestionSampler(CATEGORY)
+    everything = (1 << len(CATEGORY)) - 1
+    for _ in range(5):
+        assert sampler.next(WEIGHTS, everything, 0b11111, max_tries=16) is None
+    assert sampler.stats()["fallbacks"] == 5
+
+    # Tek sorulmamış soru: az denemede çoğunlukla bulunamaz, çok denemede hep bulunur
+    last = len(CATEGORY) - 1
+    asked_mask = everything & ~(1 << last)
+    draws = [sampler.next(WEIGHTS, asked_mask, 0, max_tries=2) for _ in range(2000)]
+    assert set(draws) == {None, last}
+    assert draws.count(None) > draws.count(last)
+    assert sampler.stats()["fallbacks"] == 5 + draws.count(None)
+    assert all(sampler.next(WEIGHTS, asked_mask, 1 << CATEGORY[last], max_tries=10_000) == last
+               for _ in range(50))
+
+
+@pytest.mark.parametrize("n_asked", [0, 1, 4, 7, 12, -2])
+def test_game_selection_matches_per_question_weighting(n_asked):
+    """Oyundaki seçim eski mantıkla aynı: sorulmamış soru başına global ağırlık,
+    en az sorulan alan(lar)a 3x"""
+    import main
+
+    pool = main.POOLS.current
+    global_weights = {"Proje-Yarışma": 0.8, "Medya": 1.4, "Network": 1.0,
+                      "Organizasyon": 1.2, "Eğitim": 0.6}
+    rng = random.Random(n_asked)
+    st = main.GameSession(main.weights_vector(global_weights), pool)
+    for q in rng.sample(range(len(pool)), n_asked % len(pool)):
+        main.update_session_stats(st, q)
+
+    min_count = min(st.area_counts)
+    expected = {q: (3.0 if st.area_counts[c] == min_count else 1.0) * st.global_weights[c]
+                for q, c in enumerate(pool.category) if not st.asked_mask >> q & 1}
+    random.seed(n_asked)
+    draws = 50_000
+    counts = {}
+    for _ in range(draws):
+        q = main.get_next_question(st)[0]
+        counts[q] = counts.get(q, 0) + 1
+    assert_frequencies(counts, expected, draws)
@@ -0,0 +1,169 @@
+import asyncio
+import threading
+
+from fake_firestore import InMemoryFirestore
+from result_journal import ResultJournal
+from result_writer import ResultWriter
+
+
+def test_journal_pending_is_read_off_the_event_loop(tmp_path):
+    async def scenario():
+        journal = ResultJournal(str(tmp_path / "journal"), sync_every=1)
+        # İstemci yok: kayıtlar günlükte bekler
+        writer = ResultWriter(None, journal=journal)
+        for n in range(50):
+            writer.submit("game_results", {"predicted_class": "Medya", "n": n})
+        await asyncio.sleep(0.5)
+
+        loop_thread = threading.get_ident()
+        readers = []
+        read = journal.pending
+
+        def pending():
+            readers.append(threading.get_ident())
+            return read()
+
+        journal.pending = pending
+        assert [data["n"] for data in await writer.pending()] == list(range(50))
+        assert readers and loop_thread not in readers
+        await writer.stop()
+        journal.close()
+
+    asyncio.run(scenario())
+
+
+def test_queue_pending_without_journal():
+    async def scenario():
+        writer = ResultWriter(None)
+        writer.submit("game_results", {"n": 1})
+        assert await writer.pending() == [{"n": 1}]
+        writer.db = InMemoryFirestore()
+        await writer.stop()
+        assert await writer.pending() == []
+
+    asyncio.run(scenario())
+
+
+def test_writes_stay_in_journal_while_circuit_is_open(tmp_path):
+    from circuit_breaker import OPEN, CircuitBreaker
+
+    class Clock:
+        now = 0.0
+
+        def __call__(self):
+            return self.now
+
+    async def scenario():
+        db = InMemoryFirestore(error_rate=1.0)
+        clock = Clock()
+        breaker = CircuitBreaker("firestore", failure_threshold=1, reset_timeout=30, clock=clock)
+        journal = ResultJournal(str(tmp_path / "journal"), sync_every=1)
+        writer = ResultWriter(db, journal=journal, breaker=breaker, flush_interval=0.01)
+
+        writer.submit("game_results", {"n": 0})
+        await asyncio.sleep(0.4)
+        assert breaker.state == OPEN
+        assert writer.written == 0
+
+        # Devre açık: kayıtlar günlüğe yazılır, Firestore çağrılmaz
+        rpcs = db.rpcs
+        for n in range(1, 40):
+            assert writer.submit("game_results", {"n": n})
+        await asyncio.sleep(0.4)
+        assert db.rpcs == rpcs
+        assert sorted(data["n"] for data in await writer.pending()) == list(range(40))
+        assert writer.stats()["queued"] == 40
+
+        # Deneme zamanı geldi, Firestore düzeldi: günlük aynı ID'lerle yüklenir
+        db.error_rate = 0.0
+        clock.now += 30
+        await asyncio.sleep(0.5)
+        assert sorted(data["n"] for _, data in db._scan("game_results")) == list(range(40))
+        assert await writer.pending() == []
+        assert writer.written == 40 and writer.failed == 0
+        await writer.stop()
+        journal.close()
+
+    asyncio.run(scenario())
+
+
+def test_drop_oldest_keeps_newest_results():
+    async def scenario():
+        lost = []
+        writer = ResultWriter(None, max_queue=5, overflow="drop_oldest", on_lost=lost.append)
+        assert all(writer.submit("game_results", {"n": n}) for n in range(8))
+        assert [data["n"] for data in await writer.pending()] == [3, 4, 5, 6, 7]
+        assert writer.dropped == 3 and lost == [1, 1, 1]
+
+        db = writer.db = InMemoryFirestore()
+        await writer.stop()
+        assert sorted(data["n"] for _, data in db._scan("game_results")) == [3, 4, 5, 6, 7]
+
+    asyncio.run(scenario())
+
+
+def test_drop_newest_rejects_new_results():
+    async def scenario():
+        lost = []
+        writer = ResultWriter(None, max_queue=5, overflow="drop_newest", on_lost=lost.append)
+        accepted = [writer.submit("game_results", {"n": n}) for n in range(8)]
+        assert accepted == [True] * 5 + [False] * 3
+        assert [data["n"] for data in await writer.pending()] == [0, 1, 2, 3, 4]
+        # Reddedilen kayıt çağırana bildirilir, kayıp sayılmaz
+        assert writer.dropped == 3 and lost == []
+        assert writer.stats()["enqueued"] == 5
+
+        db = writer.db = InMemoryFirestore()
+        await writer.stop()
+        assert sorted(data["n"] for _, data in db._scan("game_results")) == [0, 1, 2, 3, 4]
+
+    asyncio.run(scenario())
+
+
+def test_full_batch_is_written_without_waiting_for_the_interval():
+    async def scenario():
+        db = InMemoryFirestore()
+        writer = ResultWriter(db, batch_size=10, flush_interval=30)
+        for n in range(25):
+            writer.submit("game_results", {"n": n})
+        await asyncio.sleep(0.2)
+        # İki tam batch yazıldı, kalan 5 kayıt süre dolmasını bekliyor
+        assert writer.written == 20 and writer.batches == 2
+        assert len(await writer.pending()) == 5
+        await writer.stop()
+        assert writer.written == 25
+
+    asyncio.run(scenario())
+
+
+def test_partial_batch_is_written_after_the_interval():
+    async def scenario():
+        db = InMemoryFirestore()
+        writer = ResultWriter(db, batch_size=10, flush_interval=0.3)
+        for n in range(4):
+            writer.submit("game_results", {"n": n})
+        await asyncio.sleep(0.1)
+        assert writer.written == 0
+        await asyncio.sleep(0.4)
+        assert writer.written == 4 and writer.batches == 1
+        await writer.stop()
+
+    asyncio.run(scenario())
+
+
+def test_shutdown_drains_the_queue():
+    async def scenario():
+        from firebase_service import FirebaseService
+
+        db = InMemoryFirestore(latency=0.01)
+        service = FirebaseService(db=db)
+        writer = service.result_writer
+        writer.flush_interval = 30
+        for n in range(250):
+            assert await service.save_game_result("Medya", [n], {}, {})
+        assert writer.written < 250
+        await service.shutdown()
+        assert writer.written == 250 and await writer.pending() == []
+        assert len(db._scan("game_results")) == 250
+
+    asyncio.run(scenario())
@@ -0,0 +1,117 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from session_snapshot import SessionSnapshot, save_snapshot
+from session_store import SessionStore
+
+TTL = 600
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def store(clock: Clock) -> SessionStore:
+    return SessionStore(idle_ttl=TTL, clock=clock, wall_clock=clock,
+                        dumps=str.encode, loads=bytes.decode)
+
+
+def test_snapshot_round_trip(tmp_path):
+    path = str(tmp_path / "sessions.snap")
+    clock = Clock()
+    old = store(clock)
+    for n in range(50):
+        old.put(f"s{n}", f"state {n}")
+    old.finish("s0", "done")
+    result = asyncio.run(save_snapshot(old, path))
+    # Biten oyun yazılmaz
+    assert result["sessions"] == 49
+
+    new = store(clock)
+    new.restore(SessionSnapshot.open(path, TTL, clock=clock))
+    assert new.get("s0") is None
+    assert new.get("s7") == "state 7" and new.get("s7") == "state 7"
+    assert new.stats()["restored"] == 1
+    # Açılmamış kayıtlar sonraki snapshot'a taşınır
+    result = asyncio.run(save_snapshot(new, path))
+    assert result["sessions"] == 49
+
+
+def test_expired_sessions_are_not_restored(tmp_path):
+    path = str(tmp_path / "sessions.snap")
+    clock = Clock()
+    old = store(clock)
+    old.put("stale", "a")
+    clock.now += TTL - 10
+    old.put("fresh", "b")
+    asyncio.run(save_snapshot(old, path))
+
+    # Yazıldıktan sonra "stale"ın süresi doldu, "fresh" hâlâ geçerli
+    clock.now += 20
+    snapshot = SessionSnapshot.open(path, TTL, clock=clock)
+    new = store(clock)
+    new.restore(snapshot)
+    assert new.get("stale") is None
+    assert snapshot.expired == 1 and not snapshot.exhausted
+    assert new.get("fresh") == "b"
+    # Tüm kayıtlar alındı: eşleme bırakılır
+    assert new.stats()["snapshot"] is None
+
+    # Snapshot'ın tamamının süresi dolmuşsa hiç eşlenmez
+    clock.now += TTL
+    assert SessionSnapshot.open(path, TTL, clock=clock) is None
+
+
+def test_snapshot_drained_while_a_save_reads_it(tmp_path):
+    path = str(tmp_path / "sessions.snap")
+    clock = Clock()
+    old = store(clock)
+    sids = [f"s{n}" for n in range(100)]
+    for sid in sids:
+        old.put(sid, sid.upper())
+    asyncio.run(save_snapshot(old, path))
+
+    async def scenario():
+        new = store(clock)
+        snapshot = SessionSnapshot.open(path, TTL, clock=clock)
+        new.restore(snapshot)
+        # Yazım her kayıtta döngüye sıra verir; bu arada tüm oturumlar geri yüklenir
+        saving = asyncio.create_task(save_snapshot(new, path, chunk=1))
+        await asyncio.sleep(0)
+        assert [new.get(sid) for sid in sids] == [sid.upper() for sid in sids]
+        assert new.stats()["snapshot"] is None and not snapshot._mm.closed
+        result = await saving
+        assert snapshot._mm.closed
+        return result
+
+    assert asyncio.run(scenario())["sessions"] == 100
+    restored = store(clock)
+    restored.restore(SessionSnapshot.open(path, TTL, clock=clock))
+    assert all(restored.get(sid) == sid.upper() for sid in sids)
+
+
+def test_failed_shutdown_snapshot_still_drains_results(tmp_path, monkeypatch):
+    import main
+    from firebase_service import firebase_service
+
+    async def broken(store, path):
+        raise ValueError("mmap closed or invalid")
+
+    drained = []
+    shutdown = firebase_service.shutdown
+
+    async def spy():
+        drained.append(True)
+        await shutdown()
+
+    monkeypatch.setattr(main.SESSIONS, "snapshot_path", str(tmp_path / "sessions.snap"))
+    monkeypatch.setattr(main, "save_snapshot", broken)
+    monkeypatch.setattr(firebase_service, "shutdown", spy)
+    with TestClient(main.app) as client:
+        client.get("/start")
+    assert drained == [True]
@@ -0,0 +1,166 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from session_store import SessionFinished, SessionStore, SqliteSessionStore
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store_and_clock(request, tmp_path):
+    clock = Clock()
+    if request.param == "memory":
+        store = SessionStore(idle_ttl=60, max_sessions=3, finished_grace=10, clock=clock)
+    else:
+        store = SqliteSessionStore(str(tmp_path / "sessions.db"), dumps=str.encode,
+                                   loads=bytes.decode, idle_ttl=60, max_sessions=3,
+                                   finished_grace=10, sweep_interval=0, clock=clock)
+    return store, clock
+
+
+def test_idle_sessions_expire(store_and_clock):
+    store, clock = store_and_clock
+    store.put("a", "1")
+    clock.now += 30
+    assert store.get("a") == "1"
+    clock.now += 61
+    assert store.get("a") is None
+    assert store.stats()["expired"] == 1
+
+
+def test_oldest_session_is_evicted(store_and_clock):
+    store, clock = store_and_clock
+    for n, sid in enumerate("abcd"):
+        clock.now += 1
+        store.put(sid, str(n))
+        if sid == "b":
+            clock.now += 1
+            store.put("a", store.get("a"))  # a en son kullanılan olur
+    store.get("d")
+    assert store.get("b") is None
+    assert [store.get(sid) for sid in "acd"] == ["0", "2", "3"]
+
+
+def test_finished_session_rejects_answers_until_removed(store_and_clock):
+    store, clock = store_and_clock
+    store.put("a", "1")
+    assert store.finish("a", "2")
+    assert not store.finish("a", "3")
+    with pytest.raises(SessionFinished):
+        store.get("a")
+    assert "a" not in store
+    clock.now += 11
+    assert store.get("a") is None
+    assert store.stats()["finished_removed"] == 1
+
+
+def test_answers_after_game_over_are_rejected():
+    import main
+    from firebase_service import firebase_service
+
+    with TestClient(main.app) as client:
+        before = client.get("/stats?window=all").json()["games"]
+        sid = client.get("/start").json()["session_id"]
+        while True:
+            out = client.post("/answer", json={"session_id": sid, "answer": "evet"}).json()
+            if out["done"]:
+                break
+        for _ in range(2):
+            r = client.post("/answer", json={"session_id": sid, "answer": "evet"})
+            assert r.status_code == 410
+        r = client.post("/answers", json={"session_id": sid, "answers": [{"answer": "evet"}]})
+        assert r.status_code == 410
+        assert client.get("/stats?window=all").json()["games"] == before + 1
+        assert firebase_service.result_writer.stats()["enqueued"] == before + 1
+
+
+def test_backend_interface_is_abstract():
+    from session_store import SessionBackend
+
+    with pytest.raises(TypeError):
+        SessionBackend()
+
+
+def test_sqlite_row_counter_matches_table(tmp_path):
+    import sqlite3
+
+    path = str(tmp_path / "sessions.db")
+    # Sayaç tablosundan önce oluşturulmuş veritabanı: açılışta sayılır
+    old = sqlite3.connect(path)
+    old.execute("CREATE TABLE sessions (sid TEXT PRIMARY KEY, state BLOB NOT NULL,"
+                " touched_at REAL NOT NULL, expires_at REAL NOT NULL,"
+                " finished INTEGER NOT NULL DEFAULT 0) WITHOUT ROWID")
+    old.execute("INSERT INTO sessions VALUES ('old', x'00', 1000, 1060, 0)")
+    old.commit()
+    old.close()
+
+    clock = Clock()
+    stores = [SqliteSessionStore(path, dumps=str.encode, loads=bytes.decode, idle_ttl=60,
+                                 max_sessions=5, sweep_interval=0, clock=clock)
+              for _ in range(2)]
+    for n in range(8):
+        clock.now += 1
+        stores[n % 2].put(f"s{n}", str(n))
+        stores[n % 2].put(f"s{n}", str(n))  # güncelleme sayılmaz
+    clock.now += 50
+    stores[0].sweep()
+    count = stores[0]._db().execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+    assert len(stores[0]) == len(stores[1]) == count <= 5
+
+
+def test_sqlite_write_lock_fails_fast(tmp_path):
+    import sqlite3
+    import time
+
+    from session_store import SessionStoreBusy
+
+    path = str(tmp_path / "sessions.db")
+    clock = Clock()
+    store = SqliteSessionStore(path, dumps=str.encode, loads=bytes.decode, idle_ttl=60,
+                               sweep_interval=0, busy_timeout=0.05, clock=clock)
+    store.put("a", "1")
+
+    # Başka bir worker yazım kilidini tutuyor
+    other = sqlite3.connect(path, isolation_level=None)
+    other.execute("BEGIN IMMEDIATE")
+    started = time.perf_counter()
+    with pytest.raises(SessionStoreBusy):
+        store.put("a", "2")
+    with pytest.raises(SessionStoreBusy):
+        store.finish("a", "2")
+    assert time.perf_counter() - started < 1.0
+    # WAL: okumalar kilidi beklemez; süpürme atlanır, istek başarısız olmaz
+    assert store.get("a") == "1"
+    assert store.stats()["busy"] >= 3
+    other.execute("COMMIT")
+    other.close()
+
+    store.put("a", "2")
+    assert store.get("a") == "2"
+
+
+def test_busy_store_returns_503(tmp_path, monkeypatch):
+    import sqlite3
+
+    import main
+
+    store = SqliteSessionStore(str(tmp_path / "sessions.db"), dumps=main.GameSession.to_bytes,
+                               loads=main.GameSession.from_bytes, sweep_interval=0)
+    monkeypatch.setattr(main, "SESSIONS", store)
+    with TestClient(main.app) as client:
+        sid = client.get("/start").json()["session_id"]
+        other = sqlite3.connect(store.path, isolation_level=None)
+        other.execute("BEGIN IMMEDIATE")
+        r = client.post("/answer", json={"session_id": sid, "answer": "evet"})
+        assert r.status_code == 503 and r.headers["retry-after"] == "1"
+        other.execute("COMMIT")
+        other.close()
+        # Durum yazılmamıştı: aynı cevap tekrar gönderilir
+        r = client.post("/answer", json={"session_id": sid, "answer": "evet"})
+        assert r.status_code == 200 and r.json()["question_index"] == 1
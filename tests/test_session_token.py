@@ -0,0 +1,153 @@
+import base64
+
+import pytest
+from fastapi.testclient import TestClient
+
+from session_token import _HEADER, TOKEN_VERSION, SessionTokenCodec, TokenError
+
+NONCE = b"\x01" * 8
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def codec(clock=None) -> SessionTokenCodec:
+    return SessionTokenCodec(b"secret", ttl=60, clock=clock or Clock())
+
+
+def encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode(token: str) -> bytes:
+    return base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+
+
+def test_token_round_trip():
+    tokens = codec()
+    assert tokens.open(tokens.issue(NONCE, 3, b"state")) == (NONCE, 3, b"state")
+
+
+@pytest.mark.parametrize("offset", [0, _HEADER.size, -1])
+def test_tampered_token_is_rejected(offset):
+    tokens = codec()
+    raw = bytearray(decode(tokens.issue(NONCE, 3, b"state")))
+    raw[offset] ^= 1
+    with pytest.raises(TokenError, match="signature"):
+        tokens.open(encode(bytes(raw)))
+    # Başka anahtarla imzalanmış token da sahtedir
+    with pytest.raises(TokenError, match="signature"):
+        tokens.open(SessionTokenCodec(b"other").issue(NONCE, 3, b"state"))
+    with pytest.raises(TokenError, match="malformed"):
+        tokens.open("abc")
+    assert tokens.rejected == 3
+
+
+def test_consumed_token_is_rejected():
+    tokens = codec()
+    token = tokens.issue(NONCE, 3, b"state")
+    # Açmak harcamaz: istek yarıda kalırsa aynı token tekrar gönderilebilir
+    tokens.open(token)
+    tokens.open(token)
+    tokens.consume(NONCE, 3)
+    with pytest.raises(TokenError, match="already used"):
+        tokens.open(token)
+    # Aynı token'la eşzamanlı açılmış ikinci istek harcarken reddedilir
+    with pytest.raises(TokenError, match="already used"):
+        tokens.consume(NONCE, 3)
+    assert tokens.replays == 2
+    # Aynı oyunun sonraki adımı etkilenmez
+    tokens.open(tokens.issue(NONCE, 4, b"state"))
+
+
+def test_expired_token_is_rejected_and_forgotten():
+    clock = Clock()
+    tokens = codec(clock)
+    token = tokens.issue(NONCE, 3, b"state")
+    clock.now += 60
+    tokens.open(token)
+    tokens.consume(NONCE, 3)
+    clock.now += 1
+    with pytest.raises(TokenError, match="expired"):
+        tokens.open(token)
+    # Harcanan token ömrü kadar hatırlanır
+    clock.now += 60
+    tokens.open(tokens.issue(NONCE, 5, b"state"))
+    assert tokens.stats()["remembered"] == 0
+
+
+def test_other_token_version_is_rejected():
+    tokens = codec()
+    body = _HEADER.pack(TOKEN_VERSION + 1, NONCE, 3, int(tokens.clock())) + b"state"
+    with pytest.raises(TokenError, match="version"):
+        tokens.open(encode(body + tokens._mac(body)))
+
+
+@pytest.fixture
+def token_client(monkeypatch):
+    import main
+
+    monkeypatch.setattr(main, "SESSION_MODE", "token")
+    with TestClient(main.app, raise_server_exceptions=False) as client:
+        yield client
+
+
+def test_failed_request_does_not_burn_the_token(token_client, monkeypatch):
+    import main
+
+    token = token_client.get("/start").json()["token"]
+    step_game = main.step_game
+
+    def broken(*args, **kwargs):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(main, "step_game", broken)
+    assert token_client.post("/answer", json={"token": token, "answer": "evet"}).status_code == 500
+    monkeypatch.setattr(main, "step_game", step_game)
+
+    r = token_client.post("/answer", json={"token": token, "answer": "evet"})
+    assert r.status_code == 200 and r.json()["question_index"] == 1
+    r = token_client.post("/answer", json={"token": token, "answer": "evet"})
+    assert r.status_code == 401 and r.json()["detail"] == "token already used"
+
+
+def test_replayed_final_token_records_one_result(monkeypatch):
+    import main
+    from firebase_service import firebase_service
+
+    monkeypatch.setattr(main, "SESSION_MODE", "token")
+    with TestClient(main.app) as client:
+        out = client.get("/start").json()
+        nonce = out["session_id"]
+        while True:
+            last = out["token"]
+            out = client.post("/answer", json={"token": last, "answer": "kesinlikle_evet"}).json()
+            if out["done"]:
+                break
+        # Başka bir replika bu token'ı hiç görmedi
+        monkeypatch.setattr(main.TOKENS, "_used", type(main.TOKENS._used)())
+        replayed = client.post("/answer", json={"token": last, "answer": "kesinlikle_evet"}).json()
+        assert replayed["done"] and replayed["prediction"] == out["prediction"]
+
+    results = [doc_id for doc_id, _ in firebase_service.db._scan("game_results")]
+    assert results.count(nonce) == 1
+
+
+def test_mismatched_batch_keeps_the_token(token_client):
+    out = token_client.get("/start").json()
+    token, current = out["token"], out["question_id"]
+    wrong = {"answer": "evet", "question_id": -1}
+
+    r = token_client.post("/answers", json={"token": token, "answers": [wrong]})
+    assert r.status_code == 200 and r.json()["token"] == token
+    # Token harcanmadı: doğru soruyla devam edilir
+    r = token_client.post("/answers", json={"token": token, "answers": [
+        {"answer": "evet", "question_id": current}, wrong]})
+    assert r.status_code == 200 and r.json()["token"] != token
+    r = token_client.post("/answer", json={"token": r.json()["token"], "answer": "evet"})
+    assert r.status_code == 200
@@ -0,0 +1,24 @@
+import pytest
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture(scope="module")
+def client():
+    import main
+
+    with TestClient(main.app) as client:
+        yield client
+
+
+@pytest.mark.parametrize("window", ["24h", "7d", "90d", "2160h", "0.5h", "all"])
+def test_valid_windows(client, window):
+    r = client.get(f"/stats?window={window}")
+    assert r.status_code == 200
+    assert r.json()["window"] == window
+
+
+@pytest.mark.parametrize("window", ["infh", "nand", "-infd", "1e308h", "1e308d", "0h", "-1d",
+                                    "91d", "2161h", "24", "h", "7w", ""])
+def test_invalid_windows_are_rejected(client, window):
+    r = client.get("/stats", params={"window": window})
+    assert r.status_code == 400
@@ -0,0 +1,58 @@
+import asyncio
+import json
+
+import pytest
+from fastapi import WebSocketDisconnect
+from fastapi.testclient import TestClient
+
+
+class FakeSocket:
+    def __init__(self, error=None, delay=0.0):
+        self.error = error
+        self.delay = delay
+        self.sent = []
+
+    async def send_text(self, text):
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        self.sent.append(text)
+
+
+@pytest.mark.parametrize("socket,reason", [
+    (FakeSocket(), None),
+    (FakeSocket(WebSocketDisconnect(1006)), "disconnect"),
+    (FakeSocket(RuntimeError('Cannot call "send" once a close message has been sent.')),
+     "disconnect"),
+    (FakeSocket(delay=1.0), "slow_client"),
+])
+def test_ws_send_reports_why_it_failed(socket, reason, monkeypatch):
+    import main
+
+    monkeypatch.setattr(main, "WS_SEND_TIMEOUT", 0.05)
+    assert asyncio.run(main._ws_send(socket, "{}")) == reason
+
+
+def test_game_over_websocket():
+    import main
+
+    with TestClient(main.app) as client:
+        with client.websocket_connect("/play") as ws:
+            out = json.loads(ws.receive_text())
+            while True:
+                ws.send_text(json.dumps({"answer": "evet", "question_id": out["question_id"]}))
+                out = json.loads(ws.receive_text())
+                if out["done"]:
+                    break
+            assert out["prediction"]
+            assert ws.receive()["code"] == 1000
+
+
+def test_oversized_message_closes_with_1009():
+    import main
+
+    with TestClient(main.app) as client:
+        with client.websocket_connect("/play") as ws:
+            ws.receive_text()
+            ws.send_text(json.dumps({"answer": "evet", "pad": "x" * main.WS_MAX_MESSAGE}))
+            assert ws.receive()["code"] == 1009
@@ -0,0 +1,132 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+
+from fake_firestore import InMemoryFirestore
+from firebase_service import AREA_RECONCILE_INTERVAL, WEIGHTS_CACHE_TTL, FirebaseService
+
+EQUAL = {"Proje-Yarışma": 1.0, "Medya": 1.0, "Network": 1.0, "Organizasyon": 1.0, "Eğitim": 1.0}
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def skewed_store() -> InMemoryFirestore:
+    """Medya çok, Eğitim az çıkmış oyunlar"""
+    db = InMemoryFirestore()
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    classes = ["Medya"] * 60 + ["Network"] * 20 + ["Proje-Yarışma"] * 20 + \
+        ["Organizasyon"] * 20 + ["Eğitim"] * 5
+    batch = db.batch()
+    for i, predicted_class in enumerate(classes):
+        batch.set(db.collection("game_results").document(), {
+            "predicted_class": predicted_class,
+            "timestamp": start + timedelta(seconds=i),
+        })
+    batch.commit()
+    return db
+
+
+async def refreshed(service: FirebaseService):
+    task = service._weights_refresh_task
+    if task is not None:
+        await task
+
+
+def test_first_call_returns_equal_weights_and_fills_cache():
+    async def scenario():
+        service = FirebaseService(db=skewed_store(), clock=Clock())
+        assert await service.get_cached_area_weights() == EQUAL
+        assert service.weights_cache_stats()["misses"] == 1
+        await refreshed(service)
+        weights = await service.get_cached_area_weights()
+        assert weights["Medya"] == 0.8 and weights["Eğitim"] == 1.5
+        assert service.weights_cache_stats()["hits"] == 1
+        await service.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_weights_refresh_after_ttl():
+    async def scenario():
+        clock = Clock()
+        service = FirebaseService(db=skewed_store(), clock=clock)
+        await service.get_cached_area_weights()
+        await refreshed(service)
+        first = service._weights_refresh_task
+
+        # TTL içinde: önbellekten, yenileme yok
+        clock.now += WEIGHTS_CACHE_TTL
+        await service.get_cached_area_weights()
+        assert service._weights_refresh_task is first
+        assert service.weights_cache_stats()["age_seconds"] == WEIGHTS_CACHE_TTL
+
+        # Yeni sonuçlar dağılımı değiştirir; TTL dolunca eski değer hemen döner
+        for _ in range(80):
+            await service.save_game_result("Eğitim", [1], {}, {})
+        old = service._weights
+        clock.now += 1
+        assert await service.get_cached_area_weights() is old
+        refreshing = service._weights_refresh_task
+        assert refreshing is not first and not refreshing.done()
+        # Yenileme sürerken gelen istekler aynı görevi paylaşır
+        for _ in range(5):
+            assert await service.get_cached_area_weights() is old
+        assert service._weights_refresh_task is refreshing
+        assert service.weights_cache_stats()["refreshing"]
+
+        await refreshed(service)
+        stats = service.weights_cache_stats()
+        assert stats["refreshes"] == 2 and stats["stale_hits"] == 6 and stats["age_seconds"] == 0
+        assert (await service.get_cached_area_weights())["Eğitim"] == 0.8
+        await service.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_stale_weights_are_served_while_firestore_fails():
+    async def scenario():
+        clock = Clock()
+        db = skewed_store()
+        service = FirebaseService(db=db, clock=clock)
+        await service.get_cached_area_weights()
+        await refreshed(service)
+        cached = dict(service._weights)
+
+        # Firestore yavaş ve hatalı; pencere uzlaştırması da zamanı gelmiş
+        db.latency = 0.3
+        db.error_rate = 1.0
+        clock.now += max(WEIGHTS_CACHE_TTL, AREA_RECONCILE_INTERVAL) + 1
+        started = time.perf_counter()
+        assert await service.get_cached_area_weights() == cached
+        assert time.perf_counter() - started < 0.1
+        await refreshed(service)
+        # Uzlaştırma başarısız: pencere ve ağırlıklar eşit ağırlığa düşmez
+        assert service._weights == cached
+        assert service.weights_cache_stats()["refreshes"] == 2
+        db.latency = 0.0
+        await service.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_unavailable_client_gives_equal_weights(monkeypatch):
+    def fail():
+        raise RuntimeError("no credentials")
+
+    async def scenario():
+        service = FirebaseService(db=None, clock=Clock())
+        service.db = None
+        monkeypatch.setattr(FirebaseService, "_create_client", staticmethod(fail))
+        assert await service.get_cached_area_weights() == EQUAL
+        await refreshed(service)
+        assert service.persistence_status == "degraded"
+        assert await service.get_cached_area_weights() == EQUAL
+        await service.shutdown()
+
+    asyncio.run(scenario())